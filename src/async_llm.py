@@ -0,0 +1,133 @@
+# src/async_llm.py
+
+import asyncio  # 导入asyncio实现并发生成
+import time  # 导入time模块用于请求节流
+from openai import AsyncOpenAI
+from llm import LLM
+from logger import LOG
+
+try:
+    import httpx  # Ollama 异步HTTP请求（openai 依赖中已包含）
+except ImportError:  # pragma: no cover - 未安装时退化为线程池中的同步请求
+    httpx = None
+
+
+class AsyncRateLimiter:
+    """
+    按每分钟请求数为模型调用分配发送时间，0 表示不限制。
+    协程之间不会并行执行，计算时间槽时无需加锁。
+    """
+
+    def __init__(self, requests_per_minute=0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncLLM(LLM):
+    """
+    LLM 的异步版本：OpenAI 使用 AsyncOpenAI，Ollama 使用 httpx.AsyncClient。
+    同步接口（generate_report 等）保持可用，缓存、系统提示和响应校验与 LLM 共用。
+    """
+
+    def __init__(self, config, session=None, cache=None):
+        super().__init__(config, session=session, cache=cache)
+        requests_per_minute = getattr(config, 'llm_rate_limits', {}).get(self.model, 0)
+        self.rate_limiter = AsyncRateLimiter(requests_per_minute)
+        self._async_client = None
+        self._async_client_loop = None
+
+    def _get_async_client(self):
+        # 异步客户端绑定在创建它的事件循环上，每次 asyncio.run 都需要新建
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            if self.model == "openai":
+                self._async_client = AsyncOpenAI(api_key=self.config.openai_api_key)
+            elif httpx is not None:
+                self._async_client = httpx.AsyncClient(timeout=30)
+            else:
+                self._async_client = None
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def aclose(self):
+        """关闭当前事件循环上的异步客户端"""
+        if self.model == "openai" and self._async_client is not None:
+            await self._async_client.close()
+        elif self._async_client is not None:
+            await self._async_client.aclose()
+        self._async_client = None
+        self._async_client_loop = None
+
+    async def agenerate_report(self, user_content, custom_system_prompt=None):
+        """
+        异步生成报告，参数和返回值与 generate_report 一致。
+        """
+        system_prompt = self._build_system_prompt(custom_system_prompt)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ]
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(system_prompt, user_content)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                LOG.info("命中 LLM 响应缓存，跳过模型调用")
+                return cached
+
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                await self.rate_limiter.acquire()
+                if self.model == "openai":
+                    content = await self._agenerate_openai_report(messages)
+                else:
+                    content = await self._agenerate_ollama_report(messages)
+                if cache_key is not None:
+                    self.cache.put(cache_key, content)
+                return content
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    LOG.error(f"Report generation failed after {max_retries} attempts: {str(e)}")
+                    return f"[ERROR] Report generation failed: {str(e)}"
+                await asyncio.sleep(1 * (attempt + 1))  # 指数退避
+
+    async def _agenerate_openai_report(self, messages):
+        LOG.info(f"Generating report with OpenAI {self.config.openai_model_name} (async)")
+        response = await self._get_async_client().chat.completions.create(
+            model=self.config.openai_model_name,
+            messages=messages,
+            **self.generation_params
+        )
+        content = response.choices[0].message.content
+        self._validate_response(content)
+        return content
+
+    async def _agenerate_ollama_report(self, messages):
+        client = self._get_async_client()
+        if client is None:
+            # 没有 httpx 时在线程池中执行同步请求，仍然可以并发
+            return await asyncio.to_thread(self._generate_ollama_report, messages)
+
+        LOG.info(f"Generating report with Ollama {self.config.ollama_model_name} (async)")
+        payload = {
+            "model": self.config.ollama_model_name,
+            "messages": messages,
+            "stream": False,
+            **self.default_ollama_params
+        }
+        response = await client.post(self.api_url, json=payload)
+        response.raise_for_status()
+        content = response.json().get("message", {}).get("content", "")
+        self._validate_response(content)
+        return content
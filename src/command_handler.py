@@ -21,6 +21,8 @@ class CommandHandler:
         # 添加订阅命令
         parser_add = subparsers.add_parser('add', help='Add a subscription')
         parser_add.add_argument('repo', type=str, help='The repository to subscribe to (e.g., owner/repo)')
+        parser_add.add_argument('--priority', type=int, help='Higher priority repositories are processed first')
+        parser_add.add_argument('--frequency-days', type=int, help='Fetch interval in days for this repository')
         parser_add.set_defaults(func=self.add_subscription)
 
         # 删除订阅命令
@@ -28,6 +30,12 @@ class CommandHandler:
         parser_remove.add_argument('repo', type=str, help='The repository to unsubscribe from (e.g., owner/repo)')
         parser_remove.set_defaults(func=self.remove_subscription)
 
+        # 批量导入订阅命令
+        parser_import = subparsers.add_parser('import', help='Import subscriptions from a file')
+        parser_import.add_argument('file', type=str, help='JSON list or text file with one repository per line')
+        parser_import.add_argument('--replace', action='store_true', help='Replace existing subscriptions')
+        parser_import.set_defaults(func=self.import_subscriptions)
+
         # 列出所有订阅命令
         parser_list = subparsers.add_parser('list', help='List all subscriptions')
         parser_list.set_defaults(func=self.list_subscriptions)
@@ -56,13 +64,19 @@ class CommandHandler:
 
     # 下面是各种命令对应的方法实现，每个方法都使用了相应的管理器来执行实际操作，并输出结果信息
     def add_subscription(self, args):
-        self.subscription_manager.add_subscription(args.repo)
+        self.subscription_manager.add_subscription(
+            args.repo, priority=args.priority, frequency_days=args.frequency_days
+        )
         print(f"Added subscription for repository: {args.repo}")
 
     def remove_subscription(self, args):
         self.subscription_manager.remove_subscription(args.repo)
         print(f"Removed subscription for repository: {args.repo}")
 
+    def import_subscriptions(self, args):
+        added = self.subscription_manager.import_subscriptions(args.file, replace=args.replace)
+        print(f"Imported {added} new subscriptions from: {args.file}")
+
     def list_subscriptions(self, args):
         subscriptions = self.subscription_manager.list_subscriptions()
         print("Current subscriptions:")
@@ -78,7 +92,12 @@ class CommandHandler:
         print(f"Exported progress for the last {args.days} days for repository: {args.repo}")
 
     def generate_daily_report(self, args):
-        self.report_generator.generate_github_report(args.file)
+        # 流式输出报告内容，边生成边打印
+        printed = 0
+        for report, _ in self.report_generator.generate_github_report_stream(args.file):
+            print(report[printed:], end='', flush=True)
+            printed = len(report)
+        print()
         print(f"Generated daily report from file: {args.file}")
 
     def print_help(self, args=None):
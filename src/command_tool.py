@@ -4,15 +4,18 @@ from config import Config  # 从config模块导入Config类，用于配置管理
 from github_client import GitHubClient  # 从github_client模块导入GitHubClient类，用于GitHub API操作
 from report_generator import ReportGenerator  # 从report_generator模块导入ReportGenerator类，用于报告生成
 from llm import LLM  # 从llm模块导入LLM类，可能用于语言模型相关操作
+from llm_cache import LLMCache  # 从llm_cache模块导入LLMCache类，缓存相同请求的生成结果
 from subscription_manager import SubscriptionManager  # 从subscription_manager模块导入SubscriptionManager类，管理订阅
 from command_handler import CommandHandler  # 从command_handler模块导入CommandHandler类，处理命令行命令
+from http_session import configure_shared_session  # 从http_session模块导入共享连接池配置函数
 from logger import LOG  # 从logger模块导入LOG对象，用于日志记录
 
 def main():
     config = Config()  # 创建配置实例
+    configure_shared_session(config.http)  # 配置所有客户端共享的HTTP连接池会话
     github_client = GitHubClient(config.github_token)  # 创建GitHub客户端实例
-    llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    llm = LLM(config, cache=LLMCache.from_config(config.llm_cache))  # 创建语言模型实例
+    report_generator = ReportGenerator(llm, config.report_types, context_tokens=config.llm_context_tokens)  # 创建报告生成器实例
     subscription_manager = SubscriptionManager(config.subscriptions_file)  # 创建订阅管理器实例
     command_handler = CommandHandler(github_client, subscription_manager, report_generator)  # 创建命令处理器实例
     
@@ -17,7 +17,12 @@ class Config:
             self.github_token = os.getenv('GITHUB_TOKEN', github_config.get('token'))
             self.subscriptions_file = github_config.get('subscriptions_file')
             self.freq_days = github_config.get('progress_frequency_days', 1)
-            self.exec_time = github_config.get('progress_execution_time', "08:00")
+            self.fetch_concurrency = github_config.get('fetch_concurrency', 8)  # 并发抓取的线程数
+            self.github_cache = github_config.get('cache', {})  # 条件请求缓存配置
+            self.github_rate_limit = github_config.get('rate_limit', {})  # 速率限制调度配置
+            self.github_api_mode = github_config.get('api_mode', 'rest')  # 'rest' 或 'graphql' 批量查询
+            self.graphql_batch_size = github_config.get('graphql_batch_size', 50)  # 单次 GraphQL 查询的仓库数
+            self.github_min_events = github_config.get('min_events', 1)  # 有效更新少于该数的仓库跳过 LLM 和通知，0 表示不跳过
 
             # 加载 LLM 相关配置
             llm_config = config.get('llm', {})
@@ -25,10 +30,30 @@ class Config:
             self.openai_model_name = llm_config.get('openai_model_name', 'gpt-4o-mini')
             self.ollama_model_name = llm_config.get('ollama_model_name', 'llama3')
             self.ollama_api_url = llm_config.get('ollama_api_url', 'http://localhost:11434/api/chat')
+            self.llm_cache = llm_config.get('cache', {})  # LLM 响应缓存配置
+            self.llm_max_concurrency = llm_config.get('max_concurrency', 4)  # 批量生成报告的并发数
+            self.llm_rate_limits = llm_config.get('requests_per_minute', {})  # 各模型每分钟请求数上限，0 表示不限制
+            self.llm_context_tokens = llm_config.get('context_tokens', 8192)  # 模型上下文窗口大小（token）
             
             # 加载报告类型配置
             self.report_types = config.get('report_types', ["github", "hacker_news"])  # 默认报告类型
             
+            # 加载本地存储配置
+            storage_config = config.get('storage', {})
+            self.db_path = storage_config.get('db_path', 'data/sentinel.db')
+
+            # 加载 HTTP 连接池配置
+            self.http = config.get('http', {})
+
+            # 加载 Hacker News 抓取配置
+            self.hacker_news = config.get('hacker_news', {})
+
+            # 加载定时任务执行器配置
+            self.scheduler = config.get('scheduler', {})
+
             # 加载 Slack 配置
             slack_config = config.get('slack', {})
             self.slack_webhook_url = slack_config.get('webhook_url')
+
+            # 加载通知分发配置（重试、本地发件箱）
+            self.notification = config.get('notification', {})
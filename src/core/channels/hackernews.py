@@ -1,27 +1,24 @@
-import requests
+from typing import List
 from core.channels.base import BaseChannel
 from core.models import Alert, ChannelType
 from datetime import datetime
+from hn_firebase import HNFirebaseSource  # 统一的 Hacker News 数据源
 
 class HackerNewsChannel(BaseChannel):
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, session=None, source=None):
         self.min_points = config.get("min_points", 100)
-        self.api_url = "https://hn.algolia.com/api/v1/search"
+        self.source = source or HNFirebaseSource(session)
 
     def fetch_alerts(self) -> List[Alert]:
-        resp = requests.get(self.api_url, params={
-            "tags": "story",
-            "hitsPerPage": 20,
-            "numericFilters": [f"points>{self.min_points}"]
-        })
+        stories = [s for s in self.source.fetch_stories("news", limit=100) if (s["points"] or 0) > self.min_points]
         return [
             Alert(
-                title=item["title"],
-                content=f"Points: {item['points']} | {item['url']}",
-                severity=self._calc_severity(item["points"]),
+                title=story["title"],
+                content=f"Points: {story['points']} | {story['link']}",
+                severity=self._calc_severity(story["points"]),
                 source=ChannelType.HACKERNEWS,
-                timestamp=datetime.fromtimestamp(item["created_at_i"])
-            ) for item in resp.json()["hits"]
+                timestamp=datetime.fromtimestamp(story["time"])
+            ) for story in stories[:20]
         ]
 
     def _calc_severity(self, points: int) -> int:
@@ -1,13 +1,12 @@
-import requests
 from datetime import datetime, timedelta
 from typing import List, Dict
 from core.llm import LLMAnalyzer  # 复用原有LLM
+from hn_firebase import HNFirebaseSource  # 统一的 Hacker News 数据源
 
 class HNAnalyzer:
-    HN_API = "https://hn.algolia.com/api/v1/search"
-
-    def __init__(self):
+    def __init__(self, session=None, source=None):
         self.llm = LLMAnalyzer()
+        self.source = source or HNFirebaseSource(session)
         self.system_prompt = """
         # Role: Hacker News 趋势分析师
         输出要求：
@@ -18,13 +17,9 @@ class HNAnalyzer:
 
     def fetch_top_stories(self, hours: int = 24) -> List[Dict]:
         """获取最近N小时的热门故事"""
-        params = {
-            "tags": "story",
-            "numericFilters": f"created_at_i>{int((datetime.now() - timedelta(hours=hours)).timestamp()}",
-            "hitsPerPage": 50
-        }
-        resp = requests.get(self.HN_API, params=params)
-        return sorted(resp.json()["hits"], key=lambda x: -x["points"])
+        since = int((datetime.now() - timedelta(hours=hours)).timestamp())
+        stories = [s for s in self.source.fetch_stories("news", limit=100) if (s["time"] or 0) > since]
+        return sorted(stories, key=lambda x: -(x["points"] or 0))[:50]
 
     def generate_daily_report(self) -> str:
         """生成每日趋势报告"""
@@ -1,4 +1,5 @@
 import schedule # 导入 schedule 实现定时任务执行器
+import functools  # 导入functools为信号处理器绑定任务执行器
 import time  # 导入time库，用于控制时间间隔
 import os   # 导入os模块用于文件和目录操作
 import signal  # 导入signal库，用于信号处理
@@ -7,36 +8,185 @@ from datetime import datetime  # 导入 datetime 模块用于获取当前日期
 
 from config import Config  # 导入配置管理类
 from github_client import GitHubClient  # 导入GitHub客户端类，处理GitHub API请求
+from fetch_engine import FetchEngine  # 导入并发抓取引擎
+from http_cache import HttpCache  # 导入条件请求缓存
+from http_session import configure_shared_session  # 导入共享HTTP连接池配置
+from rate_limiter import RateLimiter  # 导入速率限制调度器
+from event_store import EventStore  # 导入本地事件库
+from job_executor import JobExecutor  # 导入定时任务执行器
+from task_queue import TaskQueue  # 导入持久化任务队列
 from hacker_news_client import HackerNewsClient
 from notifier import Notifier  # 导入通知器类，用于发送通知
 from report_generator import ReportGenerator  # 导入报告生成器类
-from llm import LLM  # 导入语言模型类，可能用于生成报告内容
+from async_llm import AsyncLLM  # 导入异步语言模型类，支持并发生成报告
+from llm_cache import LLMCache  # 导入LLM响应缓存
 from subscription_manager import SubscriptionManager  # 导入订阅管理器类，管理GitHub仓库订阅
+from repo_scheduler import RepoScheduler  # 导入按活跃度安排仓库抓取的调度器
 from logger import LOG  # 导入日志记录器
 
 
-def graceful_shutdown(signum, frame):
+def graceful_shutdown(signum, frame, executor=None):
     # 优雅关闭程序的函数，处理信号时调用
     LOG.info("[优雅退出]守护进程接收到终止信号")
-    sys.exit(0)  # 安全退出程序
+    if executor is not None:
+        # 取消排队中的任务；运行中的任务线程无法被中断，未完成的部分由任务队列在下次启动时恢复
+        executor.shutdown(wait=False, cancel_futures=True)
+    # sys.exit 只结束主线程，解释器退出前仍会等待线程池中的非守护线程，因此直接结束进程
+    os._exit(0)
 
-def github_job(subscription_manager, github_client, report_generator, notifier, days):
+def github_job(repo_scheduler, fetch_engine, report_generator, notifier, task_queue, min_events=1):
+    # 先恢复上次中断的运行，只处理其中尚未完成的任务
+    resume_github_runs(fetch_engine, report_generator, notifier, task_queue, min_events, repo_scheduler)
+    # 按活跃度档位到期的仓库，高优先级在前；仍在未完成运行中的仓库由该运行继续处理，不重复抓取
+    repos = repo_scheduler.due(exclude=task_queue.active_items('github_job'))
+    if not repos:
+        LOG.debug("没有到期的 GitHub 仓库")
+        return
     LOG.info("[开始执行定时任务]GitHub Repo 项目进展报告")
-    subscriptions = subscription_manager.list_subscriptions()  # 获取当前所有订阅
-    LOG.info(f"订阅列表：{subscriptions}")
-    for repo in subscriptions:
-        # 遍历每个订阅的仓库，执行以下操作
-        markdown_file_path = github_client.export_progress_by_date_range(repo, days)
-        # 从Markdown文件自动生成进展简报
-        report, _ = report_generator.generate_github_report(markdown_file_path)
-        notifier.notify_github_report(repo, report)
+    LOG.info(f"到期仓库：{repos}")
+    # 抓取天数覆盖各仓库的运行间隔，天数相同的仓库合并为一次运行
+    for days, group in repo_scheduler.group_by_window(repos).items():
+        # 优先级和抓取起点随运行参数保存，恢复运行时仍按原优先级、从原起点抓取；
+        # 运行过的仓库从上次运行时间开始抓取，不会重复报告已发送过的内容
+        priorities = repo_scheduler.priorities(group)
+        window_since = repo_scheduler.window_since(group)
+        started = datetime.now()
+        run_id = task_queue.start_run('github_job', group,
+                                      {'days': days, 'priorities': priorities, 'since': window_since})
+        run_github_tasks(run_id, fetch_engine, report_generator, notifier, days, task_queue, min_events, priorities,
+                         window_since)
+        # 抓取成功的仓库按最新活跃度安排下次运行，下次从本次开始抓取的时间继续
+        repo_scheduler.reschedule(task_queue.done(run_id, 'fetch'), started)
+    llm_cache = report_generator.llm.cache
+    if llm_cache is not None:
+        LOG.info(f"LLM 响应缓存统计：{llm_cache.stats()}")
     LOG.info(f"[定时任务执行完毕]")
 
 
+def resume_github_runs(fetch_engine, report_generator, notifier, task_queue, min_events=1, repo_scheduler=None):
+    for run in task_queue.unfinished_runs('github_job'):
+        LOG.info(f"恢复未完成的 GitHub 任务运行：{run['run_id']}")
+        run_github_tasks(run['run_id'], fetch_engine, report_generator, notifier, run['params']['days'], task_queue,
+                         min_events, run['params'].get('priorities'), run['params'].get('since'))
+        if repo_scheduler is not None:
+            # 与新运行一样，抓取成功的仓库按最新活跃度安排下次运行，否则它们仍然到期并被再次抓取
+            repo_scheduler.reschedule(task_queue.done(run['run_id'], 'fetch'))
+
+
+def run_github_tasks(run_id, fetch_engine, report_generator, notifier, days, task_queue, min_events=1,
+                     priorities=None, window_since=None):
+    """
+    按 抓取 -> 生成报告 -> 通知 的顺序执行一次运行中尚未完成的任务，每完成一个任务即记录检查点。
+    抓取失败的仓库记录为失败，保持待抓取。
+    有效更新数少于 min_events 的仓库使用模板报告，不调用 LLM；摘要模式下以模板条目并入摘要邮件，
+    否则不发送通知；min_events 为 0 时不跳过。
+    priorities 为 {仓库: 订阅优先级}，高优先级仓库先抓取，速率受限时也先被放行。
+    window_since 为 {仓库: 抓取起点}（上次运行时间），不在其中的仓库抓取最近 days 天。
+    """
+    # 抓取：并发抓取所有待抓取仓库的进展，每个仓库处理完毕即记录检查点
+    repos = task_queue.pending(run_id, 'fetch')
+    if repos:
+        checkpointed = set()
+
+        def on_fetched(result):
+            checkpointed.add(result.repo)
+            if result.error is not None:
+                # 接口故障、令牌失效等不能当作「没有活动」，保持待执行以便重试
+                task_queue.fail(run_id, result.repo, 'fetch', result.error)
+                return
+            task_queue.complete(run_id, result.repo, 'fetch',
+                                {'file_path': result.file_path, 'events': result.activity()})
+
+        try:
+            fetch_engine.export_progress_by_date_range(repos, days, priorities, on_result=on_fetched,
+                                                       window_since=window_since)
+        except Exception as e:
+            # 只有尚未记录检查点的仓库记为失败，已完成的仓库不受影响
+            for repo in repos:
+                if repo not in checkpointed:
+                    task_queue.fail(run_id, repo, 'fetch', e)
+        cache = fetch_engine.github_client.cache
+        if cache is not None:
+            cache.flush()
+            LOG.info(f"GitHub 请求缓存统计：{cache.stats()}")
+        rate_limiter = fetch_engine.github_client.rate_limiter
+        if rate_limiter is not None:
+            LOG.info(f"GitHub 速率额度：{rate_limiter.stats()}")
+
+    def notify_callback(repo):
+        # 通知可能在后台线程或摘要邮件发出后才完成，由回调记录检查点；
+        # 检查点中记录已发送成功的渠道，重新通知时只发送上次失败的渠道
+        delivered = (task_queue.result(run_id, repo, 'notify') or {}).get('delivered', [])
+
+        def on_sent(ok):
+            if ok:
+                task_queue.complete(run_id, repo, 'notify', {'delivered': delivered})
+            else:
+                task_queue.fail(run_id, repo, 'notify', "通知发送失败", {'delivered': delivered})
+        return on_sent, delivered
+
+    def notify(repo, report, report_path):
+        on_sent, delivered = notify_callback(repo)
+        notifier.notify_github_report(repo, report, callback=on_sent, report_path=report_path, delivered=delivered)
+
+    # 活跃度检测：本周期没有有效更新的仓库写入模板报告，不调用 LLM
+    repos, quiet = [], []
+    for repo in task_queue.pending(run_id, 'report'):
+        events = task_queue.result(run_id, repo, 'fetch').get('events')
+        (quiet if events is not None and events < min_events else repos).append(repo)
+
+    def on_result(index, report, report_file_path):
+        if report.startswith("[ERROR]"):
+            task_queue.fail(run_id, repos[index], 'report', report)
+            return
+        task_queue.complete(run_id, repos[index], 'report', {'report_file_path': report_file_path})
+        notify(repos[index], report, report_file_path)
+
+    # 整个运行期间复用一个 SMTP 会话；退出时发送摘要邮件并等待后台发送完成
+    with notifier.batch():
+        # 没有活动的仓库：摘要模式下在摘要邮件中加入模板条目，否则跳过通知
+        for repo in quiet:
+            report, report_file_path = report_generator.write_no_activity_report(
+                task_queue.result(run_id, repo, 'fetch')['file_path'], repo, days
+            )
+            task_queue.complete(run_id, repo, 'report', {'report_file_path': report_file_path, 'no_activity': True})
+            on_sent, delivered = notify_callback(repo)
+            if not notifier.notify_no_activity(repo, report, callback=on_sent, delivered=delivered):
+                task_queue.complete(run_id, repo, 'notify', {'skipped': True})
+        if quiet:
+            LOG.info(f"{len(quiet)} 个仓库没有新的活动，跳过 LLM 调用：{quiet}")
+
+        # 通知：上次已生成报告但尚未发送成功的仓库，直接读取已保存的报告
+        for repo in task_queue.pending(run_id, 'notify'):
+            report_file_path = task_queue.result(run_id, repo, 'report')['report_file_path']
+            try:
+                with open(report_file_path) as report_file:
+                    report = report_file.read()
+            except OSError as e:
+                # 报告文件丢失或不可读时只让该仓库的通知失败
+                task_queue.fail(run_id, repo, 'notify', e)
+                continue
+            notify(repo, report, report_file_path)
+
+        # 生成报告：并发生成各仓库的进展简报，每份完成后立即记录检查点并发送通知
+        if repos:
+            report_generator.generate_github_reports(
+                [task_queue.result(run_id, repo, 'fetch')['file_path'] for repo in repos], on_result=on_result
+            )
+    task_queue.finish_if_done(run_id)
+    LOG.info(f"任务运行 {run_id} 统计：{task_queue.stats(run_id)}")
+
+
 def hn_topic_job(hacker_news_client, report_generator):
     LOG.info("[开始执行定时任务]Hacker News 热点话题跟踪")
-    markdown_file_path = hacker_news_client.export_top_stories()
-    _, _ = report_generator.generate_hn_topic_report(markdown_file_path)
+    # 启用本地事件库时只把新上榜和热度上升的新闻交给 LLM
+    markdown_file_path = hacker_news_client.export_top_stories(delta=True)
+    if markdown_file_path is None:
+        LOG.info("[定时任务执行完毕]没有新的热点新闻，跳过话题报告")
+        return
+    report, _ = report_generator.generate_hn_topic_report(markdown_file_path)
+    # 将本小时的话题合并进当天的滚动摘要，每日汇总任务只需在摘要上做一次收尾
+    report_generator.update_hn_daily_digest(markdown_file_path, report)
     LOG.info(f"[定时任务执行完毕]")
 
 
@@ -47,42 +197,72 @@ def hn_daily_job(hacker_news_client, report_generator, notifier):
     # 生成每日汇总报告的目录路径
     directory_path = os.path.join('hacker_news', date)
     # 生成每日汇总报告并保存
-    report, _ = report_generator.generate_hn_daily_report(directory_path)
-    notifier.notify_hn_report(date, report)
+    report, report_file_path = report_generator.generate_hn_daily_report(directory_path)
+    notifier.notify_hn_report(date, report, report_path=report_file_path)
     LOG.info(f"[定时任务执行完毕]")
 
 
 def main():
-    # 设置信号处理器
-    signal.signal(signal.SIGTERM, graceful_shutdown)
-
     config = Config()  # 创建配置实例
-    github_client = GitHubClient(config.github_token)  # 创建GitHub客户端实例
-    hacker_news_client = HackerNewsClient() # 创建 Hacker News 客户端实例
-    notifier = Notifier(config.email)  # 创建通知器实例
-    llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    session = configure_shared_session(config.http)  # 创建所有客户端共享的HTTP连接池会话
+    cache = None
+    if config.github_cache.get('enabled', True):
+        # 创建条件请求缓存，避免重复下载未变化的数据
+        cache = HttpCache(config.github_cache.get('dir', 'cache/github'), config.github_cache.get('max_size_mb', 100))
+    event_store = EventStore(config.db_path)  # 创建本地事件库，按游标增量同步
+    rate_limiter = RateLimiter(burst=config.github_rate_limit.get('burst', 500))  # 按响应头额度调度 GitHub 请求
+    github_client = GitHubClient(
+        config.github_token, cache=cache, session=session, rate_limiter=rate_limiter,
+        max_rate_limit_retries=config.github_rate_limit.get('max_retries', 5),
+        graphql_rate_limiter=RateLimiter(burst=config.github_rate_limit.get('burst', 500)),
+        event_store=event_store
+    )  # 创建GitHub客户端实例
+    fetch_engine = FetchEngine(
+        github_client, config.fetch_concurrency, config.github_api_mode, config.graphql_batch_size
+    )  # 创建并发抓取引擎实例
+    hacker_news_client = HackerNewsClient.from_config(config.hacker_news, session, event_store) # 创建 Hacker News 客户端实例
+    notifier = Notifier.from_config(config)  # 创建通知器实例（邮件及配置的 Slack、发件箱等渠道）
+    llm = AsyncLLM(config, session=session, cache=LLMCache.from_config(config.llm_cache))  # 创建语言模型实例
+    report_generator = ReportGenerator(
+        llm, config.report_types, event_store, config.llm_max_concurrency, config.llm_context_tokens
+    )  # 创建报告生成器实例
     subscription_manager = SubscriptionManager(config.subscriptions_file)  # 创建订阅管理器实例
+    repo_scheduler = RepoScheduler.from_config(subscription_manager, event_store, config)  # 按活跃度安排各仓库的抓取
+    task_queue = TaskQueue(config.db_path)  # 创建持久化任务队列，进程重启后可恢复未完成的任务
+
+    # 创建任务执行器，各定时任务在线程池中独立运行，同名任务不会重叠
+    executor = JobExecutor(config.scheduler.get('max_workers', 4), config.scheduler.get('timeouts', {}))
+    # 设置信号处理器，收到 SIGTERM 时关闭执行器并退出
+    signal.signal(signal.SIGTERM, functools.partial(graceful_shutdown, executor=executor))
 
     # 启动时立即执行（如不需要可注释）
-    # github_job(subscription_manager, github_client, report_generator, notifier, config.freq_days)
-    hn_daily_job(hacker_news_client, report_generator, notifier)
+    # executor.submit('github_job', github_job, repo_scheduler, fetch_engine, report_generator, notifier, task_queue, config.github_min_events)
+    # 恢复上次进程退出时未完成的 GitHub 任务（与 github_job 同名，不会重叠运行）
+    if task_queue.unfinished_runs('github_job'):
+        executor.submit('github_job', resume_github_runs, fetch_engine, report_generator, notifier, task_queue,
+                        config.github_min_events, repo_scheduler)
+    executor.submit('hn_daily_job', hn_daily_job, hacker_news_client, report_generator, notifier)
 
-    # 安排 GitHub 的定时任务
-    schedule.every(config.freq_days).days.at(
-        config.exec_time
-    ).do(github_job, subscription_manager, github_client, report_generator, notifier, config.freq_days)
+    # 安排 GitHub 的定时任务：定期检查到期的仓库，各仓库按活跃度档位分散在一天中运行
+    schedule.every(config.scheduler.get('github_check_minutes', 30)).minutes.do(
+        executor.submit, 'github_job', github_job, repo_scheduler, fetch_engine, report_generator, notifier, task_queue,
+        config.github_min_events
+    )
     
     # 安排 hn_topic_job 每4小时执行一次，从0点开始
-    schedule.every(4).hours.at(":00").do(hn_topic_job, hacker_news_client, report_generator)
+    schedule.every(4).hours.at(":00").do(executor.submit, 'hn_topic_job', hn_topic_job, hacker_news_client, report_generator)
 
     # 安排 hn_daily_job 每天早上10点执行一次
-    schedule.every().day.at("10:00").do(hn_daily_job, hacker_news_client, report_generator, notifier)
+    schedule.every().day.at("10:00").do(executor.submit, 'hn_daily_job', hn_daily_job, hacker_news_client, report_generator, notifier)
+
+    # 每小时记录一次任务执行统计
+    schedule.every().hour.do(lambda: LOG.info(f"任务执行统计：{executor.stats()}"))
 
     try:
         # 在守护进程中持续运行
         while True:
             schedule.run_pending()
+            executor.check_timeouts()
             time.sleep(1)  # 短暂休眠以减少 CPU 使用
     except Exception as e:
         LOG.error(f"主进程发生异常: {str(e)}")
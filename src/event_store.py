@@ -0,0 +1,288 @@
+# src/event_store.py
+
+import json  # 导入json模块用于保存原始数据
+import os  # 导入os模块用于文件和目录操作
+import sqlite3  # 导入sqlite3作为本地存储
+import threading  # 导入threading模块保证多线程访问安全
+from datetime import date, datetime, timedelta  # 导入日期处理模块
+from logger import LOG  # 导入日志模块
+
+
+class EventStore:
+    """
+    本地事件库（SQLite）：
+    - 保存已抓取的 GitHub commits / issues / pull requests，并为每个仓库记录增量同步游标；
+    - 保存 Hacker News 的新闻、每小时快照及热点话题报告；
+    - 保存按活跃度调度仓库的状态（档位、上次和下次运行时间），不写入用户编辑的订阅文件。
+    报告生成、去重和聚合都基于带索引的查询，而不是反复扫描和拼接 Markdown 文件。
+    """
+    # 各类数据对应的同步游标列
+    CURSOR_COLUMNS = {'commits': 'last_commit_at', 'issues': 'issues_updated_at', 'pull_requests': 'pulls_updated_at'}
+
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS github_events (
+        repo TEXT NOT NULL,
+        kind TEXT NOT NULL,            -- commits / issues / pull_requests
+        key TEXT NOT NULL,             -- commit SHA 或 issue/PR 编号
+        number INTEGER,
+        title TEXT,
+        occurred_at TEXT,              -- 提交时间 / 关闭（合并）时间
+        updated_at TEXT,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (repo, kind, key)
+    );
+    CREATE INDEX IF NOT EXISTS idx_github_events_range ON github_events (repo, kind, occurred_at);
+    CREATE TABLE IF NOT EXISTS sync_cursors (
+        repo TEXT PRIMARY KEY,
+        last_commit_sha TEXT,
+        last_commit_at TEXT,
+        issues_updated_at TEXT,
+        pulls_updated_at TEXT,
+        synced_at TEXT
+    );
+    CREATE TABLE IF NOT EXISTS repo_schedules (
+        repo TEXT PRIMARY KEY,
+        tier TEXT,
+        interval_hours REAL,
+        last_run TEXT,
+        next_run TEXT,
+        tracked_since TEXT             -- 首次抓取窗口的起点，用于计算观察时间不足窗口的仓库的活跃度
+    );
+    CREATE TABLE IF NOT EXISTS hn_stories (
+        story_id TEXT PRIMARY KEY,     -- HN item id，解析不到时使用链接
+        title TEXT,
+        link TEXT,
+        points INTEGER,
+        comments INTEGER,
+        first_seen TEXT NOT NULL,
+        last_seen TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_hn_stories_link ON hn_stories (link);
+    CREATE INDEX IF NOT EXISTS idx_hn_stories_first_seen ON hn_stories (first_seen);
+    CREATE TABLE IF NOT EXISTS hn_snapshots (
+        date TEXT NOT NULL,
+        hour TEXT NOT NULL,
+        story_id TEXT NOT NULL,
+        rank INTEGER,
+        points INTEGER,
+        comments INTEGER,
+        PRIMARY KEY (date, hour, story_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_hn_snapshots_story ON hn_snapshots (story_id, date, hour);
+    CREATE TABLE IF NOT EXISTS hn_topic_reports (
+        date TEXT NOT NULL,
+        hour TEXT NOT NULL,
+        content TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (date, hour)
+    );
+    '''
+
+    def __init__(self, db_path='data/sentinel.db'):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)  # 确保目录存在
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        # 旧版本创建的 repo_schedules 表没有 tracked_since 列
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(repo_schedules)')}
+        if 'tracked_since' not in columns:
+            self._conn.execute('ALTER TABLE repo_schedules ADD COLUMN tracked_since TEXT')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _event_row(repo, kind, item):
+        # 将接口返回的数据转换为统一的表记录
+        if kind == 'commits':
+            commit = item.get('commit') or {}
+            occurred_at = ((commit.get('author') or {}).get('date')
+                           or (commit.get('committer') or {}).get('date'))
+            title = (commit.get('message') or '').split('\n', 1)[0]
+            return (repo, kind, item['sha'], None, title, occurred_at, occurred_at, json.dumps(item))
+        occurred_at = item.get('merged_at') or item.get('closed_at')
+        return (repo, kind, str(item['number']), item['number'], item.get('title'),
+                occurred_at, item.get('updated_at'), json.dumps(item))
+
+    def merge_updates(self, repo, updates):
+        """
+        将一次抓取的增量合并进事件库，并推进该仓库的同步游标。
+        游标边界上的数据每次都会被重新抓取，因此只写入库中没有或更新时间有变化的事件，
+        并以 {类型: [事件]} 返回这些新增或变化的事件。
+        """
+        items = [(kind, item) for kind in ('commits', 'issues', 'pull_requests') for item in updates.get(kind, [])]
+        rows = [self._event_row(repo, kind, item) for kind, item in items]
+        changed = {kind: [] for kind in ('commits', 'issues', 'pull_requests')}
+        with self._lock, self._conn:
+            new_rows = []
+            for (kind, item), row in zip(items, rows):
+                stored = self._conn.execute(
+                    'SELECT updated_at FROM github_events WHERE repo = ? AND kind = ? AND key = ?', (repo, kind, row[2])
+                ).fetchone()
+                if stored is None or stored['updated_at'] != row[6]:
+                    new_rows.append(row)
+                    changed[kind].append(item)
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO github_events VALUES (?, ?, ?, ?, ?, ?, ?, ?)', new_rows
+            )
+            cursor = self._cursor_row(repo) or {}
+            latest_commit = max((row for row in rows if row[1] == 'commits' and row[5]),
+                                key=lambda row: row[5], default=None)
+            if latest_commit and latest_commit[5] >= (cursor.get('last_commit_at') or ''):
+                cursor['last_commit_sha'], cursor['last_commit_at'] = latest_commit[2], latest_commit[5]
+            for kind, column in (('issues', 'issues_updated_at'), ('pull_requests', 'pulls_updated_at')):
+                latest = max((row[6] for row in rows if row[1] == kind and row[6]), default=None)
+                if latest and latest > (cursor.get(column) or ''):
+                    cursor[column] = latest
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sync_cursors VALUES (?, ?, ?, ?, ?, ?)',
+                (repo, cursor.get('last_commit_sha'), cursor.get('last_commit_at'),
+                 cursor.get('issues_updated_at'), cursor.get('pulls_updated_at'),
+                 datetime.now().isoformat(timespec='seconds')),
+            )
+        LOG.debug(f"[{repo}]合并 {len(rows)} 条事件到本地事件库，其中 {len(new_rows)} 条为新增或变化")
+        return changed
+
+    def _cursor_row(self, repo):
+        row = self._conn.execute('SELECT * FROM sync_cursors WHERE repo = ?', (repo,)).fetchone()
+        return dict(row) if row else None
+
+    def get_cursor(self, repo):
+        with self._lock:
+            return self._cursor_row(repo)
+
+    def since_for(self, repo, window_since):
+        """
+        计算各类数据增量抓取的起点：{类型: 起点}，每类取窗口起点与该类游标中较晚者。
+        某一类还没有游标时只有该类从窗口起点抓取；边界上的重复数据在合并时去重。
+        """
+        cursor = self.get_cursor(repo) or {}
+        return {kind: max(window_since, cursor.get(column) or '')
+                for kind, column in self.CURSOR_COLUMNS.items()}
+
+    def query_updates(self, repo, since, until):
+        """
+        从本地读取 [since, until] 日期范围内（含 until 当天）的更新，结构与 GitHubClient.fetch_updates 一致。
+        """
+        if isinstance(since, date):
+            since = since.isoformat()
+        end = (date.fromisoformat(str(until)[:10]) + timedelta(days=1)).isoformat()
+        updates = {}
+        with self._lock:
+            for kind in ('commits', 'issues', 'pull_requests'):
+                rows = self._conn.execute(
+                    'SELECT payload FROM github_events WHERE repo = ? AND kind = ? '
+                    'AND occurred_at >= ? AND occurred_at < ? ORDER BY occurred_at DESC',
+                    (repo, kind, since, end),
+                ).fetchall()
+                updates[kind] = [json.loads(row['payload']) for row in rows]
+        return updates
+
+    def activity_counts(self, since):
+        """按仓库统计 since 之后发生或更新的事件数，用于估计仓库的活跃度"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT repo, COUNT(*) AS n FROM github_events '
+                'WHERE COALESCE(updated_at, occurred_at) >= ? GROUP BY repo',
+                (since,),
+            ).fetchall()
+        return {row['repo']: row['n'] for row in rows}
+
+    def first_event_times(self):
+        """按仓库返回库中最早的事件时间，用于估计仓库已被观察的时长"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT repo, MIN(COALESCE(occurred_at, updated_at)) AS first FROM github_events GROUP BY repo'
+            ).fetchall()
+        return {row['repo']: row['first'] for row in rows if row['first']}
+
+    def repo_schedules(self):
+        """返回 {仓库: {tier, interval_hours, last_run, next_run, tracked_since}}"""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM repo_schedules').fetchall()
+        return {row['repo']: {key: row[key] for key in row.keys() if key != 'repo'} for row in rows}
+
+    def save_repo_schedules(self, schedules):
+        """批量保存仓库的调度状态，schedules 为 {仓库: {tier, interval_hours, last_run, next_run, tracked_since}}"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO repo_schedules (repo, tier, interval_hours, last_run, next_run, tracked_since) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(repo, s.get('tier'), s.get('interval_hours'), s.get('last_run'), s.get('next_run'),
+                  s.get('tracked_since')) for repo, s in schedules.items()],
+            )
+
+    @staticmethod
+    def story_key(story):
+        # HN 新闻以 item id 作为主键，解析不到 id 时退化为链接
+        return str(story.get('id') or story['link'])
+
+    def add_hn_snapshot(self, date_str, hour, stories):
+        """批量写入一次 Hacker News 快照，并更新新闻的最新热度"""
+        seen_at = f'{date_str}T{hour}:00'
+        story_rows, snapshot_rows = [], []
+        for rank, story in enumerate(stories, start=1):
+            key = self.story_key(story)
+            story_rows.append((key, story.get('title'), story.get('link'), story.get('points'),
+                               story.get('comments'), seen_at, seen_at))
+            snapshot_rows.append((date_str, hour, key, story.get('rank') or rank,
+                                  story.get('points'), story.get('comments')))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO hn_stories VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(story_id) DO UPDATE SET title = excluded.title, link = excluded.link, '
+                'points = COALESCE(excluded.points, points), comments = COALESCE(excluded.comments, comments), '
+                'last_seen = MAX(last_seen, excluded.last_seen)',
+                story_rows,
+            )
+            self._conn.executemany('INSERT OR REPLACE INTO hn_snapshots VALUES (?, ?, ?, ?, ?, ?)', snapshot_rows)
+        LOG.debug(f"保存 Hacker News 快照 {date_str} {hour}:00，共 {len(story_rows)} 条")
+
+    def hn_seen_stories(self, date_str, before_hour):
+        """
+        当天 before_hour 之前的快照中出现过的新闻索引：
+        返回 ({story_id: 最近一次快照中的分数}, {已出现的链接})
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT s.story_id, s.points, st.link FROM hn_snapshots s '
+                'JOIN hn_stories st ON st.story_id = s.story_id '
+                'WHERE s.date = ? AND s.hour < ? ORDER BY s.hour',
+                (date_str, before_hour),
+            ).fetchall()
+        points = {row['story_id']: row['points'] for row in rows}  # 按小时排序，后出现的覆盖先前的分数
+        return points, {row['link'] for row in rows if row['link']}
+
+    def query_hn_stories(self, since, until, min_points=0):
+        """查询 [since, until] 日期范围内出现过的新闻，按热度倒序"""
+        end = (date.fromisoformat(str(until)[:10]) + timedelta(days=1)).isoformat()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM hn_stories WHERE last_seen >= ? AND first_seen < ? AND COALESCE(points, 0) >= ? '
+                'ORDER BY COALESCE(points, 0) DESC, first_seen',
+                (str(since), end, min_points),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_topic_report(self, date_str, hour, content):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO hn_topic_reports VALUES (?, ?, ?, ?)',
+                (date_str, hour, content, datetime.now().isoformat(timespec='seconds')),
+            )
+
+    def topic_reports(self, date_str):
+        """按小时顺序返回某天的所有热点话题报告"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT content FROM hn_topic_reports WHERE date = ? ORDER BY hour', (date_str,)
+            ).fetchall()
+        return [row['content'] for row in rows]
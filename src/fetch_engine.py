@@ -0,0 +1,196 @@
+# src/fetch_engine.py
+
+import time  # 导入time模块用于统计耗时
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池实现有界并发
+from dataclasses import dataclass, field  # 导入dataclass用于定义抓取结果
+from logger import LOG  # 导入日志模块
+
+
+@dataclass
+class RepoFetchResult:
+    repo: str
+    updates: dict
+    latency: float  # 该仓库全部接口请求的耗时（秒）
+    file_path: str = None
+    endpoint_latency: dict = field(default_factory=dict)
+    new_updates: dict = None  # 合并进事件库时新增或变化的事件；没有事件库时为 None
+    error: str = None  # 抓取失败的原因；失败的仓库不能视为没有活动
+
+    def activity(self, ignore_bots=True):
+        """
+        本次的有效更新数（commits + issues + pull requests），默认不计机器人账号的更新。
+        启用事件库时只统计库中新增或变化的事件，游标边界上重复抓取的事件不计入。
+        """
+        updates = self.updates if self.new_updates is None else self.new_updates
+        count = 0
+        for endpoint in FetchEngine.ENDPOINTS:
+            for item in updates.get(endpoint) or []:
+                user = item.get('author') if endpoint == 'commits' else item.get('user')
+                login = (user or {}).get('login') or ''
+                if ignore_bots and ((user or {}).get('type') == 'Bot' or login.endswith('[bot]')):
+                    continue
+                count += 1
+        return count
+
+
+class FetchEngine:
+    """
+    多仓库并发抓取引擎：在有界线程池中同时展开「仓库 × 接口」两个维度的请求，
+    结果按订阅顺序返回，并记录每个仓库的抓取耗时。
+    """
+    ENDPOINTS = ('commits', 'issues', 'pull_requests')
+
+    def __init__(self, github_client, max_workers=8, api_mode='rest', graphql_batch_size=50):
+        self.github_client = github_client
+        self.max_workers = max(1, int(max_workers))  # 并发宽度，至少为1
+        self.api_mode = api_mode  # 'rest'：每个仓库三个接口；'graphql'：多个仓库合并为一次查询
+        self.graphql_batch_size = graphql_batch_size
+
+    def _fetchers(self):
+        return {
+            'commits': self.github_client.fetch_commits,
+            'issues': self.github_client.fetch_issues,
+            'pull_requests': self.github_client.fetch_pull_requests,
+        }
+
+    def _timed(self, fetcher, repo, since, until, priority):
+        # 执行单个接口请求并记录起止时间；配置了速率限制调度器时按仓库优先级排队
+        rate_limiter = getattr(self.github_client, 'rate_limiter', None)
+        start = time.perf_counter()
+        # strict=True：接口失败时抛出异常，由结果记录为错误，而不是返回空列表
+        if rate_limiter is not None:
+            with rate_limiter.priority(priority):
+                data = fetcher(repo, since, until, strict=True)
+        else:
+            data = fetcher(repo, since, until, strict=True)
+        return data, start, time.perf_counter()
+
+    def fetch_all(self, repos, since=None, until=None, priorities=None, since_by_repo=None):
+        """
+        并发获取多个仓库的更新。
+        :param priorities: 可选的 {repo: priority}，数值越大越先抓取
+        :param since_by_repo: 可选的 {repo: {endpoint: since}}，用于按仓库和接口各自的同步游标只抓取增量
+        :return: RepoFetchResult 列表，顺序与 repos 一致
+        """
+        priorities = priorities or {}
+        since_by_repo = since_by_repo or {}
+        if self.api_mode == 'graphql':
+            return self._fetch_all_graphql(repos, since, until, priorities, since_by_repo)
+
+        fetchers = self._fetchers()
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch') as executor:
+            # 按优先级（相同优先级保持订阅顺序）提交任务，保证重要的仓库先被调度
+            futures_by_repo = {}
+            for repo in sorted(repos, key=lambda r: -priorities.get(r, 0)):
+                priority = priorities.get(repo, 0)
+                repo_since = since_by_repo.get(repo) or {}
+                futures_by_repo[repo] = {
+                    endpoint: executor.submit(self._timed, fetchers[endpoint], repo, repo_since.get(endpoint, since),
+                                              until, priority)
+                    for endpoint in self.ENDPOINTS
+                }
+            for repo in repos:
+                futures = futures_by_repo[repo]
+                updates, endpoint_latency, starts, ends, errors = {}, {}, [], [], []
+                for endpoint in self.ENDPOINTS:
+                    try:
+                        data, start, end = futures[endpoint].result()
+                    except Exception as e:
+                        errors.append(f"{endpoint}: {str(e)}")
+                        updates[endpoint] = []
+                        continue
+                    updates[endpoint] = data
+                    endpoint_latency[endpoint] = end - start
+                    starts.append(start)
+                    ends.append(end)
+                latency = max(ends) - min(starts) if starts else 0.0
+                LOG.debug(f"[{repo}]抓取完成，耗时 {latency:.2f}s")
+                results.append(RepoFetchResult(repo, updates, latency, endpoint_latency=endpoint_latency,
+                                               error='; '.join(errors) or None))
+        return results
+
+    def _timed_batch(self, batch, since, until):
+        start = time.perf_counter()
+        data = self.github_client.fetch_updates_batch(batch, since, until, self.graphql_batch_size)
+        return data, time.perf_counter() - start
+
+    def _fetch_all_graphql(self, repos, since, until, priorities, since_by_repo):
+        # 按优先级分批，每批通过一次 GraphQL 查询获取，批次之间在线程池中并发
+        ordered = sorted(repos, key=lambda r: -priorities.get(r, 0))
+        size = self.graphql_batch_size
+        batches = [ordered[start:start + size] for start in range(0, len(ordered), size)]
+        updates_by_repo, latency_by_repo = {}, {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch') as executor:
+            # 同批仓库和各类数据共用一个 since，取其中最早的游标以免遗漏
+            futures = [
+                executor.submit(self._timed_batch, batch, self._batch_since(batch, since, since_by_repo), until)
+                for batch in batches
+            ]
+            errors = {}
+            for batch, future in zip(batches, futures):
+                try:
+                    data, latency = future.result()
+                except Exception as e:
+                    # 整批查询失败时，批内每个仓库都记录为抓取失败
+                    LOG.error(f"GraphQL 批量查询失败：{str(e)}")
+                    data, latency = {}, 0.0
+                    errors.update(dict.fromkeys(batch, str(e)))
+                for repo in batch:
+                    updates_by_repo[repo] = data.get(repo, {endpoint: [] for endpoint in self.ENDPOINTS})
+                    latency_by_repo[repo] = latency  # 同批仓库共享一次查询的耗时
+        return [RepoFetchResult(repo, updates_by_repo[repo], latency_by_repo[repo], error=errors.get(repo))
+                for repo in repos]
+
+    def _batch_since(self, batch, since, since_by_repo):
+        marks = [(since_by_repo.get(repo) or {}).get(endpoint, since) or ''
+                 for repo in batch for endpoint in self.ENDPOINTS]
+        return min(marks) or None
+
+    def export_progress_by_date_range(self, repos, days, priorities=None, on_result=None, window_since=None):
+        """
+        并发抓取多个仓库最近 days 天的进展，并导出为 Markdown 文件。
+        on_result(result) 在每个仓库处理完毕（导出成功或记录错误）后立即调用，便于逐个记录检查点。
+        window_since 为可选的 {仓库: 起点时间戳}（如上次运行时间），这些仓库从该时刻开始抓取和导出，
+        而不是整天的窗口；此时抓取截止到当前时刻，当天的更新不必等到第二天。
+        :return: RepoFetchResult 列表（file_path 已填充），顺序与 repos 一致
+        """
+        since, today = self.github_client.date_range(days)
+        window_since = window_since or {}
+        starts = {repo: window_since.get(repo) or since for repo in repos}
+        started = time.perf_counter()
+        event_store = getattr(self.github_client, 'event_store', None)
+        if event_store is not None:
+            # 启用本地事件库时，每个仓库的每类数据只从各自的同步游标开始抓取
+            since_by_repo = {repo: event_store.since_for(repo, str(starts[repo])) for repo in repos}
+        else:
+            since_by_repo = {repo: dict.fromkeys(self.ENDPOINTS, start) for repo, start in window_since.items()}
+        results = self.fetch_all(repos, since=since.isoformat(), until=None if window_since else today.isoformat(),
+                                 priorities=priorities, since_by_repo=since_by_repo)
+        for result in results:
+            if result.error is None:
+                try:
+                    self._export(result, days, starts[result.repo], today, event_store)
+                except Exception as e:
+                    # 单个仓库合并或导出失败不影响其他仓库
+                    result.error = str(e)
+            if result.error is not None:
+                # 抓取失败的仓库不推进游标也不导出文件，由调用方记录失败并重试
+                LOG.error(f"[{result.repo}]抓取失败：{result.error}")
+            else:
+                LOG.info(f"[{result.repo}]抓取耗时 {result.latency:.2f}s")
+            if on_result is not None:
+                on_result(result)
+        LOG.info(f"共抓取 {len(results)} 个仓库，并发宽度 {self.max_workers}，总耗时 {time.perf_counter() - started:.2f}s")
+        return results
+
+    def _export(self, result, days, since, today, event_store):
+        # 导出单个仓库的进展文件，结果写入 result.file_path
+        if event_store is not None:
+            # 合并进事件库并记录新增或变化的事件，再从本地事件库渲染进展文件
+            result.new_updates = event_store.merge_updates(result.repo, result.updates)
+            result.file_path = self.github_client.export_local_progress(result.repo, since, today)
+        else:
+            result.file_path = self.github_client.export_progress_by_date_range(
+                result.repo, days, updates=result.updates, since=since
+            )
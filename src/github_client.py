@@ -1,72 +1,218 @@
 # src/github_client.py
 
-import requests  # 导入requests库用于HTTP请求
 from datetime import datetime, date, timedelta  # 导入日期处理模块
 import os  # 导入os模块用于文件和目录操作
+from http_session import get_shared_session  # 导入共享的HTTP连接池会话
+import github_graphql  # 导入 GraphQL 批量查询的构造与转换工具
 from logger import LOG  # 导入日志模块
 
 class GitHubClient:
-    def __init__(self, token):
+    PER_PAGE = 100  # GitHub REST API 单页最大条数
+
+    def __init__(self, token, cache=None, session=None, rate_limiter=None, max_rate_limit_retries=5,
+                 graphql_rate_limiter=None, event_store=None):
         self.token = token  # GitHub API令牌
         self.headers = {'Authorization': f'token {self.token}'}  # 设置HTTP头部认证信息
+        self.cache = cache  # 可选的条件请求缓存（HttpCache），为 None 时不缓存
+        self.session = session or get_shared_session()  # 复用连接池的HTTP会话
+        self.rate_limiter = rate_limiter  # 可选的速率限制调度器（RateLimiter）
+        self.max_rate_limit_retries = max_rate_limit_retries  # 被速率限制后的最大重试次数
+        self.graphql_rate_limiter = graphql_rate_limiter  # GraphQL 额度独立计算，使用单独的调度器
+        self.event_store = event_store  # 可选的本地事件库（EventStore），启用后按游标增量同步
 
     def fetch_updates(self, repo, since=None, until=None):
-        # 获取指定仓库的更新，可以指定开始和结束日期
+        # 获取指定仓库的更新，可以指定开始和结束日期；since 也可以是 {类型: 开始时间}，各类数据从各自的游标开始
+        since_by_kind = since if isinstance(since, dict) else {}
+        since = None if isinstance(since, dict) else since
         updates = {
-            'commits': self.fetch_commits(repo, since, until),  # 获取提交记录
-            'issues': self.fetch_issues(repo, since, until),  # 获取问题
-            'pull_requests': self.fetch_pull_requests(repo, since, until)  # 获取拉取请求
+            'commits': self.fetch_commits(repo, since_by_kind.get('commits', since), until),  # 获取提交记录
+            'issues': self.fetch_issues(repo, since_by_kind.get('issues', since), until),  # 获取问题
+            'pull_requests': self.fetch_pull_requests(repo, since_by_kind.get('pull_requests', since), until)  # 获取拉取请求
         }
         return updates
 
-    def fetch_commits(self, repo, since=None, until=None):
+    def _paginate(self, url, params=None):
+        """
+        按 Link 头中的 rel="next" 逐页请求接口，并逐条产出数据。
+        每页请求 PER_PAGE 条以减少往返次数；调用方可边迭代边处理，无需在内存中保留所有页。
+        """
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        params['per_page'] = self.PER_PAGE
+        while url:
+            items, url = self._get_page(url, params)
+            yield from items
+            params = None  # next 链接中已包含完整的查询参数
+
+    def _request(self, url, headers, params):
+        # 发送 REST GET 请求
+        return self._send('get', url, self.rate_limiter, headers=headers, params=params, timeout=10)
+
+    def _send(self, method, url, rate_limiter, **kwargs):
+        """
+        发送请求；配置了速率限制调度器时，先按额度排队，
+        被限制时暂停并在恢复后重试，而不是直接失败。
+        """
+        send = getattr(self.session, method)
+        if rate_limiter is None:
+            return send(url, **kwargs)
+
+        for _ in range(self.max_rate_limit_retries + 1):
+            rate_limiter.acquire()
+            response = send(url, **kwargs)
+            rate_limiter.update(response.headers)
+            delay = rate_limiter.retry_delay(response)
+            if delay is None:
+                break
+            rate_limiter.pause(delay)
+        return response
+
+    def _get_page(self, url, params):
+        """
+        请求单页数据，返回 (items, next_url)。
+        启用缓存时携带 If-None-Match / If-Modified-Since，304 响应直接使用缓存内容（不计入速率限制）。
+        """
+        if self.cache is None:
+            response = self._request(url, self.headers, params)
+            response.raise_for_status()  # 检查请求是否成功
+            return response.json(), response.links.get('next', {}).get('url')  # 最后一页时 next 为空
+
+        key = self.cache.make_key(url, params)
+        headers = {**self.headers, **self.cache.conditional_headers(key)}
+        response = self._request(url, headers, params)
+        if response.status_code == 304:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            # 缓存条目已被淘汰，重新发起非条件请求
+            response = self._request(url, self.headers, params)
+        response.raise_for_status()
+        items = response.json()
+        next_url = response.links.get('next', {}).get('url')
+        self.cache.put(key, items, response.headers.get('ETag'), response.headers.get('Last-Modified'), next_url)
+        return items, next_url
+
+    def iter_commits(self, repo, since=None, until=None):
         LOG.debug(f"准备获取 {repo} 的 Commits")
         url = f'https://api.github.com/repos/{repo}/commits'  # 构建获取提交的API URL
-        params = {}
-        if since:
-            params['since'] = since  # 如果指定了开始日期，添加到参数中
-        if until:
-            params['until'] = until  # 如果指定了结束日期，添加到参数中
+        return self._paginate(url, {'since': since, 'until': until})
+
+    def iter_issues(self, repo, since=None, until=None):
+        LOG.debug(f"准备获取 {repo} 的 Issues。")
+        url = f'https://api.github.com/repos/{repo}/issues'  # 构建获取问题的API URL
+        return self._paginate(url, {'state': 'closed', 'since': since, 'until': until})
 
+    def iter_pull_requests(self, repo, since=None, until=None):
+        LOG.debug(f"准备获取 {repo} 的 Pull Requests。")
+        url = f'https://api.github.com/repos/{repo}/pulls'  # 构建获取拉取请求的API URL
+        # pulls 接口不支持 since 过滤，按更新时间倒序读取，遇到早于 since 的记录即停止翻页
+        params = {'state': 'closed', 'sort': 'updated', 'direction': 'desc'}
+        for pull_request in self._paginate(url, params):
+            if since and pull_request.get('updated_at') and pull_request['updated_at'] < since:
+                return
+            yield pull_request
+
+    def _collect(self, items, repo, kind, strict=False):
+        # 将分页迭代器收集为列表，失败时记录日志；strict=True 时重新抛出异常，否则返回空列表
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()  # 检查请求是否成功
-            return response.json()  # 返回JSON格式的数据
+            return list(items)
         except Exception as e:
-            LOG.error(f"从 {repo} 获取 Commits 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
+            LOG.error(f"从 {repo} 获取 {kind} 失败：{str(e)}")
+            response = getattr(e, 'response', None)
+            LOG.error(f"响应详情：{response.text if response is not None else '无响应数据可用'}")
+            if strict:
+                raise  # 调用方需要区分「抓取失败」和「没有更新」
             return []  # Handle failure case
 
-    def fetch_issues(self, repo, since=None, until=None):
-        LOG.debug(f"准备获取 {repo} 的 Issues。")
-        url = f'https://api.github.com/repos/{repo}/issues'  # 构建获取问题的API URL
-        params = {'state': 'closed', 'since': since, 'until': until}
+    def fetch_commits(self, repo, since=None, until=None, strict=False):
+        return self._collect(self.iter_commits(repo, since, until), repo, 'Commits', strict)
+
+    def fetch_issues(self, repo, since=None, until=None, strict=False):
+        return self._collect(self.iter_issues(repo, since, until), repo, 'Issues', strict)
+
+    def fetch_pull_requests(self, repo, since=None, until=None, strict=False):
+        return self._collect(self.iter_pull_requests(repo, since, until), repo, 'Pull Requests', strict)
+
+    def fetch_updates_batch(self, repos, since=None, until=None, batch_size=50):
+        """
+        使用 GitHub GraphQL 接口批量获取多个仓库的更新，每个仓库以别名出现在同一查询中。
+        单批仓库数按查询成本计算；返回 {repo: updates}，updates 结构与 fetch_updates 一致。
+        """
+        size = github_graphql.max_batch_size(batch_size)
+        results = {}
+        for start in range(0, len(repos), size):
+            results.update(self._fetch_graphql_batch(repos[start:start + size], since, until))
+        return results
+
+    def _fetch_graphql_batch(self, repos, since, until):
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            data = self._graphql(github_graphql.build_batch_query(len(repos)),
+                                 github_graphql.build_variables(repos, since, until))
         except Exception as e:
-            LOG.error(f"从 {repo} 获取 Issues 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
-            return []
+            if len(repos) > 1:
+                # 查询过大导致超时或服务端错误时，对半拆分后重试
+                middle = len(repos) // 2
+                LOG.warning(f"GraphQL 批量查询 {len(repos)} 个仓库失败，拆分重试：{str(e)}")
+                return {**self._fetch_graphql_batch(repos[:middle], since, until),
+                        **self._fetch_graphql_batch(repos[middle:], since, until)}
+            LOG.error(f"从 {repos[0]} 获取更新失败：{str(e)}")
+            return {repos[0]: {'commits': [], 'issues': [], 'pull_requests': []}}
 
-    def fetch_pull_requests(self, repo, since=None, until=None):
-        LOG.debug(f"准备获取 {repo} 的 Pull Requests。")
-        url = f'https://api.github.com/repos/{repo}/pulls'  # 构建获取拉取请求的API URL
-        params = {'state': 'closed', 'since': since, 'until': until}
+        rate = data.get('rateLimit') or {}
+        LOG.debug(f"GraphQL 批量查询 {len(repos)} 个仓库，消耗 {rate.get('cost')} 点，剩余 {rate.get('remaining')} 点")
+        fallbacks = {
+            'commits': self.fetch_commits,
+            'issues': self.fetch_issues,
+            'pull_requests': self.fetch_pull_requests,
+        }
+        results = {}
+        for i, repo in enumerate(repos):
+            updates, truncated = github_graphql.normalize_repository(data.get(f'r{i}'), since)
+            for kind in truncated:
+                # 超过单页上限的连接回退到 REST 分页接口补全
+                updates[kind] = fallbacks[kind](repo, since, until)
+            results[repo] = updates
+        return results
+
+    def _graphql(self, query, variables):
+        response = self._send('post', github_graphql.GRAPHQL_URL, self.graphql_rate_limiter,
+                              headers=self.headers, json={'query': query, 'variables': variables}, timeout=30)
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('errors') and not payload.get('data'):
+            raise RuntimeError(payload['errors'][0].get('message'))
+        for error in payload.get('errors') or []:
+            # 单个仓库不存在等错误不影响同批其他仓库
+            LOG.warning(f"GraphQL 查询警告：{error.get('message')}")
+        return payload['data']
+
+    def _write_issues(self, file, repo, issues):
+        # 逐条写入关闭的问题，分页数据边获取边落盘
         try:
-            response = requests.get(url, headers=self.headers, params=params, timeout=10)
-            response.raise_for_status()  # 确保成功响应
-            return response.json()
+            for issue in issues:
+                file.write(f"- {issue['title']} #{issue['number']}\n")
         except Exception as e:
-            LOG.error(f"从 {repo} 获取 Pull Requests 失败：{str(e)}")
-            LOG.error(f"响应详情：{response.text if 'response' in locals() else '无响应数据可用'}")
-            return []
+            LOG.error(f"从 {repo} 获取 Issues 失败：{str(e)}")
+
+    def _sync(self, repo, window_since, until=None, updates=None):
+        """
+        将增量合并进本地事件库；未传入 updates 时，从游标位置开始抓取增量。
+        """
+        if updates is None:
+            since = self.event_store.since_for(repo, window_since)
+            LOG.debug(f"[{repo}]从 {since} 开始增量同步")
+            updates = self.fetch_updates(repo, since=since, until=until)
+        self.event_store.merge_updates(repo, updates)
 
     def export_daily_progress(self, repo):
         LOG.debug(f"[准备导出项目进度]：{repo}")
         today = datetime.now().date().isoformat()  # 获取今天的日期
-        updates = self.fetch_updates(repo, since=today)  # 获取今天的更新数据
+
+        if self.event_store is not None:
+            # 只同步游标之后的增量，再从本地事件库读取今天关闭的问题
+            self._sync(repo, today)
+            issues = self.event_store.query_updates(repo, today, today)['issues']
+        else:
+            issues = self.iter_issues(repo, since=today)  # 流式写入今天关闭的问题
         
         repo_dir = os.path.join('daily_progress', repo.replace("/", "_"))  # 构建存储路径
         os.makedirs(repo_dir, exist_ok=True)  # 确保目录存在
@@ -75,30 +221,60 @@ class GitHubClient:
         with open(file_path, 'w') as file:
             file.write(f"# Daily Progress for {repo} ({today})\n\n")
             file.write("\n## Issues Closed Today\n")
-            for issue in updates['issues']:  # 写入今天关闭的问题
-                file.write(f"- {issue['title']} #{issue['number']}\n")
+            self._write_issues(file, repo, issues)
         
         LOG.info(f"[{repo}]项目每日进展文件生成： {file_path}")  # 记录日志
         return file_path
 
-    def export_progress_by_date_range(self, repo, days):
+    @staticmethod
+    def date_range(days):
+        # 计算最近 days 天的起止日期
         today = date.today()  # 获取当前日期
         since = today - timedelta(days=days)  # 计算开始日期
-        
-        updates = self.fetch_updates(repo, since=since.isoformat(), until=today.isoformat())  # 获取指定日期范围内的更新
-        
+        return since, today
+
+    def export_progress_by_date_range(self, repo, days, updates=None, since=None):
+        # since 可选，覆盖按天数计算的起点，例如仓库上次运行时间（ISO 8601 时间戳）
+        window_since, today = self.date_range(days)
+        since = since or window_since
+
+        if self.event_store is not None:
+            # 合并增量后从本地事件库渲染，窗口内已同步过的数据无需重复抓取
+            self._sync(repo, str(since), today.isoformat(), updates)
+            return self.export_local_progress(repo, since, today)
+
+        if updates is None:
+            # 未传入预先抓取的数据时，边分页获取边写入指定日期范围内关闭的问题
+            issues = self.iter_issues(repo, since=str(since), until=today.isoformat())
+        else:
+            issues = updates['issues']
+        return self._write_progress(repo, since, today, issues)
+
+    def export_local_progress(self, repo, since, until):
+        """
+        完全基于本地事件库导出任意日期范围的进展，不发起网络请求。
+        """
+        issues = self.event_store.query_updates(repo, since, until)['issues']
+        return self._write_progress(repo, since, until, issues)
+
+    def _write_progress(self, repo, since, today, issues):
+        if isinstance(since, str):
+            # 起点为时间戳（上次运行时间）：文件名精确到分钟，同一天的多次运行不会互相覆盖
+            since_label = since[:16].replace(':', '')
+            days = max((today - date.fromisoformat(since[:10])).days, 1)
+        else:
+            since_label, days = since, (today - since).days
         repo_dir = os.path.join('daily_progress', repo.replace("/", "_"))  # 构建目录路径
         os.makedirs(repo_dir, exist_ok=True)  # 确保目录存在
         
         # 更新文件名以包含日期范围
-        date_str = f"{since}_to_{today}"
+        date_str = f"{since_label}_to_{today}"
         file_path = os.path.join(repo_dir, f'{date_str}.md')  # 构建文件路径
         
         with open(file_path, 'w') as file:
             file.write(f"# Progress for {repo} ({since} to {today})\n\n")
             file.write(f"\n## Issues Closed in the Last {days} Days\n")
-            for issue in updates['issues']:  # 写入在指定日期内关闭的问题
-                file.write(f"- {issue['title']} #{issue['number']}\n")
+            self._write_issues(file, repo, issues)  # 写入在指定日期内关闭的问题
         
         LOG.info(f"[{repo}]项目最新进展文件生成： {file_path}")  # 记录日志
         return file_path
@@ -0,0 +1,146 @@
+# src/github_graphql.py
+
+GRAPHQL_URL = 'https://api.github.com/graphql'
+PAGE_SIZE = 100  # 每个连接单次最多返回的节点数
+CONNECTIONS_PER_REPO = 3  # 每个仓库查询 commits / issues / pullRequests 三个连接
+MAX_NODES = 500000  # GitHub 单次查询允许的节点上限
+MAX_COST_POINTS = 100  # 单批查询期望消耗的额度上限（GitHub 约按每 100 个节点计 1 点）
+
+REPO_FRAGMENT = '''
+fragment RepoUpdates on Repository {
+  nameWithOwner
+  defaultBranchRef {
+    target {
+      ... on Commit {
+        history(first: %(page)d, since: $since, until: $until) {
+          pageInfo { hasNextPage }
+          nodes { oid messageHeadline message committedDate url author { name email } }
+        }
+      }
+    }
+  }
+  issues(first: %(page)d, states: CLOSED, filterBy: {since: $issuesSince}, orderBy: {field: UPDATED_AT, direction: DESC}) {
+    pageInfo { hasNextPage }
+    nodes { number title closedAt updatedAt url }
+  }
+  pullRequests(first: %(page)d, states: [CLOSED, MERGED], orderBy: {field: UPDATED_AT, direction: DESC}) {
+    pageInfo { hasNextPage }
+    nodes { number title closedAt mergedAt updatedAt url }
+  }
+}
+''' % {'page': PAGE_SIZE}
+
+
+def nodes_per_repo():
+    # 每个仓库在一次查询中最多产生的节点数
+    return CONNECTIONS_PER_REPO * PAGE_SIZE
+
+
+def max_batch_size(configured=50):
+    """
+    根据查询成本计算单批仓库数：既不超过节点上限，也不让单批消耗的额度超过 MAX_COST_POINTS。
+    """
+    by_nodes = MAX_NODES // nodes_per_repo()
+    by_cost = MAX_COST_POINTS * 100 // nodes_per_repo()
+    return max(1, min(configured, by_nodes, by_cost))
+
+
+def build_batch_query(count):
+    """
+    构造一次查询多个仓库的 GraphQL 语句，每个仓库使用 r{i} 作为别名，
+    owner/name 通过变量传入以避免拼接注入。
+    """
+    declarations = ['$since: GitTimestamp', '$until: GitTimestamp', '$issuesSince: DateTime']
+    fields = []
+    for i in range(count):
+        declarations.append(f'$owner{i}: String!, $name{i}: String!')
+        fields.append(f'  r{i}: repository(owner: $owner{i}, name: $name{i}) {{ ...RepoUpdates }}')
+    return (
+        f"query({', '.join(declarations)}) {{\n"
+        "  rateLimit { cost remaining resetAt }\n"
+        + '\n'.join(fields)
+        + "\n}\n"
+        + REPO_FRAGMENT
+    )
+
+
+def to_timestamp(value):
+    # 将 YYYY-MM-DD 转换为 GraphQL 所需的 ISO8601 时间戳；已是时间戳时原样返回
+    if not value:
+        return None
+    return value if 'T' in value else f'{value}T00:00:00Z'
+
+
+def build_variables(repos, since=None, until=None):
+    variables = {
+        'since': to_timestamp(since),
+        'until': to_timestamp(until),
+        'issuesSince': to_timestamp(since),
+    }
+    for i, repo in enumerate(repos):
+        owner, name = repo.split('/', 1)
+        variables[f'owner{i}'] = owner
+        variables[f'name{i}'] = name
+    return variables
+
+
+def _history(node):
+    target = ((node.get('defaultBranchRef') or {}).get('target') or {})
+    return target.get('history') or {'nodes': [], 'pageInfo': {'hasNextPage': False}}
+
+
+def normalize_repository(node, since=None):
+    """
+    将 GraphQL 返回的仓库节点转换为与 REST 接口一致的 updates 结构。
+    :return: (updates, truncated)，truncated 为仍有下一页的连接名集合
+    """
+    if node is None:
+        return {'commits': [], 'issues': [], 'pull_requests': []}, set()
+
+    history = _history(node)
+    commits = [
+        {
+            'sha': commit['oid'],
+            'html_url': commit['url'],
+            'commit': {
+                'message': commit['message'],
+                'author': {**(commit.get('author') or {}), 'date': commit['committedDate']},
+            },
+        }
+        for commit in history['nodes']
+    ]
+    issues = [
+        {
+            'number': issue['number'],
+            'title': issue['title'],
+            'state': 'closed',
+            'closed_at': issue['closedAt'],
+            'updated_at': issue['updatedAt'],
+            'html_url': issue['url'],
+        }
+        for issue in node['issues']['nodes']
+    ]
+    since_ts = to_timestamp(since)
+    pull_requests = [
+        {
+            'number': pr['number'],
+            'title': pr['title'],
+            'state': 'closed',
+            'closed_at': pr['closedAt'],
+            'merged_at': pr['mergedAt'],
+            'updated_at': pr['updatedAt'],
+            'html_url': pr['url'],
+        }
+        for pr in node['pullRequests']['nodes']
+        if since_ts is None or pr['updatedAt'] >= since_ts  # pullRequests 连接不支持 since 过滤
+    ]
+
+    truncated = set()
+    if history['pageInfo']['hasNextPage']:
+        truncated.add('commits')
+    if node['issues']['pageInfo']['hasNextPage']:
+        truncated.add('issues')
+    # 拉取请求按更新时间倒序，最后一条仍在时间窗口内才说明可能还有更多
+    if node['pullRequests']['pageInfo']['hasNextPage'] and len(pull_requests) == len(node['pullRequests']['nodes']):
+        truncated.add('pull_requests')
+    return {'commits': commits, 'issues': issues, 'pull_requests': pull_requests}, truncated
@@ -5,14 +5,18 @@ from github_client import GitHubClient  # 导入用于GitHub API操作的客户
 from hacker_news_client import HackerNewsClient
 from report_generator import ReportGenerator  # 导入报告生成器模块
 from llm import LLM  # 导入可能用于处理语言模型的LLM类
+from llm_cache import LLMCache  # 导入LLM响应缓存
 from subscription_manager import SubscriptionManager  # 导入订阅管理器
+from http_session import configure_shared_session  # 导入共享HTTP连接池配置
 from logger import LOG  # 导入日志记录器
 
 # 创建各个组件的实例
 config = Config()
+configure_shared_session(config.http)  # 所有客户端复用同一个连接池会话
 github_client = GitHubClient(config.github_token)
-hacker_news_client = HackerNewsClient() # 创建 Hacker News 客户端实例
+hacker_news_client = HackerNewsClient.from_config(config.hacker_news) # 创建 Hacker News 客户端实例
 subscription_manager = SubscriptionManager(config.subscriptions_file)
+llm_cache = LLMCache.from_config(config.llm_cache)  # 重复点击生成相同报告时直接返回缓存
 
 def generate_github_report(model_type, model_name, repo, days):
     config.llm_model_type = model_type
@@ -22,14 +26,13 @@ def generate_github_report(model_type, model_name, repo, days):
     else:
         config.ollama_model_name = model_name
 
-    llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    llm = LLM(config, cache=llm_cache)  # 创建语言模型实例
+    report_generator = ReportGenerator(llm, config.report_types, context_tokens=config.llm_context_tokens)  # 创建报告生成器实例
 
     # 定义一个函数，用于导出和生成指定时间范围内项目的进展报告
     raw_file_path = github_client.export_progress_by_date_range(repo, days)  # 导出原始数据文件路径
-    report, report_file_path = report_generator.generate_github_report(raw_file_path)  # 生成并获取报告内容及文件路径
-
-    return report, report_file_path  # 返回报告内容和报告文件路径
+    # 流式返回报告内容，生成完成后再返回报告文件路径
+    yield from report_generator.generate_github_report_stream(raw_file_path)
 
 def generate_hn_hour_topic(model_type, model_name):
     config.llm_model_type = model_type
@@ -39,13 +42,12 @@ def generate_hn_hour_topic(model_type, model_name):
     else:
         config.ollama_model_name = model_name
 
-    llm = LLM(config)  # 创建语言模型实例
-    report_generator = ReportGenerator(llm, config.report_types)  # 创建报告生成器实例
+    llm = LLM(config, cache=llm_cache)  # 创建语言模型实例
+    report_generator = ReportGenerator(llm, config.report_types, context_tokens=config.llm_context_tokens)  # 创建报告生成器实例
 
     markdown_file_path = hacker_news_client.export_top_stories()
-    report, report_file_path = report_generator.generate_hn_topic_report(markdown_file_path)
-
-    return report, report_file_path  # 返回报告内容和报告文件路径
+    # 流式返回报告内容，生成完成后再返回报告文件路径
+    yield from report_generator.generate_hn_topic_report_stream(markdown_file_path)
 
 
 # 定义一个回调函数，用于根据 Radio 组件的选择返回不同的 Dropdown 选项
@@ -1,41 +1,133 @@
-import requests  # 导入requests库用于HTTP请求
 from bs4 import BeautifulSoup  # 导入BeautifulSoup库用于解析HTML内容
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池并发抓取多个列表页
 from datetime import datetime  # 导入datetime模块用于获取日期和时间
 import os  # 导入os模块用于文件和目录操作
+from http_session import get_shared_session  # 导入共享的HTTP连接池会话
+from hn_parser import parse_front_page  # 导入列表页快速解析器
+from hn_firebase import HNFirebaseSource  # 导入官方 Firebase API 数据源
 from logger import LOG  # 导入日志模块
 
 class HackerNewsClient:
-    def __init__(self):
+    LISTS = ('news', 'newest', 'best', 'ask', 'show')  # 支持抓取的列表页
+
+    PAGE_SIZE = 30  # 每个列表页的新闻数
+
+    def __init__(self, session=None, event_store=None, lists=('news',), pages=1, max_workers=8,
+                 data_source='html', firebase=None, rising_min_points=50):
         self.url = 'https://news.ycombinator.com/'  # Hacker News的URL
+        self.session = session or get_shared_session()  # 复用连接池的HTTP会话
+        self.event_store = event_store  # 可选的本地事件库，保存每次抓取的快照
+        self.lists = list(lists)  # 每次快照抓取的列表页，按优先级排列
+        self.pages = pages  # 每个列表抓取的页数
+        self.max_workers = max_workers  # 并发抓取的线程数
+        self.data_source = data_source  # 'html' 解析网页，'firebase' 使用官方 API
+        self.rising_min_points = rising_min_points  # 分数较上次快照增加多少视为热度上升
+        if data_source == 'firebase':
+            self.firebase = firebase or HNFirebaseSource(self.session)
+
+    @classmethod
+    def from_config(cls, hn_config, session=None, event_store=None):
+        """根据 config.json 中 hacker_news 配置创建客户端"""
+        return cls(session=session, event_store=event_store,
+                   lists=hn_config.get('lists', ['news']),
+                   pages=hn_config.get('pages', 1),
+                   max_workers=hn_config.get('max_workers', 8),
+                   data_source=hn_config.get('source', 'html'),
+                   rising_min_points=hn_config.get('rising_min_points', 50))
 
     def fetch_top_stories(self):
+        """
+        并发抓取配置的各列表页（每个列表 pages 页），按 item id 去重后返回。
+        结果顺序：列表优先级 -> 页码 -> 页内排名；同一新闻只保留第一次出现，并记录来源列表。
+        """
         LOG.debug("准备获取Hacker News的热门新闻。")
+        if self.data_source == 'firebase':
+            return self._fetch_firebase_stories()
+        targets = [(name, page) for name in self.lists for page in range(1, self.pages + 1)]
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(targets)))) as executor:
+            pages = list(executor.map(lambda target: self._fetch_page(*target), targets))
+
+        top_stories, seen = [], set()
+        for (name, _), stories in zip(targets, pages):
+            for story in stories:
+                key = story.get('id') or story['link']
+                if key in seen:
+                    continue
+                seen.add(key)
+                story['source'] = name
+                top_stories.append(story)
+        if len(targets) > 1:
+            LOG.info(f"共抓取 {len(targets)} 个列表页，去重后 {len(top_stories)} 条新闻。")
+        return top_stories
+
+    def _fetch_firebase_stories(self):
+        # 先汇总各列表的 id 并去重，再一次性批量获取条目，已缓存且未变化的条目不会重新抓取
+        story_ids, sources, ranks = [], {}, {}
+        for name in self.lists:
+            try:
+                ids = self.firebase.story_ids(name, self.pages * self.PAGE_SIZE)
+            except Exception as e:
+                LOG.error(f"获取Hacker News的热门新闻失败（{name}）：{str(e)}")
+                continue
+            for rank, item_id in enumerate(ids, start=1):
+                if item_id not in sources:
+                    sources[item_id], ranks[item_id] = name, rank
+                    story_ids.append(item_id)
+
+        top_stories = []
+        for item in self.firebase.fetch_items(story_ids):
+            if item.get('title') and not item.get('deleted') and not item.get('dead'):
+                story = HNFirebaseSource.to_story(item, ranks[item['id']])
+                story['source'] = sources[item['id']]
+                top_stories.append(story)
+        LOG.info(f"通过 Firebase API 获取 {len(top_stories)} 条Hacker News新闻。")
+        return top_stories
+
+    def _fetch_page(self, name, page):
+        url = f"{self.url}{name}" + (f"?p={page}" if page > 1 else "")
         try:
-            response = requests.get(self.url, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()  # 检查请求是否成功
-            top_stories = self.parse_stories(response.text)  # 解析新闻数据
-            return top_stories
+            return self.parse_stories(response.text)  # 解析新闻数据
         except Exception as e:
-            LOG.error(f"获取Hacker News的热门新闻失败：{str(e)}")
+            LOG.error(f"获取Hacker News的热门新闻失败（{name} 第 {page} 页）：{str(e)}")
             return []
 
     def parse_stories(self, html_content):
         LOG.debug("解析Hacker News的HTML内容。")
+        try:
+            # 快速路径：单遍流式解析，同时提取排名、分数和评论数
+            top_stories = parse_front_page(html_content)
+        except Exception as e:
+            LOG.warning(f"快速解析Hacker News页面失败，改用BeautifulSoup：{str(e)}")
+            top_stories = []
+        if not top_stories and 'athing' in html_content:
+            # 页面结构变化导致快速路径没有解析出内容时，退回完整的文档树解析
+            top_stories = self._parse_stories_bs4(html_content)
+
+        LOG.info(f"成功解析 {len(top_stories)} 条Hacker News新闻。")
+        return top_stories
+
+    def _parse_stories_bs4(self, html_content):
         soup = BeautifulSoup(html_content, 'html.parser')
         stories = soup.find_all('tr', class_='athing')  # 查找所有包含新闻的<tr>标签
         
         top_stories = []
         for story in stories:
-            title_tag = story.find('span', class_='titleline').find('a')
+            titleline = story.find('span', class_='titleline')
+            title_tag = titleline.find('a') if titleline else None
             if title_tag:
                 title = title_tag.text
                 link = title_tag['href']
-                top_stories.append({'title': title, 'link': link})
-        
-        LOG.info(f"成功解析 {len(top_stories)} 条Hacker News新闻。")
+                top_stories.append({'id': story.get('id'), 'title': title, 'link': link})
         return top_stories
 
-    def export_top_stories(self, date=None, hour=None):
+    def export_top_stories(self, date=None, hour=None, delta=False):
+        """
+        抓取并导出热门新闻快照 hacker_news/<date>/<hour>.md。
+        delta=True 且启用本地事件库时，另外导出 <hour>_delta.md，只包含当天首次出现和热度明显上升的新闻，
+        并返回该文件路径；没有任何变化时返回 None，调用方可跳过后续的 LLM 调用。
+        """
         LOG.debug("准备导出Hacker News的热门新闻。")
         top_stories = self.fetch_top_stories()  # 获取新闻数据
         
@@ -49,6 +141,13 @@ class HackerNewsClient:
         if hour is None:
             hour = datetime.now().strftime('%H')
 
+        new_stories = rising_stories = None
+        if self.event_store is not None:
+            if delta:
+                # 必须在写入本次快照之前与当天已有的快照比较
+                new_stories, rising_stories = self.split_delta(top_stories, date, hour)
+            self.event_store.add_hn_snapshot(date, hour, top_stories)  # 批量写入本地事件库
+
         # 构建存储路径
         dir_path = os.path.join('hacker_news', date)
         os.makedirs(dir_path, exist_ok=True)  # 确保目录存在
@@ -57,11 +156,56 @@ class HackerNewsClient:
         with open(file_path, 'w') as file:
             file.write(f"# Hacker News Top Stories ({date} {hour}:00)\n\n")
             for idx, story in enumerate(top_stories, start=1):
-                file.write(f"{idx}. [{story['title']}]({story['link']})\n")
+                file.write(self._story_line(idx, story))
         
         LOG.info(f"Hacker News热门新闻文件生成：{file_path}")
-        return file_path
+        if new_stories is None:
+            return file_path
+
+        if not new_stories and not rising_stories:
+            LOG.info("本次快照与当天已有快照相比没有新上榜或热度上升的新闻。")
+            return None
+        delta_file_path = os.path.join(dir_path, f'{hour}_delta.md')
+        with open(delta_file_path, 'w') as file:
+            file.write(f"# Hacker News Top Stories ({date} {hour}:00)\n\n")
+            if new_stories:
+                file.write("## 新上榜\n\n")
+                for idx, story in enumerate(new_stories, start=1):
+                    file.write(self._story_line(idx, story))
+            if rising_stories:
+                file.write("\n## 热度上升\n\n")
+                for idx, story in enumerate(rising_stories, start=1):
+                    file.write(self._story_line(idx, story))
+        LOG.info(f"Hacker News增量快照：新上榜 {len(new_stories)} 条，热度上升 {len(rising_stories)} 条")
+        return delta_file_path
+
+    def split_delta(self, stories, date, hour):
+        """
+        与当天 hour 之前的快照比较，返回 (新上榜, 热度上升) 两个列表。
+        以 item id 或链接判断是否已出现；分数较上次快照增加 rising_min_points 以上视为热度上升。
+        """
+        seen_points, seen_links = self.event_store.hn_seen_stories(date, hour)
+        new_stories, rising_stories = [], []
+        for story in stories:
+            key = self.event_store.story_key(story)
+            if key not in seen_points and story['link'] not in seen_links:
+                new_stories.append(story)
+            elif (story.get('points') is not None and seen_points.get(key) is not None
+                  and story['points'] - seen_points[key] >= self.rising_min_points):
+                rising_stories.append(dict(story, points_delta=story['points'] - seen_points[key]))
+        return new_stories, rising_stories
 
+    @staticmethod
+    def _story_line(idx, story):
+        stats = ""
+        if story.get('points') is not None:
+            details = [f"{story['points']} points", f"{story.get('comments') or 0} comments"]
+            if story.get('points_delta'):
+                details.append(f"+{story['points_delta']} points")
+            if story.get('age'):
+                details.append(story['age'])
+            stats = f" ({', '.join(details)})"
+        return f"{idx}. [{story['title']}]({story['link']}){stats}\n"
 
 if __name__ == "__main__":
     client = HackerNewsClient()
@@ -0,0 +1,114 @@
+# src/hn_firebase.py
+
+import threading  # 导入threading模块保证缓存的多线程访问安全
+import time  # 导入time模块判断缓存是否过期
+from collections import OrderedDict  # 使用有序字典维护 LRU 顺序
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池并发抓取条目
+from datetime import datetime  # 导入datetime模块转换发布时间
+from http_session import get_shared_session  # 导入共享的HTTP连接池会话
+from logger import LOG  # 导入日志模块
+
+
+class HNFirebaseSource:
+    """
+    基于 Hacker News 官方 Firebase API 的统一数据源：
+    - 列表接口（topstories / newstories / beststories / askstories / showstories）只返回 id；
+    - 条目详情通过线程池批量并发抓取；
+    - 分数和评论数随时变化，而 updates.json 只列出最近几分钟内变化的条目，不能据此长期复用缓存：
+      缓存只在 stale_after 秒内有效（主要供同一次快照的多个列表共用条目），期间出现在 updates.json 中的
+      条目仍会重新抓取，超过 stale_after 的条目总是重新抓取最新的分数和评论数。
+    返回的新闻字段与 HackerNewsClient.parse_stories 一致。
+    """
+    API_URL = 'https://hacker-news.firebaseio.com/v0'
+    LIST_ENDPOINTS = {
+        'news': 'topstories', 'newest': 'newstories', 'best': 'beststories',
+        'ask': 'askstories', 'show': 'showstories',
+    }
+
+    def __init__(self, session=None, max_workers=16, stale_after=60, max_items=5000):
+        self.session = session or get_shared_session()  # 复用连接池的HTTP会话
+        self.max_workers = max_workers  # 并发抓取条目的线程数
+        self.stale_after = stale_after  # 缓存条目超过该秒数后强制刷新
+        self.max_items = max_items  # 缓存的最大条目数
+        self._items = OrderedDict()  # id -> (抓取时间, 条目)
+        self._lock = threading.Lock()
+        self.fetched = 0  # 累计抓取的条目数（用于观察缓存效果）
+
+    def _get_json(self, path):
+        response = self.session.get(f'{self.API_URL}/{path}.json', timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def story_ids(self, list_name='news', limit=30):
+        """返回列表（news/newest/best/ask/show 或 Firebase 接口名）前 limit 个条目 id"""
+        endpoint = self.LIST_ENDPOINTS.get(list_name, list_name)
+        return (self._get_json(endpoint) or [])[:limit]
+
+    def changed_ids(self):
+        """返回最近发生变化的条目 id（分数、评论数等）"""
+        try:
+            return set((self._get_json('updates') or {}).get('items', []))
+        except Exception as e:
+            LOG.warning(f"获取 Hacker News 更新列表失败，所有缓存条目按过期处理：{str(e)}")
+            return None
+
+    def _fetch_item(self, item_id):
+        try:
+            return self._get_json(f'item/{item_id}')
+        except Exception as e:
+            LOG.error(f"获取 Hacker News 条目 {item_id} 失败：{str(e)}")
+            return None
+
+    def fetch_items(self, ids):
+        """批量获取条目详情：优先使用缓存，只并发抓取未缓存、已变化或已过期的条目"""
+        now = time.time()
+        with self._lock:
+            cached = {item_id: self._items[item_id] for item_id in ids if item_id in self._items}
+        changed = self.changed_ids() if cached else set()
+        to_fetch = [
+            item_id for item_id in ids
+            if item_id not in cached or changed is None or item_id in changed
+            or now - cached[item_id][0] > self.stale_after
+        ]
+
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(to_fetch)))) as executor:
+                fetched = list(executor.map(self._fetch_item, to_fetch))
+            with self._lock:
+                for item_id, item in zip(to_fetch, fetched):
+                    if item:
+                        self._items[item_id] = (now, item)
+                        self._items.move_to_end(item_id)
+                while len(self._items) > self.max_items:
+                    self._items.popitem(last=False)
+                self.fetched += len(to_fetch)
+        LOG.debug(f"Hacker News 条目：共 {len(ids)} 个，抓取 {len(to_fetch)} 个，缓存命中 {len(ids) - len(to_fetch)} 个")
+
+        with self._lock:
+            return [self._items[item_id][1] for item_id in ids if item_id in self._items]
+
+    @staticmethod
+    def to_story(item, rank=None):
+        """将 Firebase 条目转换为与 HTML 解析结果一致的新闻结构"""
+        posted = item.get('time')
+        return {
+            'id': str(item['id']),
+            'rank': rank,
+            'title': item.get('title'),
+            'link': item.get('url') or f"https://news.ycombinator.com/item?id={item['id']}",
+            'points': item.get('score'),
+            'comments': item.get('descendants'),
+            'posted_at': datetime.fromtimestamp(posted).isoformat(timespec='seconds') if posted else None,
+            'time': posted,
+            'by': item.get('by'),
+        }
+
+    def fetch_stories(self, list_name='news', limit=30):
+        """获取列表前 limit 条新闻，跳过已删除或失效的条目；排名为条目在原列表中的位置"""
+        ids = self.story_ids(list_name, limit)
+        positions = {item_id: rank for rank, item_id in enumerate(ids, start=1)}
+        return [
+            self.to_story(item, positions.get(item.get('id')))
+            for item in self.fetch_items(ids)
+            if item.get('title') and not item.get('deleted') and not item.get('dead')
+        ]
@@ -0,0 +1,96 @@
+# src/hn_parser.py
+
+import re  # 导入re模块解析数字
+from html.parser import HTMLParser  # 使用标准库的流式HTML分词器
+
+_NUMBER = re.compile(r'\d+')
+
+
+def _to_int(text):
+    match = _NUMBER.search((text or '').replace(',', ''))
+    return int(match.group()) if match else None
+
+
+class _FrontPageParser(HTMLParser):
+    """
+    Hacker News 列表页的单遍解析器：不构建文档树，只在分词过程中跟踪少量状态，
+    提取每条新闻的 id、排名、标题、链接、分数、评论数和发布时间。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stories = []
+        self._current = None  # 当前正在解析的新闻（标题行及其后的 subtext 行）
+        self._titleline = False  # 是否位于 titleline 内且尚未读到标题链接
+        self._capture = None  # (字段名, 结束标签)，捕获文本直到对应的结束标签
+        self._item_href = None
+        self._buffer = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._capture is not None:
+            return
+        attrs = dict(attrs)
+        classes = (attrs.get('class') or '').split()
+        if tag == 'tr' and 'athing' in classes:
+            self._current = {'id': attrs.get('id'), 'rank': None, 'title': None, 'link': None,
+                             'points': None, 'comments': None, 'age': None, 'posted_at': None}
+            self.stories.append(self._current)
+            return
+        if self._current is None:
+            return
+        if tag == 'span':
+            if 'rank' in classes:
+                self._start_capture('rank', 'span')
+            elif 'titleline' in classes:
+                self._titleline = True
+            elif 'score' in classes:
+                self._start_capture('points', 'span')
+            elif 'age' in classes:
+                # title 属性形如 "2024-09-01T10:00:00 1725184800"
+                self._current['posted_at'] = (attrs.get('title') or '').split(' ')[0] or None
+        elif tag == 'a':
+            href = attrs.get('href') or ''
+            if self._titleline:
+                self._titleline = False
+                self._current['link'] = href
+                self._start_capture('title', 'a')
+            elif self._current['id'] and href == f"item?id={self._current['id']}":
+                # subtext 中指向本条目的链接：发布时间或评论数
+                self._start_capture('item_link', 'a')
+
+    def _start_capture(self, field, end_tag):
+        self._capture = (field, end_tag)
+        self._buffer = []
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._buffer.append(data)
+
+    def handle_endtag(self, tag):
+        if self._capture is None or tag != self._capture[1]:
+            return
+        field, text = self._capture[0], ''.join(self._buffer).strip()
+        self._capture = None
+        if field == 'title':
+            self._current['title'] = text
+        elif field == 'item_link':
+            if text.endswith('ago'):
+                self._current['age'] = text
+            elif 'comment' in text:
+                self._current['comments'] = _to_int(text)
+            elif text == 'discuss':
+                self._current['comments'] = 0
+        else:
+            self._current[field] = _to_int(text)
+
+
+def parse_front_page(html_content):
+    """
+    解析 Hacker News 列表页（news / newest / best / ask / show），返回新闻列表。
+    每条新闻包含 id、rank、title、link、points、comments、age（如 "3 hours ago"）和 posted_at，
+    招聘类条目没有分数和评论数（为 None）。
+    """
+    parser = _FrontPageParser()
+    parser.feed(html_content)
+    parser.close()
+    return [story for story in parser.stories if story['title'] and story['link']]
@@ -0,0 +1,171 @@
+# src/http_cache.py
+
+import hashlib  # 导入hashlib用于生成缓存键
+import json  # 导入json模块用于读写缓存索引与响应体
+import os  # 导入os模块用于文件和目录操作
+import re  # 导入re模块识别缓存文件名
+import threading  # 导入threading模块保证多线程访问安全
+import time  # 导入time模块记录访问时间
+from collections import OrderedDict  # 使用有序字典维护 LRU 顺序
+from logger import LOG  # 导入日志模块
+
+
+class HttpCache:
+    """
+    条件请求缓存：按 URL + 查询参数保存 ETag / Last-Modified 与响应体，
+    下次请求时携带 If-None-Match / If-Modified-Since，服务端返回 304 时直接使用缓存内容。
+    缓存落盘保存，超过容量上限时按最近最少使用（LRU）淘汰。
+    响应体在锁外写入；索引只在淘汰条目或调用 flush() 时写回磁盘，抓取线程不会因为索引写入而串行。
+    进程在写回索引前退出时，启动时按磁盘上的响应体校正索引：删除索引之外的响应体（没有校验头，无法用于
+    条件请求）和残留的临时文件，丢弃响应体已不存在的条目，缓存总大小始终与磁盘一致。
+    """
+    INDEX_FILE = 'index.json'
+    # 缓存写入的文件：响应体、响应体临时文件和索引临时文件；校正索引时只清理这些文件
+    CACHE_FILE_PATTERN = re.compile(r'^([0-9a-f]{64})\.json(\.\d+\.tmp)?$|^index\.json\.tmp$')
+
+    def __init__(self, cache_dir='cache/github', max_size_mb=100):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0  # 304 命中缓存的次数
+        self.misses = 0  # 返回完整响应体的次数
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)  # 确保缓存目录存在
+        self._index = self._load_index()
+        self._total = sum(entry.get('size', 0) for entry in self._index.values())  # 缓存条目的总大小
+
+    @staticmethod
+    def make_key(url, params=None):
+        # 缓存键由 URL 与排序后的查询参数共同决定
+        payload = json.dumps([url, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, self.INDEX_FILE)
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        sizes = self._scan_bodies(entries)
+        entries = {key: dict(entry, size=sizes[key]) for key, entry in entries.items() if key in sizes}
+        # 按最近访问时间排序，最久未使用的在前
+        return OrderedDict(sorted(entries.items(), key=lambda item: item[1].get('last_access', 0)))
+
+    def _scan_bodies(self, entries):
+        # 返回索引中仍有响应体的条目大小，并清理未被索引记录的响应体和残留的临时文件
+        sizes, removed = {}, 0
+        for name in os.listdir(self.cache_dir):
+            match = self.CACHE_FILE_PATTERN.match(name)
+            if match is None:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            if match.group(1) in entries and not match.group(2):
+                sizes[match.group(1)] = os.path.getsize(path)
+            else:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        if removed or len(sizes) < len(entries):
+            LOG.info(f"HTTP 缓存索引校正：清理 {removed} 个文件，丢弃 {len(entries) - len(sizes)} 个失效条目")
+        return sizes
+
+    def _save_index(self):
+        tmp_path = self._index_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def conditional_headers(self, key):
+        """返回该缓存键对应的条件请求头，未缓存时返回空字典"""
+        with self._lock:
+            entry = self._index.get(key)
+            if not entry:
+                return {}
+            headers = {}
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+
+    def get(self, key):
+        """
+        读取缓存（服务端返回 304 时调用）。
+        :return: (body, next_url)；缓存已被淘汰时返回 None
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if not entry:
+                return None
+            try:
+                with open(self._body_path(key), 'r') as f:
+                    body = json.load(f)
+            except (OSError, ValueError):
+                self._index.pop(key, None)
+                self._total -= entry.get('size', 0)
+                return None
+            entry['last_access'] = time.time()
+            self._index.move_to_end(key)  # 标记为最近使用
+            self.hits += 1
+            return body, entry.get('next_url')
+
+    def put(self, key, body, etag=None, last_modified=None, next_url=None):
+        """保存完整响应；没有任何校验头的响应无法做条件请求，因此不缓存"""
+        with self._lock:
+            self.misses += 1
+        if not etag and not last_modified:
+            return
+        data = json.dumps(body)
+        tmp_path = f'{self._body_path(key)}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self._body_path(key))  # 原子替换，读取方不会看到写了一半的响应体
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous:
+                self._total -= previous.get('size', 0)
+            self._index[key] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'next_url': next_url,
+                'size': len(data),
+                'last_access': time.time(),
+            }
+            self._total += len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+                self._save_index()
+
+    def _evict(self):
+        # 超过容量上限时，从最久未使用的条目开始淘汰
+        while self._total > self.max_bytes and self._index:
+            key, entry = self._index.popitem(last=False)
+            self._total -= entry.get('size', 0)
+            try:
+                os.remove(self._body_path(key))
+            except OSError:
+                pass
+            LOG.debug(f"HTTP 缓存淘汰条目：{key}")
+
+    def flush(self):
+        """将内存中的访问顺序写回磁盘"""
+        with self._lock:
+            self._save_index()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._index),
+                'size_bytes': self._total,
+            }
@@ -0,0 +1,89 @@
+# src/http_session.py
+
+import threading  # 导入threading模块保证共享会话只初始化一次
+import requests  # 导入requests库用于HTTP请求
+from requests.adapters import HTTPAdapter  # 导入连接池适配器
+from urllib3.util.retry import Retry  # 导入重试策略
+
+DEFAULT_POOL_MAXSIZE = 10  # 每个主机默认保持的连接数
+DEFAULT_POOL_CONNECTIONS = 10  # 默认适配器缓存的主机连接池数量（预计访问的主机数）
+DEFAULT_MAX_RETRIES = 3  # 连接错误及 5xx 响应的默认重试次数
+DEFAULT_BACKOFF_FACTOR = 0.5  # 重试的指数退避系数
+# 由 RateLimiter 统一处理 403/429 与 Retry-After 的主机：适配器不在工作线程内自行等待重试
+RATE_LIMITED_HOSTS = ('api.github.com',)
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def _make_adapter(pool_maxsize, max_retries, backoff_factor, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                  respect_retry_after=True):
+    # 只对幂等请求自动重试；POST（如 LLM 生成）由调用方自行决定是否重试。
+    # respect_retry_after=False 时不按 Retry-After 在工作线程内等待，429 直接返回给调用方，由速率限制器暂停所有请求
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['HEAD', 'GET', 'OPTIONS']),
+        raise_on_status=False,
+        respect_retry_after_header=respect_retry_after,
+    )
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+
+def build_session(pool_maxsize=DEFAULT_POOL_MAXSIZE, max_retries=DEFAULT_MAX_RETRIES,
+                  backoff_factor=DEFAULT_BACKOFF_FACTOR, host_pool_sizes=None,
+                  pool_connections=DEFAULT_POOL_CONNECTIONS):
+    """
+    创建带连接池与重试策略的 requests.Session。
+    :param pool_maxsize: 每个主机默认的连接池大小
+    :param max_retries: 连接错误及 5xx 响应的重试次数
+    :param backoff_factor: 重试的指数退避系数
+    :param host_pool_sizes: 按主机单独设置的连接池大小，例如 {"api.github.com": 16}
+    :param pool_connections: 默认适配器缓存的主机连接池数量，小于实际访问的主机数时连接池会被反复丢弃重建
+    """
+    session = requests.Session()
+    default_adapter = _make_adapter(pool_maxsize, max_retries, backoff_factor, pool_connections)
+    session.mount('https://', default_adapter)
+    session.mount('http://', default_adapter)
+    host_pool_sizes = dict(host_pool_sizes or {})
+    for host in RATE_LIMITED_HOSTS:
+        host_pool_sizes.setdefault(host, pool_maxsize)
+    for host, size in host_pool_sizes.items():
+        # requests 按最长前缀匹配适配器，因此主机级配置会覆盖默认配置；
+        # 主机级适配器只服务一个主机的 http/https 两个连接池
+        host_adapter = _make_adapter(size, max_retries, backoff_factor, pool_connections=2,
+                                     respect_retry_after=host not in RATE_LIMITED_HOSTS)
+        session.mount(f'https://{host}', host_adapter)
+        session.mount(f'http://{host}', host_adapter)
+    return session
+
+
+def configure_shared_session(http_config=None):
+    """根据配置（config.json 中的 http 段）重建进程内共享的会话"""
+    global _shared_session
+    http_config = http_config or {}
+    session = build_session(
+        pool_maxsize=http_config.get('pool_maxsize', DEFAULT_POOL_MAXSIZE),
+        max_retries=http_config.get('max_retries', DEFAULT_MAX_RETRIES),
+        backoff_factor=http_config.get('backoff_factor', DEFAULT_BACKOFF_FACTOR),
+        host_pool_sizes=http_config.get('host_pool_sizes'),
+        pool_connections=http_config.get('pool_connections', DEFAULT_POOL_CONNECTIONS),
+    )
+    with _shared_lock:
+        if _shared_session is not None:
+            _shared_session.close()
+        _shared_session = session
+    return session
+
+
+def get_shared_session():
+    """获取进程内共享的会话，未配置时使用默认参数创建"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = build_session()
+        return _shared_session
+
+
+__all__ = ["build_session", "configure_shared_session", "get_shared_session"]
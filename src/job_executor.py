@@ -0,0 +1,94 @@
+# src/job_executor.py
+
+import threading  # 导入threading模块保护共享状态
+import time  # 导入time模块统计排队和执行耗时
+from concurrent.futures import ThreadPoolExecutor  # 导入线程池执行定时任务
+from logger import LOG  # 导入日志模块
+
+
+class JobExecutor:
+    """
+    定时任务执行器：schedule 只负责按时间触发，任务本身提交到线程池中执行，
+    耗时较长的 GitHub 任务不会阻塞 Hacker News 等高频任务。
+    - 同名任务不会重叠运行：上一次尚未结束时，本次触发直接跳过；
+    - 超过超时时间的任务会记录告警（线程无法被强制终止，只做报告）；
+    - 记录每个任务的排队等待、执行耗时、成功/失败/跳过/超时次数。
+    """
+
+    def __init__(self, max_workers=4, timeouts=None):
+        self.timeouts = timeouts or {}  # 任务名 -> 超时时间（秒）
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._running = {}  # 任务名 -> {'submitted_at', 'started_at', 'timed_out'}
+        self._metrics = {}
+
+    def _job_metrics(self, name):
+        return self._metrics.setdefault(name, {
+            'submitted': 0, 'succeeded': 0, 'failed': 0, 'skipped': 0, 'timeouts': 0,
+            'last_wait': 0.0, 'max_wait': 0.0, 'last_duration': 0.0, 'max_duration': 0.0,
+        })
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        提交一次任务运行，可直接作为 schedule 的任务函数：
+        schedule.every().day.do(executor.submit, 'github_job', github_job, ...)
+        同名任务仍在排队或运行时返回 None。
+        """
+        with self._lock:
+            metrics = self._job_metrics(name)
+            if name in self._running:
+                metrics['skipped'] += 1
+                LOG.warning(f"[任务调度]{name} 上一次运行尚未结束，跳过本次触发")
+                return None
+            metrics['submitted'] += 1
+            self._running[name] = {'submitted_at': time.monotonic(), 'started_at': None, 'timed_out': False}
+        return self._executor.submit(self._run, name, func, args, kwargs)
+
+    def _run(self, name, func, args, kwargs):
+        with self._lock:
+            state = self._running[name]
+            state['started_at'] = time.monotonic()
+            wait = state['started_at'] - state['submitted_at']
+            metrics = self._job_metrics(name)
+            metrics['last_wait'] = wait
+            metrics['max_wait'] = max(metrics['max_wait'], wait)
+        succeeded = False
+        try:
+            result = func(*args, **kwargs)
+            succeeded = True
+            return result
+        except Exception as e:
+            LOG.error(f"[任务调度]{name} 执行失败：{str(e)}")
+        finally:
+            with self._lock:
+                duration = time.monotonic() - self._running.pop(name)['started_at']
+                metrics['succeeded' if succeeded else 'failed'] += 1
+                metrics['last_duration'] = duration
+                metrics['max_duration'] = max(metrics['max_duration'], duration)
+            LOG.info(f"[任务调度]{name} 结束，排队 {wait:.1f}s，耗时 {duration:.1f}s")
+
+    def check_timeouts(self):
+        """检查运行中的任务是否超时，每次运行只告警一次；由主循环定期调用"""
+        now = time.monotonic()
+        with self._lock:
+            for name, state in self._running.items():
+                timeout = self.timeouts.get(name)
+                if not timeout or state['started_at'] is None or state['timed_out']:
+                    continue
+                if now - state['started_at'] > timeout:
+                    state['timed_out'] = True
+                    self._job_metrics(name)['timeouts'] += 1
+                    LOG.warning(f"[任务调度]{name} 已运行 {now - state['started_at']:.0f}s，超过超时时间 {timeout}s")
+
+    def stats(self):
+        """返回各任务的运行统计以及当前排队、运行中的任务"""
+        with self._lock:
+            return {
+                'jobs': {name: dict(metrics) for name, metrics in self._metrics.items()},
+                'running': [name for name, state in self._running.items() if state['started_at'] is not None],
+                'queued': [name for name, state in self._running.items() if state['started_at'] is None],
+            }
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """关闭线程池；cancel_futures=True 时取消尚未开始的任务"""
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
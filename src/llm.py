@@ -1,7 +1,7 @@
 import json
-import requests
 import time
 from openai import OpenAI
+from http_session import get_shared_session
 from logger import LOG
 
 class LLM:
@@ -26,9 +26,16 @@ class LLM:
        - For unsupported tasks: "[REJECTED] Out of scope"
     """
 
-    def __init__(self, config):
+    def __init__(self, config, session=None, cache=None):
         self.config = config
         self.model = config.llm_model_type.lower()
+        self.session = session or get_shared_session()  # 复用连接池的HTTP会话（Ollama）
+        self.cache = cache  # 可选的响应缓存（LLMCache），相同请求直接返回缓存结果
+        self.generation_params = {  # 生成参数（参与缓存键计算）
+            "temperature": 0.3,  # 降低随机性，输出更稳定
+            "top_p": 0.9,
+            "max_tokens": 2000
+        }
         
         # 初始化时注入增强版 System Prompt
         self.base_system_prompt = self.SECURITY_SYSTEM_PROMPT
@@ -37,11 +44,10 @@ class LLM:
             self.client = OpenAI(api_key=config.openai_api_key)  # 显式传递API密钥
         elif self.model == "ollama":
             self.api_url = config.ollama_api_url
-            self.default_ollama_params = {  # 默认参数配置
-                "temperature": 0.3,  # 降低随机性
-                "top_p": 0.9,
-                "max_tokens": 2000
-            }
+            # 默认参数配置；Ollama 的默认上下文窗口远小于报告生成器按 context_tokens 计算的输入预算，
+            # 通过 options.num_ctx 显式设置，否则超出部分会被服务端静默截断
+            self.default_ollama_params = {**self.generation_params,
+                                          "options": {"num_ctx": config.llm_context_tokens}}
         else:
             LOG.error(f"Unsupported model type: {self.model}")
             raise ValueError(f"Unsupported model type: {self.model}")
@@ -62,14 +68,25 @@ class LLM:
             {"role": "user", "content": user_content},
         ]
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(system_prompt, user_content)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                LOG.info("命中 LLM 响应缓存，跳过模型调用")
+                return cached
+
         # 带重试机制的生成流程
         max_retries = 3
         for attempt in range(max_retries):
             try:
                 if self.model == "openai":
-                    return self._generate_openai_report(messages)
+                    content = self._generate_openai_report(messages)
                 elif self.model == "ollama":
-                    return self._generate_ollama_report(messages)
+                    content = self._generate_ollama_report(messages)
+                if cache_key is not None:
+                    self.cache.put(cache_key, content)
+                return content
             except Exception as e:
                 if attempt == max_retries - 1:
                     LOG.error(f"Report generation failed after {max_retries} attempts: {str(e)}")
@@ -77,6 +94,64 @@ class LLM:
                 time.sleep(1 * (attempt + 1))  # 指数退避
                 continue
 
+    def generate_report_stream(self, user_content, custom_system_prompt=None):
+        """
+        流式生成报告，逐段产出模型输出的文本片段，首个片段到达即可展示。
+
+        :param user_content: 用户输入内容（Markdown/文本）
+        :param custom_system_prompt: 可选的自定义系统提示
+        :return: 文本片段生成器
+        """
+        system_prompt = self._build_system_prompt(custom_system_prompt)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ]
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(system_prompt, user_content)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                LOG.info("命中 LLM 响应缓存，跳过模型调用")
+                yield cached
+                return
+
+        # 尚未输出任何片段时失败可以重试；输出过程中失败则在末尾附上错误信息
+        max_retries = 3
+        for attempt in range(max_retries):
+            chunks = []
+            try:
+                stream = self._stream_openai_report(messages) if self.model == "openai" else self._stream_ollama_report(messages)
+                for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+                content = "".join(chunks)
+                self._validate_response(content)
+                if cache_key is not None:
+                    self.cache.put(cache_key, content)
+                return
+            except Exception as e:
+                if chunks:
+                    LOG.error(f"Report streaming interrupted: {str(e)}")
+                    yield f"\n\n[ERROR] Report generation interrupted: {str(e)}"
+                    return
+                if attempt == max_retries - 1:
+                    LOG.error(f"Report generation failed after {max_retries} attempts: {str(e)}")
+                    yield f"[ERROR] Report generation failed: {str(e)}"
+                    return
+                time.sleep(1 * (attempt + 1))  # 指数退避
+
+    def _model_name(self):
+        if self.model == "openai":
+            return self.config.openai_model_name
+        return self.config.ollama_model_name
+
+    def _cache_key(self, system_prompt, user_content):
+        # 缓存键覆盖模型、生成参数、系统提示和用户内容，任一变化都会重新生成
+        return self.cache.make_key(f"{self.model}:{self._model_name()}", self.generation_params,
+                                   system_prompt, user_content)
+
     def _build_system_prompt(self, custom_prompt=None):
         """构建最终系统提示"""
         if custom_prompt:
@@ -90,9 +165,7 @@ class LLM:
         response = self.client.chat.completions.create(
             model=self.config.openai_model_name,
             messages=messages,
-            temperature=0.3,  # 更稳定的输出
-            top_p=0.9,
-            max_tokens=2000
+            **self.generation_params  # 更稳定的输出
         )
         
         content = response.choices[0].message.content
@@ -106,10 +179,11 @@ class LLM:
         payload = {
             "model": self.config.ollama_model_name,
             "messages": messages,
+            "stream": False,  # Ollama 默认流式返回，这里需要一次性的完整响应
             **self.default_ollama_params  # 注入默认参数
         }
 
-        response = requests.post(
+        response = self.session.post(
             self.api_url,
             json=payload,
             timeout=30  # 增加超时限制
@@ -120,6 +194,43 @@ class LLM:
         self._validate_response(content)
         return content
 
+    def _stream_openai_report(self, messages):
+        """OpenAI 流式生成：逐个产出增量文本"""
+        LOG.info(f"Streaming report with OpenAI {self.config.openai_model_name}")
+
+        stream = self.client.chat.completions.create(
+            model=self.config.openai_model_name,
+            messages=messages,
+            stream=True,
+            **self.generation_params
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def _stream_ollama_report(self, messages):
+        """Ollama 流式生成：按行解析 NDJSON 响应"""
+        LOG.info(f"Streaming report with Ollama {self.config.ollama_model_name}")
+
+        payload = {
+            "model": self.config.ollama_model_name,
+            "messages": messages,
+            "stream": True,
+            **self.default_ollama_params
+        }
+        # 流式响应中 timeout 约束的是两次数据到达之间的间隔
+        with self.session.post(self.api_url, json=payload, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                content = data.get("message", {}).get("content", "")
+                if content:
+                    yield content
+                if data.get("done"):
+                    break
+
     def _validate_response(self, content):
         """响应内容基础验证"""
         if not content:
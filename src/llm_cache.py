@@ -0,0 +1,105 @@
+# src/llm_cache.py
+
+import hashlib  # 导入hashlib用于生成内容哈希
+import json  # 导入json模块用于读写缓存文件
+import os  # 导入os模块用于文件和目录操作
+import threading  # 导入threading模块保证多线程访问安全
+import time  # 导入time模块用于过期判断
+from collections import OrderedDict  # 使用有序字典维护 LRU 顺序
+from logger import LOG  # 导入日志模块
+
+
+class LLMCache:
+    """
+    LLM 响应缓存：以（模型、生成参数、系统提示、用户内容）的哈希为键落盘保存生成结果，
+    相同请求直接返回缓存内容。条目超过 TTL 即失效，总大小超过上限时按 LRU 淘汰。
+    """
+
+    def __init__(self, cache_dir='cache/llm', ttl_hours=168, max_size_mb=50):
+        self.cache_dir = cache_dir
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)  # 确保缓存目录存在
+        self._entries = self._scan()
+        self._total = sum(self._entries.values())  # 缓存条目的总大小，随写入和删除增量维护
+
+    @classmethod
+    def from_config(cls, cache_config):
+        """根据 config.json 中 llm.cache 配置创建缓存，未启用时返回 None"""
+        if not cache_config.get('enabled', True):
+            return None
+        return cls(cache_config.get('dir', 'cache/llm'),
+                   cache_config.get('ttl_hours', 168),
+                   cache_config.get('max_size_mb', 50))
+
+    @staticmethod
+    def make_key(model, params, system_prompt, user_content):
+        payload = json.dumps([model, params, system_prompt, user_content], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _scan(self):
+        # 启动时按最近访问时间（mtime）恢复 LRU 顺序
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+                entries.append((stat.st_mtime, filename[:-5], stat.st_size))
+        return OrderedDict((key, size) for _, key, size in sorted(entries))
+
+    def _remove(self, key):
+        self._total -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key):
+        """返回缓存的报告内容，未命中或已过期时返回 None"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is None or time.time() - entry['created_at'] > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+            os.utime(self._path(key))  # 以 mtime 记录最近访问时间
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['content']
+
+    def put(self, key, content):
+        data = json.dumps({'created_at': time.time(), 'content': content}, ensure_ascii=False)
+        with self._lock:
+            with open(self._path(key), 'w', encoding='utf-8') as f:
+                f.write(data)
+            size = len(data.encode('utf-8'))
+            self._total += size - self._entries.get(key, 0)  # 覆盖已有条目时只计算大小差
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                LOG.debug(f"LLM 缓存淘汰条目：{oldest}")
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+                'size_bytes': self._total,
+            }
@@ -0,0 +1,151 @@
+# src/notification_dispatcher.py
+
+import abc  # 导入abc模块定义通知渠道抽象基类
+import asyncio  # 导入asyncio实现多渠道并发发送
+import os  # 导入os模块用于文件和目录操作
+import re  # 导入re模块生成发件箱文件名
+import threading  # 导入threading模块保证统计数据的多线程访问安全
+import time  # 导入time模块统计发送延迟
+from datetime import datetime  # 导入datetime模块生成发件箱文件名
+from http_session import get_shared_session  # 导入共享的HTTP连接池会话
+from report_renderer import get_shared_renderer  # 导入共享的报告渲染器
+from logger import LOG  # 导入日志模块
+
+
+class NotificationSink(abc.ABC):
+    """
+    通知渠道基类：子类实现 send(subject, report, report_path)，失败时抛出异常，
+    由 NotificationDispatcher 负责重试与统计。
+    """
+    name = 'sink'
+
+    async def asend(self, subject, report, report_path=None):
+        # 默认在线程池中执行同步发送，事件循环上的其他渠道不会被阻塞
+        await asyncio.to_thread(self.send, subject, report, report_path)
+
+    @abc.abstractmethod
+    def send(self, subject, report, report_path=None):
+        """发送一份报告，失败时抛出异常"""
+
+
+class EmailSink(NotificationSink):
+    """通过 Notifier 的 SMTP 会话发送邮件（批量期间复用同一会话）"""
+    name = 'email'
+
+    def __init__(self, notifier):
+        self.notifier = notifier
+
+    def send(self, subject, report, report_path=None):
+        if not self.notifier.send_email(subject, report, report_path):
+            raise RuntimeError("邮件发送失败")
+
+
+class SlackWebhookSink(NotificationSink):
+    """通过 Slack Incoming Webhook 发送 mrkdwn 格式的报告"""
+    name = 'slack'
+    MAX_TEXT_LENGTH = 39000  # Slack 单条消息文本上限约 40000 字符
+
+    def __init__(self, webhook_url, session=None, renderer=None, timeout=10):
+        self.webhook_url = webhook_url
+        self.session = session or get_shared_session()  # 复用连接池的HTTP会话
+        self.renderer = renderer or get_shared_renderer()
+        self.timeout = timeout
+
+    def send(self, subject, report, report_path=None):
+        text = f"*{subject}*\n\n{self.renderer.render(report, report_path)['slack']}"
+        if len(text) > self.MAX_TEXT_LENGTH:
+            text = text[:self.MAX_TEXT_LENGTH] + "\n…（内容过长已截断）"
+        response = self.session.post(self.webhook_url, json={'text': text}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class FileOutboxSink(NotificationSink):
+    """将报告写入本地发件箱目录，供其他系统读取；先写临时文件再重命名，读取方不会看到写了一半的文件"""
+    name = 'outbox'
+
+    def __init__(self, directory='outbox'):
+        self.directory = directory
+
+    def send(self, subject, report, report_path=None):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^\w.-]+', '_', subject).strip('_')
+        file_path = os.path.join(self.directory, f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}_{slug}.md")
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f"<!-- subject: {subject} -->\n{report}")
+        os.replace(tmp_path, file_path)
+
+
+class NotificationDispatcher:
+    """
+    异步通知分发器：每份报告并发发送到所有渠道，单个渠道失败按指数退避重试，
+    不影响其他渠道；按渠道统计发送成功、失败、重试次数和发送延迟（含重试）。
+    """
+
+    def __init__(self, sinks, max_retries=3, backoff=1.0):
+        self.sinks = list(sinks)
+        self.max_retries = max_retries  # 每个渠道首次发送失败后的最多重试次数
+        self.backoff = backoff  # 重试等待的基数（秒），第 n 次重试等待 backoff * 2^(n-1)
+        self._lock = threading.Lock()
+        self._stats = {sink.name: {'sent': 0, 'failed': 0, 'retries': 0, 'latency_total': 0.0, 'latency_max': 0.0}
+                       for sink in self.sinks}
+
+    def dispatch(self, subject, report, report_path=None, skip=()):
+        """同步接口：发送到 skip 以外的所有渠道，返回 {渠道名: 是否成功}（不含跳过的渠道）"""
+        return asyncio.run(self.adispatch(subject, report, report_path, skip))
+
+    async def adispatch(self, subject, report, report_path=None, skip=()):
+        # skip 为已经发送成功的渠道，重新通知时不再重复发送
+        sinks = [sink for sink in self.sinks if sink.name not in skip]
+        results = await asyncio.gather(*(self._send(sink, subject, report, report_path) for sink in sinks))
+        return {sink.name: ok for sink, ok in zip(sinks, results)}
+
+    async def _send(self, sink, subject, report, report_path):
+        start = time.monotonic()
+        for attempt in range(self.max_retries + 1):
+            try:
+                await sink.asend(subject, report, report_path)
+                self._record(sink.name, 'sent', attempt, time.monotonic() - start)
+                LOG.info(f"[{sink.name}]通知发送成功：{subject}")
+                return True
+            except Exception as e:
+                if attempt < self.max_retries:
+                    LOG.warning(f"[{sink.name}]通知发送失败，第 {attempt + 1} 次重试：{str(e)}")
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+                else:
+                    LOG.error(f"[{sink.name}]通知发送失败：{str(e)}")
+        self._record(sink.name, 'failed', self.max_retries, time.monotonic() - start)
+        return False
+
+    def _record(self, name, outcome, retries, latency):
+        with self._lock:
+            stats = self._stats[name]
+            stats[outcome] += 1
+            stats['retries'] += retries
+            stats['latency_total'] += latency
+            stats['latency_max'] = max(stats['latency_max'], latency)
+
+    def stats(self):
+        """按渠道返回发送统计，延迟单位为秒"""
+        with self._lock:
+            result = {}
+            for name, stats in self._stats.items():
+                count = stats['sent'] + stats['failed']
+                result[name] = {
+                    'sent': stats['sent'], 'failed': stats['failed'], 'retries': stats['retries'],
+                    'latency_avg': round(stats['latency_total'] / count, 3) if count else 0.0,
+                    'latency_max': round(stats['latency_max'], 3),
+                }
+            return result
+
+
+def build_sinks(slack_webhook_url=None, notification_config=None):
+    """根据配置创建邮件以外的通知渠道（Slack Webhook、本地发件箱）"""
+    notification_config = notification_config or {}
+    sinks = []
+    if slack_webhook_url and slack_webhook_url.startswith('http'):
+        sinks.append(SlackWebhookSink(slack_webhook_url))
+    outbox = notification_config.get('outbox', {})
+    if outbox.get('enabled', False):
+        sinks.append(FileOutboxSink(outbox.get('dir', 'outbox')))
+    return sinks
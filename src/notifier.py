@@ -1,56 +1,223 @@
+import queue
 import smtplib
-import markdown2
+import threading
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from logger import LOG
+from report_renderer import get_shared_renderer
+from notification_dispatcher import NotificationDispatcher, EmailSink, build_sinks
 
 class Notifier:
-    def __init__(self, email_settings):
+    def __init__(self, email_settings, renderer=None, sinks=None, max_retries=3, backoff=1.0):
         self.email_settings = email_settings
+        self.renderer = renderer or get_shared_renderer()  # 报告渲染缓存，同一报告只转换一次
+        # 配置了其他渠道（Slack、发件箱）时，每份报告经分发器并发发送到邮件及这些渠道
+        self.dispatcher = None
+        if sinks:
+            channels = ([EmailSink(self)] if email_settings else []) + list(sinks)
+            self.dispatcher = NotificationDispatcher(channels, max_retries, backoff)
+        self.digest = bool(email_settings and email_settings.get('digest', False))  # 一次运行的 GitHub 报告合并为一封邮件
+        self.background = bool(email_settings and email_settings.get('background', False))  # 在后台线程中发送邮件
+        self._smtp_lock = threading.Lock()  # SMTP 会话同一时间只能进行一次对话
+        self._worker_lock = threading.Lock()
+        self._state_lock = threading.Lock()  # 保护批量深度和摘要条目，多个任务可能在执行器的不同线程中同时通知
+        self._server = None  # 批量发送期间复用的已登录 SMTP 会话
+        self._batch_depth = 0
+        self._digest_items = []  # 摘要模式下暂存的 (repo, report, callback, delivered)
+        self._queue = None
+        self._worker = None
+
+    @classmethod
+    def from_config(cls, config):
+        """根据配置创建通知器：邮件，以及 Slack Webhook、本地发件箱等其他渠道"""
+        notification = getattr(config, 'notification', {})
+        return cls(config.email, sinks=build_sinks(config.slack_webhook_url, notification),
+                   max_retries=notification.get('max_retries', 3),
+                   backoff=notification.get('backoff_seconds', 1.0))
     
-    def notify_github_report(self, repo, report):
+    def notify_github_report(self, repo, report, callback=None, report_path=None, delivered=None):
         """
         发送 GitHub 项目报告邮件
         :param repo: 仓库名称
         :param report: 报告内容
+        :param callback: 可选，发送完成后以是否成功为参数调用（摘要/后台模式下发送会延后）
+        :param report_path: 可选，报告文件路径，渲染结果缓存在报告旁
+        :param delivered: 可选，已发送成功的渠道名列表；这些渠道不再重复发送，本次发送成功的渠道追加到列表中
+        :return: 是否发送成功；延后发送时返回 True 表示已受理
         """
-        if self.email_settings:
-            subject = f"[GitHub] {repo} 进展简报"
-            self.send_email(subject, report)
-        else:
+        if not self.email_settings and self.dispatcher is None:
             LOG.warning("邮件设置未配置正确，无法发送 GitHub 报告通知")
+            return self._done(callback, False)
+        if self._add_digest_item(repo, report, callback, delivered):
+            return True
+        subject = f"[GitHub] {repo} 进展简报"
+        return self._deliver(subject, report, callback, report_path, delivered)
     
-    def notify_hn_report(self, date, report):
+    def notify_no_activity(self, repo, report, callback=None, delivered=None):
+        """
+        没有新活动的仓库：摘要模式下以模板条目加入本次运行的摘要邮件，返回 True；
+        其他模式下不单独发送通知，返回 False。
+        """
+        return self._add_digest_item(repo, report, callback, delivered)
+
+    def _add_digest_item(self, repo, report, callback, delivered):
+        # 摘要模式且处于批量发送期间时暂存报告，返回是否已暂存
+        with self._state_lock:
+            if not (self.digest and self._batch_depth):
+                return False
+            self._digest_items.append((repo, report, callback, delivered))
+            return True
+
+    def notify_hn_report(self, date, report, callback=None, report_path=None):
         """
         发送 Hacker News 每日技术趋势报告邮件
         :param date: 报告日期
         :param report: 报告内容
+        :param callback: 可选，发送完成后以是否成功为参数调用
+        :param report_path: 可选，报告文件路径，渲染结果缓存在报告旁
+        :return: 是否发送成功；后台模式下返回 True 表示已受理
         """
-        if self.email_settings:
-            subject = f"[HackerNews] {date} 技术趋势"
-            self.send_email(subject, report)
-        else:
+        if not self.email_settings and self.dispatcher is None:
             LOG.warning("邮件设置未配置正确，无法发送 Hacker News 报告通知")
+            return self._done(callback, False)
+        subject = f"[HackerNews] {date} 技术趋势"
+        return self._deliver(subject, report, callback, report_path)
+
+    @staticmethod
+    def _done(callback, ok):
+        if callback is not None:
+            callback(ok)
+        return ok
+
+    def _deliver(self, subject, report, callback, report_path=None, delivered=None):
+        if self.background:
+            self._ensure_worker()
+            self._queue.put((subject, report, callback, report_path, delivered))
+            return True
+        return self._done(callback, self._send(subject, report, report_path, delivered))
+
+    def _send(self, subject, report, report_path=None, delivered=None):
+        # 所有渠道都发送成功才算完成，否则由调用方（任务队列）在恢复时重新通知；
+        # 重新通知时跳过 delivered 中已发送成功的渠道，避免 Slack、发件箱收到重复的报告
+        if self.dispatcher is None:
+            return self.send_email(subject, report, report_path)
+        results = self.dispatcher.dispatch(subject, report, report_path, skip=set(delivered or ()))
+        if delivered is not None:
+            delivered.extend(name for name, ok in results.items() if ok)
+        return all(results.values())
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._queue = self._queue or queue.Queue()
+                self._worker = threading.Thread(target=self._drain, name='notifier', daemon=True)
+                self._worker.start()
+
+    def _drain(self):
+        # 后台线程：依次发送队列中的邮件，任务循环不会因为发送邮件而阻塞
+        while True:
+            subject, report, callback, report_path, delivered = self._queue.get()
+            try:
+                self._done(callback, self._send(subject, report, report_path, delivered))
+            except Exception as e:
+                LOG.error(f"邮件发送回调执行失败：{str(e)}")
+            finally:
+                self._queue.task_done()
+
+    @contextmanager
+    def batch(self):
+        """
+        批量发送：期间复用同一个已登录的 SMTP 会话（断开时自动重连）；
+        摘要模式下把期间的 GitHub 报告合并为一封邮件，在退出时发送。
+        退出时会等待后台队列中的邮件发送完毕，再关闭 SMTP 会话。
+        多个线程同时批量发送时共享一个批次，最后一个退出的线程发送摘要并关闭会话。
+        """
+        with self._state_lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._state_lock:
+                self._batch_depth -= 1
+                last = self._batch_depth == 0
+                if last:
+                    items, self._digest_items = self._digest_items, []
+            if last:
+                self._send_digest(items)
+                if self._queue is not None:
+                    self._queue.join()
+                self._close()
+                if self.dispatcher is not None:
+                    LOG.info(f"通知渠道统计：{self.dispatcher.stats()}")
+
+    def _send_digest(self, items):
+        # 按已发送成功的渠道分组：重新通知的仓库只向上次失败的渠道发送，其他渠道不会收到重复内容
+        groups = {}
+        for item in items:
+            groups.setdefault(frozenset(item[3] or ()), []).append(item)
+        for skip, group in groups.items():
+            subject = f"[GitHub] 订阅仓库进展简报（{len(group)} 个仓库）"
+            report = "".join(f"# {repo}\n\n{report}\n\n---\n\n" for repo, report, _, _ in group)
+            delivered = list(skip)
+
+            def on_done(ok, group=group, delivered=delivered):
+                for _, _, callback, item_delivered in group:
+                    if item_delivered is not None:
+                        item_delivered.extend(name for name in delivered if name not in item_delivered)
+                    self._done(callback, ok)
+            self._deliver(subject, report, on_done, delivered=delivered)
+
+    def _connect(self):
+        server = smtplib.SMTP_SSL(self.email_settings['smtp_server'], self.email_settings['smtp_port'])
+        LOG.debug("登录SMTP服务器")
+        server.login(self.email_settings['from'], self.email_settings['password'])
+        return server
+
+    def _close(self):
+        with self._smtp_lock:
+            self._quit()
+
+    def _quit(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
     
-    def send_email(self, subject, report):
+    def send_email(self, subject, report, report_path=None):
         LOG.info(f"准备发送邮件:{subject}")
-        msg = MIMEMultipart()
+        msg = MIMEMultipart('alternative')
         msg['From'] = self.email_settings['from']
         msg['To'] = self.email_settings['to']
         msg['Subject'] = subject
         
-        # 将Markdown内容转换为HTML
-        html_report = markdown2.markdown(report)
-
-        msg.attach(MIMEText(html_report, 'html'))
-        try:
-            with smtplib.SMTP_SSL(self.email_settings['smtp_server'], self.email_settings['smtp_port']) as server:
-                LOG.debug("登录SMTP服务器")
-                server.login(msg['From'], self.email_settings['password'])
-                server.sendmail(msg['From'], msg['To'], msg.as_string())
-                LOG.info("邮件发送成功！")
-        except Exception as e:
-            LOG.error(f"发送邮件失败：{str(e)}")
+        # 纯文本在前、内联样式的HTML在后，邮件客户端优先显示最后一个可支持的部分
+        rendered = self.renderer.render(report, report_path)
+        msg.attach(MIMEText(rendered['text'], 'plain', 'utf-8'))
+        msg.attach(MIMEText(rendered['email_html'], 'html', 'utf-8'))
+        with self._smtp_lock:
+            # 批量发送期间复用已登录的会话；会话失效时重新连接并重试一次
+            ok = False
+            for attempt in range(2):
+                try:
+                    if self._server is None:
+                        self._server = self._connect()
+                    self._server.sendmail(msg['From'], msg['To'], msg.as_string())
+                    LOG.info("邮件发送成功！")
+                    ok = True
+                    break
+                except Exception as e:
+                    self._server = None
+                    if attempt == 0 and self._batch_depth:
+                        LOG.warning(f"SMTP 会话失效，重新连接：{str(e)}")
+                        continue
+                    LOG.error(f"发送邮件失败：{str(e)}")
+                    break
+            if not self._batch_depth:
+                self._quit()
+        return ok
 
 if __name__ == '__main__':
     from config import Config
@@ -0,0 +1,154 @@
+# src/rate_limiter.py
+
+import heapq  # 导入heapq实现按优先级排队
+import itertools  # 导入itertools生成排队序号
+import threading  # 导入threading模块实现线程间同步
+import time  # 导入time模块用于计时
+from datetime import timezone  # 导入timezone处理不带时区的日期
+from email.utils import parsedate_to_datetime  # 导入HTTP日期解析函数
+from contextlib import contextmanager  # 导入contextmanager用于设置请求优先级
+from logger import LOG  # 导入日志模块
+
+
+class RateLimiter:
+    """
+    基于令牌桶的 GitHub 请求调度器。
+    - 根据响应头 X-RateLimit-Remaining / X-RateLimit-Reset 跟踪剩余额度，
+      以「剩余额度 / 距重置时间」的速率补充令牌，把请求均匀分摊到整个重置窗口；
+    - 遇到主/次级速率限制（403/429、Retry-After）时暂停全部请求，到期后自动恢复；
+    - 等待中的请求按优先级（数值越大越优先）依次放行。
+    """
+    DEFAULT_SECONDARY_WAIT = 60  # 次级速率限制未给出 Retry-After 时的默认等待秒数
+
+    def __init__(self, limit=5000, window=3600, burst=500):
+        now = time.time()
+        self.limit = limit  # 每个窗口的请求额度
+        self.window = window  # 窗口长度（秒）
+        self.burst = burst  # 令牌桶容量，允许的突发请求数
+        self.remaining = limit  # 当前窗口剩余额度
+        self.reset_at = now + window  # 额度重置时间（epoch 秒）
+        self.tokens = float(min(burst, limit))
+        self.paused_until = 0.0
+        self._last_refill = now
+        self._cond = threading.Condition()
+        self._waiters = []  # (-priority, seq) 小顶堆
+        self._seq = itertools.count()
+        self._local = threading.local()
+
+    @contextmanager
+    def priority(self, value):
+        """在当前线程内以指定优先级发起请求"""
+        previous = getattr(self._local, 'priority', 0)
+        self._local.priority = value
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def _refill(self, now):
+        if now >= self.reset_at:
+            # 窗口已重置，在收到新的响应头之前假定额度已恢复
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+        rate = self.remaining / max(self.reset_at - now, 1.0)  # 可持续的请求速率（次/秒）
+        self.tokens = min(self.tokens + (now - self._last_refill) * rate, self.burst, self.remaining)
+        self._last_refill = now
+        return rate
+
+    def _wait_time(self, now):
+        # 返回当前请求还需等待的秒数，0 表示可以立即发出
+        if now < self.paused_until:
+            return self.paused_until - now
+        rate = self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        if self.remaining <= 0 or rate <= 0:
+            return max(self.reset_at - now, 0.01)
+        return (1 - self.tokens) / rate
+
+    def acquire(self):
+        """阻塞直到可以发出下一次请求"""
+        ticket = (-getattr(self._local, 'priority', 0), next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    if self._waiters[0] == ticket:
+                        wait = self._wait_time(time.time())
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None  # 等待更高优先级的请求先被放行
+                    self._cond.wait(timeout=wait)
+                self.tokens -= 1
+                self.remaining -= 1
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def update(self, headers):
+        """根据响应头同步剩余额度与重置时间"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        limit = headers.get('X-RateLimit-Limit')
+        if remaining is None or reset is None:
+            return
+        with self._cond:
+            if limit is not None:
+                self.limit = int(limit)
+            self.remaining = int(remaining)
+            self.reset_at = float(reset)
+            self.tokens = min(self.tokens, self.remaining)
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """暂停所有请求 seconds 秒，到期后自动恢复"""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+            self._cond.notify_all()
+        LOG.warning(f"触发 GitHub 速率限制，暂停请求 {seconds:.0f}s")
+
+    def retry_delay(self, response):
+        """
+        判断响应是否被速率限制拒绝。
+        :return: 需要等待的秒数；未被限制时返回 None
+        """
+        if response.status_code not in (403, 429):
+            return None
+        retry_after = self.parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            return retry_after
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            reset = float(response.headers.get('X-RateLimit-Reset', time.time() + self.window))
+            return max(reset - time.time(), 0) + 1
+        if response.status_code == 429 or 'rate limit' in response.text.lower():
+            return self.DEFAULT_SECONDARY_WAIT
+        return None  # 其他 403（如权限不足）交由调用方处理
+
+    @staticmethod
+    def parse_retry_after(value):
+        """解析 Retry-After：秒数或 HTTP 日期（如 "Wed, 21 Oct 2015 07:28:00 GMT"），无法解析时返回 None"""
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            LOG.warning(f"无法解析 Retry-After：{value}")
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(when.timestamp() - time.time(), 0.0)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'remaining': self.remaining,
+                'reset_at': self.reset_at,
+                'waiting': len(self._waiters),
+                'paused': time.time() < self.paused_until,
+            }
@@ -0,0 +1,182 @@
+# src/repo_scheduler.py
+
+import math  # 导入math模块计算抓取窗口天数
+import zlib  # 导入zlib计算稳定的仓库哈希，用于错开运行时间
+from datetime import datetime, timedelta, timezone  # 导入日期处理模块
+from logger import LOG  # 导入日志模块
+
+# 活跃度分级：按最近每天的事件数（commits / issues / pull requests）从高到低匹配
+DEFAULT_TIERS = [
+    {'name': 'hot', 'min_events_per_day': 5, 'interval_hours': 6},
+    {'name': 'active', 'min_events_per_day': 1, 'interval_hours': 24},
+    {'name': 'quiet', 'min_events_per_day': 0.1, 'interval_hours': 72},
+    {'name': 'dormant', 'min_events_per_day': 0, 'interval_hours': 168},
+]
+
+
+def _local_time(value):
+    # 事件时间为 UTC（带 Z 后缀），调度时间为本地时间；统一转换为不带时区的本地时间
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return moment.astimezone().replace(tzinfo=None) if moment.tzinfo else moment
+
+
+class RepoScheduler:
+    """
+    按仓库活跃度安排抓取：根据本地事件库中最近 window_days 天的事件数把仓库分为不同档位，
+    活跃仓库抓取得更频繁，沉寂仓库很少抓取。观察时间不足 window_days 的仓库按实际观察天数计算。
+    每次运行从仓库的上次运行时间开始抓取，运行间隔短于一天的仓库不会重复抓取和报告已发送过的内容。每个仓库的档位、上次和下次运行时间保存在事件库的
+    repo_schedules 表中（没有事件库时只保存在内存中），订阅文件只由用户编辑，调度器只读取其中的
+    priority 和 frequency_days。
+    - 订阅设置了 frequency_days 时以其为准；
+    - 没有事件库或尚无数据时使用默认间隔 default_frequency_days；
+    - 下次运行时间按仓库哈希在间隔的 ±jitter 范围内错开，并且每次最多处理 max_repos_per_run 个仓库，
+      避免所有仓库集中在同一时刻运行。
+    """
+
+    def __init__(self, subscription_manager, event_store=None, tiers=None, default_frequency_days=1,
+                 window_days=14, max_repos_per_run=50, jitter=0.1):
+        self.subscription_manager = subscription_manager
+        self.event_store = event_store
+        self.tiers = sorted(tiers or DEFAULT_TIERS, key=lambda tier: -tier['min_events_per_day'])
+        self.default_frequency_days = default_frequency_days
+        self.window_days = window_days  # 统计活跃度的时间窗口
+        self.max_repos_per_run = max_repos_per_run
+        self.jitter = jitter
+        self._schedules = {}  # 没有事件库时的调度状态
+
+    @classmethod
+    def from_config(cls, subscription_manager, event_store, config):
+        """根据 config.json 中 scheduler 配置和 github.progress_frequency_days 创建调度器"""
+        scheduler_config = config.scheduler
+        return cls(subscription_manager, event_store,
+                   tiers=scheduler_config.get('tiers'),
+                   default_frequency_days=config.freq_days,
+                   window_days=scheduler_config.get('activity_window_days', 14),
+                   max_repos_per_run=scheduler_config.get('max_repos_per_run', 50))
+
+    def events_per_day(self, now=None, tracked_since=None):
+        """
+        返回 {仓库: 最近每天事件数}；没有事件库时返回 None。
+        事件数除以观察天数：min(window_days, 观察时长)，至少 1 天。观察起点取首次抓取窗口的起点
+        （tracked_since 为 {仓库: 起点}，默认读取调度状态）和库中最早的事件时间中较早者，
+        刚订阅的仓库不会因为只抓取了一天的数据而被低估为沉寂仓库。
+        """
+        if self.event_store is None:
+            return None
+        now = now or datetime.now()
+        since = (now - timedelta(days=self.window_days)).date().isoformat()
+        counts = self.event_store.activity_counts(since)
+        if tracked_since is None:
+            tracked_since = {repo: schedule.get('tracked_since') for repo, schedule in self.schedules().items()}
+        first_events = self.event_store.first_event_times()
+        rates = {}
+        for repo, count in counts.items():
+            starts = [_local_time(value) for value in (tracked_since.get(repo), first_events.get(repo)) if value]
+            observed = (now - min(starts)).total_seconds() / 86400 if starts else self.window_days
+            rates[repo] = count / min(self.window_days, max(observed, 1))
+        return rates
+
+    def schedules(self):
+        """返回 {仓库: {tier, interval_hours, last_run, next_run, tracked_since}}"""
+        if self.event_store is None:
+            return {repo: dict(schedule) for repo, schedule in self._schedules.items()}
+        return self.event_store.repo_schedules()
+
+    def tier_for(self, events_per_day):
+        """返回活跃度对应的档位名和间隔（小时）"""
+        for tier in self.tiers:
+            if events_per_day >= tier['min_events_per_day']:
+                return tier['name'], tier['interval_hours']
+        return self.tiers[-1]['name'], self.tiers[-1]['interval_hours']
+
+    def _interval_hours(self, repo, metadata, activity):
+        if metadata.get('frequency_days'):
+            return 'fixed', metadata['frequency_days'] * 24
+        if activity is None:
+            return 'default', self.default_frequency_days * 24
+        # 事件库中没有记录的仓库视为没有活动
+        return self.tier_for(activity.get(repo, 0))
+
+    def _spread(self, repo, hours):
+        # 按仓库哈希得到 [-jitter, jitter) 内固定的比例，同档位的仓库逐渐错开
+        fraction = (zlib.crc32(repo.encode('utf-8')) % 1000) / 1000
+        return hours * (1 + self.jitter * (2 * fraction - 1))
+
+    def due(self, now=None, exclude=()):
+        """
+        返回到期的仓库：从未运行或已到下次运行时间，不含 exclude 中的仓库（如仍在未完成运行中的仓库）。
+        按优先级从高到低、同优先级按到期时间从早到晚排序，最多 max_repos_per_run 个。
+        """
+        now = (now or datetime.now()).isoformat(timespec='seconds')
+        self.subscription_manager.reload()  # 读取命令行或界面中新增、修改的订阅
+        schedules = self.schedules()
+        due = []
+        for position, repo in enumerate(self.subscription_manager.list_subscriptions()):
+            metadata = self.subscription_manager.get_subscription(repo)
+            next_run = (schedules.get(repo) or {}).get('next_run') or ''
+            if next_run <= now and repo not in exclude:
+                due.append((-metadata.get('priority', 0), next_run, position, repo))
+        due.sort()
+        return [repo for *_, repo in due[:self.max_repos_per_run]]
+
+    def priorities(self, repos):
+        """返回 {仓库: 订阅优先级}，供抓取引擎和速率限制器优先处理重要仓库"""
+        return {repo: (self.subscription_manager.get_subscription(repo) or {}).get('priority', 0) for repo in repos}
+
+    def window_since(self, repos, schedules=None):
+        """
+        返回 {仓库: 本次抓取起点}：仓库的上次运行时间（UTC，与 GitHub 接口的时间格式一致）。
+        从未运行过的仓库不包含在内，按 window_days_for 的整天窗口抓取。
+        """
+        schedules = self.schedules() if schedules is None else schedules
+        since = {}
+        for repo in repos:
+            last_run = (schedules.get(repo) or {}).get('last_run')
+            if last_run:
+                since[repo] = datetime.fromisoformat(last_run).astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        return since
+
+    def window_days_for(self, repo, schedules=None):
+        """仓库本次抓取的天数：覆盖一个运行间隔，至少 1 天"""
+        schedule = (self.schedules() if schedules is None else schedules).get(repo) or {}
+        hours = schedule.get('interval_hours') or self.default_frequency_days * 24
+        return max(1, math.ceil(hours / 24))
+
+    def group_by_window(self, repos):
+        """按抓取天数分组，返回 {天数: [仓库]}，每组可作为一次运行"""
+        schedules = self.schedules()
+        groups = {}
+        for repo in repos:
+            groups.setdefault(self.window_days_for(repo, schedules), []).append(repo)
+        return groups
+
+    def reschedule(self, repos, now=None):
+        """
+        记录仓库本次运行，根据最新活跃度重新计算档位和下次运行时间，一次写入事件库。
+        now 为本次运行开始抓取的时间，下次运行从这里开始抓取，运行期间发生的更新不会被遗漏。
+        """
+        now = now or datetime.now()
+        previous = self.schedules()
+        tracked_since = {repo: schedule.get('tracked_since') for repo, schedule in previous.items()}
+        for repo in repos:
+            if not tracked_since.get(repo):
+                # 首次运行抓取的是 window_days_for 天的整天窗口，以窗口起点作为观察起点
+                start = now - timedelta(days=self.window_days_for(repo, previous))
+                tracked_since[repo] = start.isoformat(timespec='seconds')
+        activity = self.events_per_day(now, tracked_since)
+        self.subscription_manager.reload()
+        schedules = {}
+        for repo in repos:
+            metadata = self.subscription_manager.get_subscription(repo)
+            if metadata is None:
+                continue
+            tier, hours = self._interval_hours(repo, metadata, activity)
+            next_run = now + timedelta(hours=self._spread(repo, hours))
+            schedules[repo] = {'tier': tier, 'interval_hours': hours, 'last_run': now.isoformat(timespec='seconds'),
+                               'next_run': next_run.isoformat(timespec='seconds'),
+                               'tracked_since': tracked_since[repo]}
+            LOG.debug(f"[{repo}]活跃度档位 {tier}，下次运行时间 {next_run:%Y-%m-%d %H:%M}")
+        if self.event_store is None:
+            self._schedules.update(schedules)
+        elif schedules:
+            self.event_store.save_repo_schedules(schedules)
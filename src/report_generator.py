@@ -1,10 +1,24 @@
+import asyncio
+import inspect
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from logger import LOG  # 导入日志模块
+from token_budget import count_tokens, split_into_chunks  # 导入 token 估算与分块工具
 
 class ReportGenerator:
-    def __init__(self, llm, report_types):
+    MERGE_INSTRUCTION = "以下是同一份数据分段生成的 {count} 份报告，请合并、去重，整理为一份完整的报告：\n\n"
+    MAX_REDUCE_ROUNDS = 3  # 合并后仍超出预算时最多再分段摘要的轮数
+    DIGEST_FILENAME = "daily_digest.md"  # 每日滚动摘要文件，与小时话题报告放在同一目录
+    DIGEST_HEADER = re.compile(r"<!-- merged_hours: ([\d,]*) -->\n")  # 记录已合并的小时，避免重复合并
+    NO_ACTIVITY_TEMPLATE = "# {repo} 项目进展\n\n最近 {days} 天内没有新的提交、Issue 或 Pull Request。\n"  # 无活动仓库的模板报告
+
+    def __init__(self, llm, report_types, event_store=None, max_concurrency=4, context_tokens=8192):
         self.llm = llm  # 初始化时接受一个LLM实例，用于后续生成报告
         self.report_types = report_types
+        self.event_store = event_store  # 可选的本地事件库，用于保存和聚合热点话题报告
+        self.max_concurrency = max_concurrency  # 批量生成报告时同时进行的模型调用数
+        self.context_tokens = context_tokens  # 模型上下文窗口大小（token）
         self.prompts = {}  # 存储所有预加载的提示信息
         self._preload_prompts()
 
@@ -20,6 +34,56 @@ class ReportGenerator:
             with open(prompt_file, "r", encoding='utf-8') as file:
                 self.prompts[report_type] = file.read()
 
+    def _input_budget(self, system_prompt):
+        """
+        单次请求中用户内容可用的 token 数：上下文窗口减去输出上限、系统提示和 10% 的估算余量。
+        """
+        params = getattr(self.llm, 'generation_params', None)
+        max_output = params.get('max_tokens', 2000) if isinstance(params, dict) else 2000
+        base_prompt = getattr(self.llm, 'base_system_prompt', '')
+        overhead = count_tokens(system_prompt) + (count_tokens(base_prompt) if isinstance(base_prompt, str) else 0)
+        return max(int((self.context_tokens - max_output - overhead) * 0.9), 256)
+
+    def _map_inputs(self, content, budget):
+        # 把超出预算的输入切分为多段，每段加上序号后单独生成摘要
+        chunks = split_into_chunks(content, budget - count_tokens(self.MERGE_INSTRUCTION) - 16)
+        LOG.info(f"输入超出 token 预算（{budget}），分为 {len(chunks)} 段并行摘要")
+        return [f"（第 {i}/{len(chunks)} 部分）\n{chunk}" for i, chunk in enumerate(chunks, start=1)]
+
+    def _reduce_input(self, partials):
+        # 丢弃生成失败的分段摘要，其余拼成合并输入；全部失败时返回 None
+        summaries = [partial for partial in partials if not partial.startswith("[ERROR]")]
+        if len(summaries) < len(partials):
+            LOG.warning(f"{len(partials) - len(summaries)}/{len(partials)} 段摘要生成失败，已从合并输入中剔除")
+        if not summaries:
+            return None
+        return self.MERGE_INSTRUCTION.format(count=len(summaries)) + "\n\n".join(summaries)
+
+    @staticmethod
+    def _truncate(content, budget):
+        if count_tokens(content) > budget:
+            LOG.warning(f"分段摘要后输入仍超出 token 预算，截断至 {budget} token")
+            content = split_into_chunks(content, budget)[0]
+        return content
+
+    def _fit_to_budget(self, system_prompt, content):
+        """
+        输入超出预算时先分块并行生成摘要（map），再把摘要拼成合并输入（reduce），
+        直到可以一次发送给模型。输入未超出预算时原样返回；分段摘要全部失败时截断输入。
+        """
+        budget = self._input_budget(system_prompt)
+        for _ in range(self.MAX_REDUCE_ROUNDS):
+            if count_tokens(content) <= budget:
+                return content
+            parts = self._map_inputs(content, budget)
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(parts))) as executor:
+                partials = list(executor.map(lambda part: self.llm.generate_report(system_prompt, part), parts))
+            merged = self._reduce_input(partials)
+            if merged is None:
+                break
+            content = merged
+        return self._truncate(content, budget)
+
     def generate_github_report(self, markdown_file_path):
         """
         生成 GitHub 项目的报告，并保存为 {original_filename}_report.md。
@@ -28,7 +92,7 @@ class ReportGenerator:
             markdown_content = file.read()
 
         system_prompt = self.prompts.get("github")
-        report = self.llm.generate_report(system_prompt, markdown_content)
+        report = self.llm.generate_report(system_prompt, self._fit_to_budget(system_prompt, markdown_content))
         
         report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
         with open(report_file_path, 'w+') as report_file:
@@ -37,6 +101,75 @@ class ReportGenerator:
         LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
         return report, report_file_path
 
+    def write_no_activity_report(self, markdown_file_path, repo, days):
+        """
+        仓库在本周期内没有更新时，直接用模板生成报告（不调用 LLM），保存为 {original_filename}_report.md。
+        """
+        report = self.NO_ACTIVITY_TEMPLATE.format(repo=repo, days=days)
+        report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
+        with open(report_file_path, 'w+') as report_file:
+            report_file.write(report)
+        LOG.info(f"[{repo}]没有新的活动，已写入模板报告 {report_file_path}")
+        return report, report_file_path
+
+    def generate_github_reports(self, markdown_file_paths, on_result=None):
+        """
+        批量并发生成 GitHub 项目报告，同时进行的模型调用数不超过 max_concurrency。
+        返回与输入顺序一致的 (report, report_file_path) 列表；
+        on_result(index, report, report_file_path) 在每份报告完成时调用（在线程池中执行）。
+        """
+        return asyncio.run(self._agenerate_github_reports(markdown_file_paths, on_result))
+
+    async def _agenerate_github_reports(self, markdown_file_paths, on_result):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        system_prompt = self.prompts.get("github")
+
+        async def generate(index, markdown_file_path):
+            with open(markdown_file_path, 'r') as file:
+                markdown_content = file.read()
+            report = await self._agenerate(system_prompt, markdown_content, semaphore)
+
+            report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
+            with open(report_file_path, 'w+') as report_file:
+                report_file.write(report)
+            LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
+            if on_result is not None:
+                await asyncio.to_thread(on_result, index, report, report_file_path)
+            return report, report_file_path
+
+        try:
+            return await asyncio.gather(*(generate(i, path) for i, path in enumerate(markdown_file_paths)))
+        finally:
+            if inspect.iscoroutinefunction(getattr(self.llm, 'aclose', None)):
+                await self.llm.aclose()
+
+    async def _agenerate(self, system_prompt, markdown_content, semaphore):
+        # 分段摘要和最终生成都是独立的模型调用，各自占用一个并发名额
+        markdown_content = await self._afit_to_budget(system_prompt, markdown_content, semaphore)
+        return await self._acall(system_prompt, markdown_content, semaphore)
+
+    async def _acall(self, system_prompt, content, semaphore):
+        async with semaphore:
+            # 异步 LLM 直接 await（经过其速率限制器）；同步 LLM 放到线程池中执行
+            agenerate_report = getattr(self.llm, 'agenerate_report', None)
+            if inspect.iscoroutinefunction(agenerate_report):
+                return await agenerate_report(system_prompt, content)
+            return await asyncio.to_thread(self.llm.generate_report, system_prompt, content)
+
+    async def _afit_to_budget(self, system_prompt, content, semaphore):
+        """_fit_to_budget 的异步版本：分段摘要与批量中的其他报告共用同一个并发上限"""
+        budget = self._input_budget(system_prompt)
+        for _ in range(self.MAX_REDUCE_ROUNDS):
+            if count_tokens(content) <= budget:
+                return content
+            parts = self._map_inputs(content, budget)
+            partials = await asyncio.gather(*(self._acall(system_prompt, part, semaphore) for part in parts))
+            merged = self._reduce_input(partials)
+            if merged is None:
+                break
+            content = merged
+        return self._truncate(content, budget)
+
     def generate_hn_topic_report(self, markdown_file_path):
         """
         生成 Hacker News 小时主题的报告，并保存为 {original_filename}_topic.md。
@@ -45,21 +178,129 @@ class ReportGenerator:
             markdown_content = file.read()
 
         system_prompt = self.prompts.get("hacker_news_hours_topic")
-        report = self.llm.generate_report(system_prompt, markdown_content)
+        report = self.llm.generate_report(system_prompt, self._fit_to_budget(system_prompt, markdown_content))
         
-        report_file_path = os.path.splitext(markdown_file_path)[0] + "_topic.md"
+        report_file_path = self._snapshot_base(markdown_file_path) + "_topic.md"
         with open(report_file_path, 'w+') as report_file:
             report_file.write(report)
 
+        self._store_topic_report(markdown_file_path, report)
+
         LOG.info(f"Hacker News 热点主题报告已保存到 {report_file_path}")
         return report, report_file_path
 
+    @staticmethod
+    def _snapshot_base(markdown_file_path):
+        # hacker_news/<date>/<hour>.md 及增量快照 <hour>_delta.md 都对应 hacker_news/<date>/<hour>
+        base = os.path.splitext(markdown_file_path)[0]
+        return base[:-len("_delta")] if base.endswith("_delta") else base
+
+    def _store_topic_report(self, markdown_file_path, report):
+        if self.event_store is not None:
+            # hacker_news/<date>/<hour>.md（或 <hour>_delta.md） -> (date, hour)
+            date = os.path.basename(os.path.dirname(os.path.abspath(markdown_file_path)))
+            hour = os.path.basename(self._snapshot_base(markdown_file_path))
+            self.event_store.save_topic_report(date, hour, report)
+
+    def _stream_to_file(self, system_prompt, markdown_content, report_file_path):
+        """
+        流式生成报告：每收到一段输出就追加写入文件，并产出截至目前的完整报告文本。
+        """
+        report = ""
+        markdown_content = self._fit_to_budget(system_prompt, markdown_content)
+        with open(report_file_path, 'w+') as report_file:
+            for chunk in self.llm.generate_report_stream(system_prompt, markdown_content):
+                report += chunk
+                report_file.write(chunk)
+                report_file.flush()
+                yield report
+
+    def generate_github_report_stream(self, markdown_file_path):
+        """
+        流式生成 GitHub 项目报告。生成过程中产出 (部分报告, None)，完成后产出 (完整报告, 报告文件路径)。
+        """
+        with open(markdown_file_path, 'r') as file:
+            markdown_content = file.read()
+
+        report = ""
+        report_file_path = os.path.splitext(markdown_file_path)[0] + "_report.md"
+        for report in self._stream_to_file(self.prompts.get("github"), markdown_content, report_file_path):
+            yield report, None
+
+        LOG.info(f"GitHub 项目报告已保存到 {report_file_path}")
+        yield report, report_file_path
+
+    def generate_hn_topic_report_stream(self, markdown_file_path):
+        """
+        流式生成 Hacker News 小时主题报告，产出方式同 generate_github_report_stream。
+        """
+        with open(markdown_file_path, 'r') as file:
+            markdown_content = file.read()
+
+        report = ""
+        report_file_path = self._snapshot_base(markdown_file_path) + "_topic.md"
+        for report in self._stream_to_file(self.prompts.get("hacker_news_hours_topic"), markdown_content, report_file_path):
+            yield report, None
+        self._store_topic_report(markdown_file_path, report)
+
+        LOG.info(f"Hacker News 热点主题报告已保存到 {report_file_path}")
+        yield report, report_file_path
+
+    def update_hn_daily_digest(self, markdown_file_path, topic_report):
+        """
+        把一份新的小时话题报告合并进当天的滚动摘要（hacker_news/<date>/daily_digest.md）。
+        当天第一份报告直接作为摘要；之后只把新报告与现有摘要交给模型合并。
+        未配置 hacker_news_daily_digest 提示时退化为按小时追加。
+        """
+        directory_path = os.path.dirname(markdown_file_path)
+        hour = os.path.basename(self._snapshot_base(markdown_file_path))
+        merged_hours, digest = self._read_digest(directory_path)
+        if hour in merged_hours:
+            LOG.info(f"{hour}:00 的话题报告已合并到每日摘要，跳过")
+            return digest
+
+        system_prompt = self.prompts.get("hacker_news_daily_digest")
+        merged = None
+        if digest and system_prompt is not None:
+            merge_input = f"## 当前摘要\n\n{digest}\n\n## 新的热点话题报告（{hour}:00）\n\n{topic_report}"
+            merged = self.llm.generate_report(system_prompt, self._fit_to_budget(system_prompt, merge_input))
+            if merged.startswith("[ERROR]"):
+                LOG.warning("合并每日摘要失败，改为追加本小时的话题报告")
+                merged = None
+        if not digest:
+            digest = topic_report
+        elif merged is None:
+            digest = f"{digest}\n\n## {hour}:00\n\n{topic_report}"
+        else:
+            digest = merged
+
+        merged_hours.append(hour)
+        with open(os.path.join(directory_path, self.DIGEST_FILENAME), 'w') as digest_file:
+            digest_file.write(f"<!-- merged_hours: {','.join(merged_hours)} -->\n{digest}")
+        LOG.info(f"Hacker News 每日摘要已更新（已合并 {len(merged_hours)} 份话题报告）")
+        return digest
+
+    def _read_digest(self, directory_path):
+        # 返回 (已合并的小时列表, 摘要内容)，摘要不存在时返回空
+        digest_path = os.path.join(directory_path, self.DIGEST_FILENAME)
+        if not os.path.exists(digest_path):
+            return [], ""
+        with open(digest_path, 'r') as digest_file:
+            content = digest_file.read()
+        match = self.DIGEST_HEADER.match(content)
+        if match is None:
+            return [], content
+        return [hour for hour in match.group(1).split(",") if hour], content[match.end():]
+
     def generate_hn_daily_report(self, directory_path):
         """
         生成 Hacker News 每日汇总的报告，并保存到 hacker_news/tech_trends/ 目录下。
-        这里的输入是一个目录路径，其中包含所有由 generate_hn_topic_report 生成的 *_topic.md 文件。
+        这里的输入是一个目录路径：优先使用 update_hn_daily_digest 维护的滚动摘要，
+        没有摘要时聚合目录中所有由 generate_hn_topic_report 生成的 *_topic.md 文件。
         """
-        markdown_content = self._aggregate_topic_reports(directory_path)
+        _, markdown_content = self._read_digest(directory_path)
+        if not markdown_content:
+            markdown_content = self._aggregate_topic_reports(directory_path)
         system_prompt = self.prompts.get("hacker_news_daily_report")
 
         base_name = os.path.basename(directory_path.rstrip('/'))
@@ -68,7 +309,7 @@ class ReportGenerator:
         # 确保 tech_trends 目录存在
         os.makedirs(os.path.dirname(report_file_path), exist_ok=True)
         
-        report = self.llm.generate_report(system_prompt, markdown_content)
+        report = self.llm.generate_report(system_prompt, self._fit_to_budget(system_prompt, markdown_content))
         
         with open(report_file_path, 'w+') as report_file:
             report_file.write(report)
@@ -80,7 +321,13 @@ class ReportGenerator:
     def _aggregate_topic_reports(self, directory_path):
         """
         聚合目录下所有以 '_topic.md' 结尾的 Markdown 文件内容，生成每日汇总报告的输入。
+        启用本地事件库时直接按日期查询已保存的话题报告，只有库中没有记录时才扫描目录。
         """
+        if self.event_store is not None:
+            reports = self.event_store.topic_reports(os.path.basename(directory_path.rstrip('/')))
+            if reports:
+                return "".join(report + "\n" for report in reports)
+
         markdown_content = ""
         for filename in os.listdir(directory_path):
             if filename.endswith("_topic.md"):
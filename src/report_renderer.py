@@ -0,0 +1,133 @@
+# src/report_renderer.py
+
+import hashlib  # 导入hashlib用于计算报告内容哈希
+import json  # 导入json模块读写渲染缓存文件
+import os  # 导入os模块用于文件操作
+import re  # 导入re模块为HTML标签注入内联样式
+import threading  # 导入threading模块保证多线程访问安全
+from collections import OrderedDict  # 使用有序字典维护 LRU 顺序
+import markdown2  # 导入markdown2将Markdown转换为HTML
+from logger import LOG  # 导入日志模块
+
+# 邮件客户端普遍不支持 <style>，因此为常用标签注入内联样式
+INLINE_STYLES = {
+    'h1': 'font-size:22px;margin:16px 0 8px;color:#24292f;',
+    'h2': 'font-size:18px;margin:14px 0 6px;color:#24292f;',
+    'h3': 'font-size:16px;margin:12px 0 4px;color:#24292f;',
+    'p': 'margin:6px 0;line-height:1.6;',
+    'ul': 'margin:6px 0;padding-left:22px;',
+    'ol': 'margin:6px 0;padding-left:22px;',
+    'li': 'margin:2px 0;line-height:1.6;',
+    'a': 'color:#0969da;text-decoration:none;',
+    'code': 'font-family:Menlo,Consolas,monospace;background:#f6f8fa;padding:1px 4px;border-radius:3px;',
+    'pre': 'background:#f6f8fa;padding:10px;border-radius:6px;overflow:auto;',
+    'blockquote': 'margin:6px 0;padding-left:10px;border-left:3px solid #d0d7de;color:#57606a;',
+    'hr': 'border:none;border-top:1px solid #d0d7de;margin:16px 0;',
+}
+_TAG_PATTERN = re.compile(r'<(' + '|'.join(INLINE_STYLES) + r')(\s[^>]*?)?(\s*/)?>')
+WRAPPER_STYLE = 'font-family:-apple-system,Segoe UI,Helvetica,Arial,sans-serif;font-size:14px;color:#24292f;'
+
+
+_SLACK_RULES = [
+    (re.compile(r'^([ \t]*)[-*][ \t]+', re.M), r'\1• '),  # 列表项
+    (re.compile(r'\*\*(.+?)\*\*'), r'*\1*'),  # 粗体
+    (re.compile(r'^#{1,6}[ \t]*(.+?)[ \t]*#*$', re.M), r'*\1*'),  # 标题（Slack 没有标题，以粗体代替）
+    (re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)'), r'<\2|\1>'),  # 链接
+]
+
+
+def _slack_mrkdwn(report):
+    # Slack 要求转义 &、<、>，之后再生成 <url|text> 形式的链接
+    text = report.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    for pattern, replacement in _SLACK_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _inline_css(html):
+    def add_style(match):
+        tag, attrs = match.group(1), (match.group(2) or '').rstrip()
+        closing = ' /' if match.group(3) else ''
+        return f'<{tag}{attrs} style="{INLINE_STYLES[tag]}"{closing}>'
+    return f'<div style="{WRAPPER_STYLE}">{_TAG_PATTERN.sub(add_style, html)}</div>'
+
+
+class ReportRenderer:
+    """
+    报告渲染管线：每份 Markdown 报告只转换一次，得到
+    - html：普通 HTML（页面展示）；
+    - email_html：注入内联样式的 HTML（邮件）；
+    - text：纯文本备选内容（即 Markdown 原文）；
+    - slack：Slack mrkdwn 格式的文本。
+    结果以报告内容的哈希为键缓存在内存中；提供报告文件路径时，
+    还会保存到报告旁的 <name>.render.json，供其他进程和后续的多渠道发送复用。
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # 哈希 -> 渲染结果
+        self._lock = threading.Lock()
+        self.renders = 0  # 实际执行渲染的次数
+
+    @staticmethod
+    def content_hash(report):
+        return hashlib.sha256(report.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def cache_path(report_path):
+        """报告文件对应的渲染缓存路径，如 xxx_report.md -> xxx_report.render.json"""
+        return os.path.splitext(report_path)[0] + '.render.json'
+
+    def render(self, report, report_path=None):
+        """返回包含 hash、html、email_html、text、slack 的渲染结果"""
+        key = self.content_hash(report)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        rendered = self._load(report_path, key) if report_path else None
+        if rendered is None:
+            html = markdown2.markdown(report)
+            rendered = {'hash': key, 'html': html, 'email_html': _inline_css(html), 'text': report,
+                        'slack': _slack_mrkdwn(report)}
+            self.renders += 1
+            if report_path:
+                self._save(report_path, rendered)
+
+        with self._lock:
+            self._entries[key] = rendered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def _load(self, report_path, key):
+        try:
+            with open(self.cache_path(report_path), 'r', encoding='utf-8') as f:
+                rendered = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if rendered.get('hash') != key or 'slack' not in rendered:
+            return None  # 报告内容变化或缓存格式过旧时重新渲染
+        return rendered
+
+    def _save(self, report_path, rendered):
+        try:
+            with open(self.cache_path(report_path), 'w', encoding='utf-8') as f:
+                json.dump(rendered, f, ensure_ascii=False)
+        except OSError as e:
+            LOG.warning(f"保存报告渲染缓存失败：{str(e)}")
+
+
+_shared_renderer = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_renderer():
+    """获取进程内共享的渲染器，邮件、Slack 和界面共用同一份缓存"""
+    global _shared_renderer
+    with _shared_lock:
+        if _shared_renderer is None:
+            _shared_renderer = ReportRenderer()
+        return _shared_renderer
@@ -1,27 +1,208 @@
 import json
+import os
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from logger import LOG  # 导入日志模块
+
+try:
+    import fcntl  # 跨进程文件锁，仅 Unix 可用
+except ImportError:
+    fcntl = None
 
 class SubscriptionManager:
+    """
+    订阅管理：以有序字典（仓库 -> 元数据）为索引，成员判断和增删均为 O(1)。
+    元数据包括 frequency_days（抓取间隔天数）、priority（优先级，越大越先处理）和 last_run（上次运行时间）。
+    订阅文件为 JSON 列表：没有元数据的订阅保存为仓库名字符串，兼容旧格式；
+    有元数据的订阅保存为 {"repo": ..., ...}。写入时先写临时文件再原子替换，
+    batch() 期间的多次修改只在退出时写入一次。
+    订阅文件可能同时被命令行、Gradio 界面和守护进程修改，因此每次修改前先重新读取文件，
+    只把本次的改动合并进去，不会用内存中过时的内容覆盖其他进程的修改；
+    读取、修改、替换的整个过程持有订阅文件旁的 .lock 文件锁（跨进程）和实例锁（跨线程）。
+    """
     def __init__(self, subscriptions_file):
         self.subscriptions_file = subscriptions_file
+        self._index = {}  # 仓库 -> 元数据，保持添加顺序
+        self._lock = threading.RLock()  # 同一实例可能被执行器的多个线程同时修改
+        self._batch_depth = 0
+        self._dirty = False
         self.subscriptions = self.load_subscriptions()
-    
+
+    @property
+    def subscriptions(self):
+        return list(self._index)
+
+    @subscriptions.setter
+    def subscriptions(self, entries):
+        # 先构建完整的索引再替换，其他线程不会读到构建了一半的索引
+        index = {}
+        for entry in entries:
+            repo, metadata = self._parse_entry(entry)
+            if repo:
+                index[repo] = metadata
+        self._index = index
+
+    @classmethod
+    def _parse_entry(cls, entry):
+        # 订阅条目可以是仓库名字符串，也可以是包含 repo 和元数据的字典；无效条目返回 (None, {})
+        if isinstance(entry, str):
+            return entry.strip(), {}
+        if not isinstance(entry, dict) or not isinstance(entry.get('repo'), str):
+            LOG.warning(f"忽略无效的订阅条目：{entry}")
+            return None, {}
+        entry = dict(entry)
+        repo = entry.pop('repo').strip()
+        return repo, {key: value for key, value in entry.items() if value is not None}
+
     def load_subscriptions(self):
         with open(self.subscriptions_file, 'r') as f:
             return json.load(f)
-    
+
+    def reload(self):
+        """重新读取订阅文件，获取其他进程的修改"""
+        if os.path.exists(self.subscriptions_file):
+            self.subscriptions = self.load_subscriptions()
+
     def save_subscriptions(self):
-        with open(self.subscriptions_file, 'w') as f:
-            json.dump(self.subscriptions, f, indent=4)
-    
-    def list_subscriptions(self):
-        return self.subscriptions
-    
-    def add_subscription(self, repo):
-        if repo not in self.subscriptions:
-            self.subscriptions.append(repo)
-            self.save_subscriptions()
-    
+        with self._lock:
+            if self._batch_depth:
+                self._dirty = True  # 批量修改期间只记录，退出 batch() 时统一写入
+                return
+            with self._file_lock():
+                self._write()
+
+    def _write(self):
+        entries = [{'repo': repo, **metadata} if metadata else repo for repo, metadata in self._index.items()]
+        # 每次写入使用唯一的临时文件，多个写入方不会互相覆盖临时文件
+        directory = os.path.dirname(os.path.abspath(self.subscriptions_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.subscriptions_file) + '.',
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f, indent=4)
+            if os.path.exists(self.subscriptions_file):
+                os.chmod(tmp_path, os.stat(self.subscriptions_file).st_mode)  # mkstemp 创建的文件仅所有者可读写
+            os.replace(tmp_path, self.subscriptions_file)  # 原子替换，写入中断不会损坏订阅文件
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._dirty = False
+
+    @contextmanager
+    def _file_lock(self):
+        # 订阅文件会被原子替换，因此锁定旁边固定的 .lock 文件；进程退出或关闭描述符时自动释放
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.subscriptions_file + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def batch(self):
+        """
+        批量修改：进入时加锁并重新读取订阅文件，期间的增删改只在退出时保存一次；
+        保存完成后才释放锁，其他进程和线程的修改不会在读取与替换之间丢失。
+        """
+        with self._lock, ExitStack() as stack:
+            if self._batch_depth == 0:
+                stack.enter_context(self._file_lock())
+                self.reload()
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self._write()
+
+    def list_subscriptions(self, by_priority=False):
+        """返回订阅的仓库名；by_priority=True 时按优先级从高到低排序（同优先级保持添加顺序）"""
+        if not by_priority:
+            return self.subscriptions
+        return sorted(self._index, key=lambda repo: -self._index[repo].get('priority', 0))
+
+    def __contains__(self, repo):
+        return repo in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def get_subscription(self, repo):
+        """返回订阅的元数据，未订阅时返回 None"""
+        metadata = self._index.get(repo)
+        return dict(metadata) if metadata is not None else None
+
+    def add_subscription(self, repo, **metadata):
+        """添加订阅，返回是否为新增"""
+        return self.add_subscriptions([{'repo': repo, **metadata}]) == 1
+
     def remove_subscription(self, repo):
-        if repo in self.subscriptions:
-            self.subscriptions.remove(repo)
-            self.save_subscriptions()
\ No newline at end of file
+        """移除订阅，返回是否存在该订阅"""
+        return self.remove_subscriptions([repo]) == 1
+
+    def add_subscriptions(self, entries):
+        """批量添加订阅（仓库名或包含 repo 的字典），已存在的订阅保持不变，返回新增数量"""
+        added = 0
+        with self.batch():
+            for entry in entries:
+                repo, metadata = self._parse_entry(entry)
+                if repo and repo not in self._index:
+                    self._index[repo] = metadata
+                    added += 1
+            if added:
+                self.save_subscriptions()
+        return added
+
+    def remove_subscriptions(self, repos):
+        """批量移除订阅，返回实际移除的数量"""
+        with self.batch():
+            removed = sum(1 for repo in repos if self._index.pop(repo, None) is not None)
+            if removed:
+                self.save_subscriptions()
+        return removed
+
+    def import_subscriptions(self, file_path, replace=False):
+        """
+        从文件导入订阅：JSON 列表（与订阅文件格式相同）或每行一个仓库名的文本文件（# 开头为注释）。
+        replace=True 时替换现有订阅，否则只添加新的订阅；返回导入后新增的数量。
+        """
+        with open(file_path, 'r') as f:
+            content = f.read()
+        try:
+            entries = json.loads(content)
+        except ValueError:
+            entries = [line.strip() for line in content.splitlines() if line.strip() and not line.startswith('#')]
+        with self.batch():
+            if replace:
+                before = set(self._index)
+                self.subscriptions = entries
+                self._dirty = True
+                return len(set(self._index) - before)
+            return self.add_subscriptions(entries)
+
+    def update_subscription(self, repo, **metadata):
+        """更新订阅的元数据，值为 None 表示清除该项；未订阅时返回 False"""
+        with self.batch():
+            if repo not in self._index:
+                return False
+            for key, value in metadata.items():
+                if value is None:
+                    self._index[repo].pop(key, None)
+                else:
+                    self._index[repo][key] = value
+            self.save_subscriptions()
+        return True
+
+    def mark_run(self, repos, when=None):
+        """记录多个仓库的上次运行时间，只写入一次文件"""
+        last_run = (when or datetime.now()).isoformat(timespec='seconds')
+        with self.batch():
+            for repo in repos:
+                self.update_subscription(repo, last_run=last_run)
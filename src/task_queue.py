@@ -0,0 +1,186 @@
+# src/task_queue.py
+
+import json  # 导入json模块用于保存任务参数和结果
+import os  # 导入os模块用于文件和目录操作
+import sqlite3  # 导入sqlite3作为持久化存储
+import threading  # 导入threading模块保证多线程访问安全
+from datetime import datetime  # 导入datetime模块生成运行编号和时间戳
+from logger import LOG  # 导入日志模块
+
+
+class TaskQueue:
+    """
+    持久化任务队列（SQLite）：一次定时任务运行拆分为每个条目（如仓库）的若干阶段任务，
+    每个阶段完成后立即落盘检查点。进程中途退出后，重新执行只会处理尚未完成的任务，
+    已完成的抓取、报告生成（LLM 调用）和通知不会重复执行。
+    """
+    STAGES = ('fetch', 'report', 'notify')
+    SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS job_runs (
+        run_id TEXT PRIMARY KEY,
+        job TEXT NOT NULL,
+        params TEXT NOT NULL,
+        status TEXT NOT NULL,          -- running / done
+        created_at TEXT NOT NULL,
+        finished_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_job_runs_status ON job_runs (job, status);
+    CREATE TABLE IF NOT EXISTS job_tasks (
+        run_id TEXT NOT NULL,
+        item TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        status TEXT NOT NULL,          -- pending / done / failed / skipped
+        attempts INTEGER NOT NULL DEFAULT 0,
+        result TEXT,
+        error TEXT,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (run_id, item, stage)
+    );
+    '''
+
+    def __init__(self, db_path='data/sentinel.db', max_attempts=3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts  # 单个任务最多尝试次数，超过后标记为失败
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)  # 确保目录存在
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec='seconds')
+
+    def start_run(self, job, items, params=None):
+        """创建一次新的运行，为每个条目的每个阶段生成待执行任务，返回运行编号"""
+        run_id = f"{job}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}"
+        now = self._now()
+        rows = [(run_id, item, stage, position, 'pending', 0, None, None, now)
+                for position, item in enumerate(items) for stage in self.STAGES]
+        with self._lock, self._conn:
+            self._conn.execute('INSERT INTO job_runs VALUES (?, ?, ?, ?, ?, ?)',
+                               (run_id, job, json.dumps(params or {}), 'running', now, None))
+            self._conn.executemany('INSERT INTO job_tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        LOG.info(f"[任务队列]创建运行 {run_id}，共 {len(items)} 个条目")
+        return run_id
+
+    def unfinished_runs(self, job):
+        """返回尚未完成的运行（按创建时间排序），用于进程重启后恢复"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id, params FROM job_runs WHERE job = ? AND status = 'running' ORDER BY created_at",
+                (job,),
+            ).fetchall()
+        return [{'run_id': row['run_id'], 'params': json.loads(row['params'])} for row in rows]
+
+    def active_items(self, job):
+        """返回未完成的运行中仍有待执行任务的条目，避免同一条目同时出现在两次运行中"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT t.item FROM job_tasks t JOIN job_runs r ON r.run_id = t.run_id "
+                "WHERE r.job = ? AND r.status = 'running' AND t.status = 'pending'",
+                (job,),
+            ).fetchall()
+        return {row['item'] for row in rows}
+
+    def pending(self, run_id, stage):
+        """返回某阶段待执行的条目：本阶段未完成且上一阶段已完成，顺序与创建时一致"""
+        index = self.STAGES.index(stage)
+        with self._lock:
+            if index == 0:
+                rows = self._conn.execute(
+                    "SELECT item FROM job_tasks WHERE run_id = ? AND stage = ? AND status = 'pending' ORDER BY position",
+                    (run_id, stage),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT t.item FROM job_tasks t JOIN job_tasks p "
+                    "ON p.run_id = t.run_id AND p.item = t.item AND p.stage = ? "
+                    "WHERE t.run_id = ? AND t.stage = ? AND t.status = 'pending' AND p.status = 'done' "
+                    "ORDER BY t.position",
+                    (self.STAGES[index - 1], run_id, stage),
+                ).fetchall()
+        return [row['item'] for row in rows]
+
+    def done(self, run_id, stage):
+        """返回某阶段已完成的条目，顺序与创建时一致"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item FROM job_tasks WHERE run_id = ? AND stage = ? AND status = 'done' ORDER BY position",
+                (run_id, stage),
+            ).fetchall()
+        return [row['item'] for row in rows]
+
+    def complete(self, run_id, item, stage, result=None):
+        """记录任务完成及其结果（检查点）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_tasks SET status = 'done', result = ?, error = NULL, attempts = attempts + 1, "
+                "updated_at = ? WHERE run_id = ? AND item = ? AND stage = ?",
+                (json.dumps(result), self._now(), run_id, item, stage),
+            )
+
+    def fail(self, run_id, item, stage, error, result=None):
+        """
+        记录任务失败。未超过最大尝试次数时保持待执行，下次恢复时重试；
+        否则标记为失败，并跳过该条目后续的阶段。result 为部分完成的结果，重试时可据此只做剩余的工作。
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT attempts FROM job_tasks WHERE run_id = ? AND item = ? AND stage = ?', (run_id, item, stage)
+            ).fetchone()
+            attempts = row['attempts'] + 1
+            status = 'failed' if attempts >= self.max_attempts else 'pending'
+            self._conn.execute(
+                'UPDATE job_tasks SET status = ?, attempts = ?, error = ?, result = COALESCE(?, result), updated_at = ? '
+                'WHERE run_id = ? AND item = ? AND stage = ?',
+                (status, attempts, str(error), json.dumps(result) if result is not None else None, self._now(),
+                 run_id, item, stage),
+            )
+            if status == 'failed':
+                later = self.STAGES[self.STAGES.index(stage) + 1:]
+                self._conn.executemany(
+                    "UPDATE job_tasks SET status = 'skipped', updated_at = ? WHERE run_id = ? AND item = ? AND stage = ?",
+                    [(self._now(), run_id, item, later_stage) for later_stage in later],
+                )
+        LOG.warning(f"[任务队列]{item} 的 {stage} 任务失败（第 {attempts} 次）：{error}")
+
+    def result(self, run_id, item, stage):
+        """返回任务保存的结果（已完成任务的检查点，或失败时记录的部分结果）"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT result FROM job_tasks WHERE run_id = ? AND item = ? AND stage = ?', (run_id, item, stage)
+            ).fetchone()
+        return json.loads(row['result']) if row and row['result'] else None
+
+    def finish_if_done(self, run_id):
+        """没有待执行任务时将运行标记为完成，返回是否已完成"""
+        with self._lock, self._conn:
+            remaining = self._conn.execute(
+                "SELECT COUNT(*) FROM job_tasks WHERE run_id = ? AND status = 'pending'", (run_id,)
+            ).fetchone()[0]
+            if remaining == 0:
+                self._conn.execute("UPDATE job_runs SET status = 'done', finished_at = ? WHERE run_id = ?",
+                                   (self._now(), run_id))
+        if remaining:
+            LOG.warning(f"[任务队列]运行 {run_id} 还有 {remaining} 个任务未完成，将在下次执行时恢复")
+        return remaining == 0
+
+    def stats(self, run_id):
+        """按阶段和状态统计某次运行的任务数"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT stage, status, COUNT(*) AS n FROM job_tasks WHERE run_id = ? GROUP BY stage, status',
+                (run_id,),
+            ).fetchall()
+        stats = {stage: {} for stage in self.STAGES}
+        for row in rows:
+            stats[row['stage']][row['status']] = row['n']
+        return stats
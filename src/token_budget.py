@@ -0,0 +1,72 @@
+# src/token_budget.py
+
+import re  # 导入re模块用于统计中日韩字符
+from logger import LOG  # 导入日志模块
+
+try:
+    import tiktoken  # 见 requirements.txt：使用真实分词器计数；未安装时按字符估算
+except ImportError:
+    tiktoken = None
+
+# 中日韩字符通常一个字就是一个或多个 token，其余文本按约 4 个字符一个 token 估算
+_CJK_PATTERN = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+_ENCODING = None
+
+
+def _encoding():
+    global _ENCODING, tiktoken
+    if _ENCODING is None and tiktoken is not None:
+        try:
+            _ENCODING = tiktoken.get_encoding('cl100k_base')
+        except Exception as e:
+            # 首次使用需要下载编码表，离线环境下退回按字符估算
+            LOG.warning(f"加载 tiktoken 编码失败，改为按字符估算 token 数：{str(e)}")
+            tiktoken = None
+    return _ENCODING
+
+
+def count_tokens(text):
+    """估算文本的 token 数：有 tiktoken 时精确计数，否则按字符类型估算（偏保守）"""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def split_into_chunks(text, budget):
+    """
+    按行把文本切成若干块，每块不超过 budget 个 token；
+    单行超过预算时再按字符切开。
+    """
+    chunks, current, current_tokens = [], [], 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = count_tokens(line)
+        if line_tokens > budget:
+            pieces = _split_long_line(line, budget)
+        else:
+            pieces = [(line, line_tokens)]
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > budget:
+                chunks.append(''.join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+def _split_long_line(line, budget):
+    pieces, start = [], 0
+    while start < len(line):
+        # 先按最坏情况（每个字符一个 token）取一段，再逐步放宽
+        end = min(len(line), start + budget)
+        while end < len(line) and count_tokens(line[start:min(len(line), end * 2 - start)]) <= budget:
+            end = min(len(line), end * 2 - start)
+        piece = line[start:end]
+        pieces.append((piece, count_tokens(piece)))
+        start = end
+    return pieces
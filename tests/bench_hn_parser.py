@@ -0,0 +1,44 @@
+"""
+Hacker News 列表页解析性能对比：快速解析器（hn_parser） vs BeautifulSoup。
+
+用法：
+    python tests/bench_hn_parser.py                   # 使用生成的 30 条新闻页面
+    python tests/bench_hn_parser.py page1.html ...    # 使用保存的 HN 列表页
+"""
+import sys
+import os
+import timeit
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from hn_parser import parse_front_page
+from hacker_news_client import HackerNewsClient
+from test_hn_parser import FRONT_PAGE
+
+
+def synthetic_page(repeat=10):
+    # 将测试片段中的 3 条新闻重复，拼成一页 30 条的页面
+    rows = FRONT_PAGE.replace('<table>', '').replace('</table>', '')
+    return '<html><body><table>' + rows * repeat + '</table></body></html>'
+
+
+def bench(name, html, number=50):
+    client = HackerNewsClient()
+    fast = [(s['id'], s['title'], s['link']) for s in parse_front_page(html)]
+    slow = [(s['id'], s['title'], s['link']) for s in client._parse_stories_bs4(html)]
+    assert fast == slow, f"{name}: 两种解析结果不一致"
+
+    fast_time = timeit.timeit(lambda: parse_front_page(html), number=number) / number
+    slow_time = timeit.timeit(lambda: client._parse_stories_bs4(html), number=number) / number
+    print(f"{name}: {len(fast)} 条新闻，快速解析 {fast_time * 1000:.2f} ms，"
+          f"BeautifulSoup {slow_time * 1000:.2f} ms，加速 {slow_time / fast_time:.1f}x")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, 'r', encoding='utf-8') as f:
+                bench(os.path.basename(path), f.read())
+    else:
+        bench('synthetic', synthetic_page())
@@ -0,0 +1,73 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Config  # 导入配置类
+from async_llm import AsyncLLM, AsyncRateLimiter  # 导入要测试的异步 LLM 类
+
+
+class TestAsyncLLM(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，初始化使用 Ollama 的配置。
+        """
+        self.config = Config()
+        self.config.llm_model_type = "ollama"
+        self.config.llm_rate_limits = {}
+
+    @patch('async_llm.httpx', None)
+    @patch('requests.Session.post')
+    def test_agenerate_report_runs_concurrently(self, mock_post):
+        """
+        测试没有 httpx 时 Ollama 请求退化为线程池中的同步请求，多份报告可以并发生成。
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"message": {"content": "Generated report content"}}
+        mock_post.return_value = mock_response
+        llm = AsyncLLM(self.config)
+
+        async def run():
+            return await asyncio.gather(*(llm.agenerate_report(f"content {i}", "prompt") for i in range(3)))
+
+        reports = asyncio.run(run())
+        self.assertEqual(reports, ["Generated report content"] * 3)
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertFalse(mock_post.call_args.kwargs["json"]["stream"])
+        # 上下文窗口通过 options.num_ctx 传给 Ollama，与报告生成器的输入预算一致
+        self.assertEqual(mock_post.call_args.kwargs["json"]["options"], {"num_ctx": self.config.llm_context_tokens})
+
+    def test_rate_limiter_spaces_requests(self):
+        """
+        测试每分钟请求数限制会把请求间隔拉开。
+        """
+        limiter = AsyncRateLimiter(requests_per_minute=600)  # 每 0.1 秒一个请求
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        async def run():
+            for _ in range(3):
+                await limiter.acquire()
+
+        with patch('async_llm.asyncio.sleep', fake_sleep), patch('async_llm.time.monotonic', return_value=100.0):
+            asyncio.run(run())
+        self.assertEqual([round(s, 3) for s in sleeps], [0.1, 0.2])
+
+    def test_rate_limiter_unlimited(self):
+        """
+        测试请求数为 0 时不做节流。
+        """
+        limiter = AsyncRateLimiter(0)
+        with patch('async_llm.asyncio.sleep') as mock_sleep:
+            asyncio.run(limiter.acquire())
+        mock_sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from event_store import EventStore  # 导入要测试的 EventStore 类
+from github_client import GitHubClient
+from hacker_news_client import HackerNewsClient
+
+
+class TestEventStore(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时数据库和测试数据。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = EventStore(os.path.join(self.tmp_dir, "sentinel.db"))
+        self.repo = "DjangoPeng/openai-quickstart"
+        self.updates = {
+            "commits": [
+                {"sha": "old", "commit": {"message": "Old", "author": {"date": "2024-08-19T10:00:00Z"}}},
+                {"sha": "new", "commit": {"message": "New\n\nbody", "author": {"date": "2024-08-20T10:00:00Z"}}},
+            ],
+            "issues": [
+                {"number": 1, "title": "Fix bug", "closed_at": "2024-08-20T08:00:00Z", "updated_at": "2024-08-20T08:00:00Z"},
+            ],
+            "pull_requests": [
+                {"number": 42, "title": "Add feature", "closed_at": "2024-08-18T08:00:00Z",
+                 "merged_at": "2024-08-18T08:00:00Z", "updated_at": "2024-08-21T09:00:00Z"},
+            ],
+        }
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_merge_updates_advances_cursor(self):
+        """
+        测试合并增量后游标指向最新的提交和更新时间。
+        """
+        self.store.merge_updates(self.repo, self.updates)
+        cursor = self.store.get_cursor(self.repo)
+
+        self.assertEqual(cursor["last_commit_sha"], "new")
+        self.assertEqual(cursor["last_commit_at"], "2024-08-20T10:00:00Z")
+        self.assertEqual(cursor["issues_updated_at"], "2024-08-20T08:00:00Z")
+        self.assertEqual(cursor["pulls_updated_at"], "2024-08-21T09:00:00Z")
+
+    def test_merge_updates_returns_only_new_or_changed_events(self):
+        """
+        测试重复合并相同数据时没有新增事件，只有更新时间变化的事件被视为变化。
+        """
+        changed = self.store.merge_updates(self.repo, self.updates)
+        self.assertEqual({kind: len(items) for kind, items in changed.items()},
+                         {"commits": 2, "issues": 1, "pull_requests": 1})
+        self.assertEqual(self.store.merge_updates(self.repo, self.updates),
+                         {"commits": [], "issues": [], "pull_requests": []})
+
+        reopened = dict(self.updates["issues"][0], updated_at="2024-08-22T08:00:00Z")
+        changed = self.store.merge_updates(self.repo, {"issues": [reopened], "pull_requests": self.updates["pull_requests"]})
+        self.assertEqual(changed["issues"], [reopened])
+        self.assertEqual(changed["pull_requests"], [])
+
+    def test_since_for_uses_cursor_per_kind_within_window(self):
+        """
+        测试每类数据的增量起点取窗口起点与该类游标中较晚者，缺少某类游标不影响其他类。
+        """
+        window = dict.fromkeys(("commits", "issues", "pull_requests"), "2024-08-01")
+        self.assertEqual(self.store.since_for(self.repo, "2024-08-01"), window)
+        self.store.merge_updates(self.repo, {"commits": self.updates["commits"]})
+        self.assertEqual(self.store.since_for(self.repo, "2024-08-01"),
+                         {**window, "commits": "2024-08-20T10:00:00Z"})
+        self.store.merge_updates(self.repo, self.updates)
+        self.assertEqual(self.store.since_for(self.repo, "2024-08-01"), {
+            "commits": "2024-08-20T10:00:00Z",
+            "issues": "2024-08-20T08:00:00Z",
+            "pull_requests": "2024-08-21T09:00:00Z",
+        })
+        self.assertEqual(self.store.since_for(self.repo, "2024-08-25"),
+                         dict.fromkeys(("commits", "issues", "pull_requests"), "2024-08-25"))
+
+    def test_migrates_repo_schedules_without_tracked_since(self):
+        """
+        测试旧版本创建的调度表会补充 tracked_since 列，已有的调度状态保持不变。
+        """
+        import sqlite3
+        db_path = os.path.join(self.tmp_dir, "old.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE repo_schedules (repo TEXT PRIMARY KEY, tier TEXT, interval_hours REAL, '
+                     'last_run TEXT, next_run TEXT)')
+        conn.execute("INSERT INTO repo_schedules VALUES ('a/x', 'hot', 6, '2024-08-20T08:00:00', '2024-08-20T14:00:00')")
+        conn.commit()
+        conn.close()
+
+        store = EventStore(db_path)
+        self.addCleanup(store.close)
+        self.assertIsNone(store.repo_schedules()['a/x']['tracked_since'])
+        store.save_repo_schedules({'a/x': {'tier': 'hot', 'tracked_since': '2024-08-19T08:00:00'}})
+        self.assertEqual(store.repo_schedules()['a/x']['tracked_since'], '2024-08-19T08:00:00')
+
+    def test_query_updates_dedups_and_filters_range(self):
+        """
+        测试重复合并不会产生重复记录，且只返回日期范围内的事件。
+        """
+        self.store.merge_updates(self.repo, self.updates)
+        self.store.merge_updates(self.repo, self.updates)
+
+        updates = self.store.query_updates(self.repo, "2024-08-20", "2024-08-20")
+        self.assertEqual([c["sha"] for c in updates["commits"]], ["new"])
+        self.assertEqual([i["number"] for i in updates["issues"]], [1])
+        self.assertEqual(updates["pull_requests"], [])
+
+        updates = self.store.query_updates(self.repo, date(2024, 8, 18), date(2024, 8, 20))
+        self.assertEqual(len(updates["commits"]), 2)
+        self.assertEqual([pr["number"] for pr in updates["pull_requests"]], [42])
+
+    @patch.object(GitHubClient, 'fetch_updates')
+    def test_export_progress_only_fetches_delta(self, mock_fetch_updates):
+        """
+        测试启用事件库后，GitHubClient 从游标处增量抓取，并从本地渲染报告。
+        """
+        today = date.today()
+        closed_at = f"{today.isoformat()}T01:00:00Z"
+        self.store.merge_updates(self.repo, {
+            "commits": [{"sha": "abc", "commit": {"author": {"date": closed_at}}}],
+            "issues": [{"number": 5, "title": "Synced before", "closed_at": closed_at, "updated_at": closed_at}],
+            "pull_requests": [{"number": 6, "title": "PR", "closed_at": closed_at, "updated_at": closed_at}],
+        })
+        mock_fetch_updates.return_value = {"commits": [], "issues": [], "pull_requests": []}
+
+        client = GitHubClient("fake_token", event_store=self.store)
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        try:
+            file_path = client.export_progress_by_date_range(self.repo, days=2)
+            with open(file_path) as f:
+                content = f.read()
+        finally:
+            os.chdir(cwd)
+
+        self.assertEqual(mock_fetch_updates.call_args.kwargs["since"],
+                         dict.fromkeys(("commits", "issues", "pull_requests"), closed_at))
+        self.assertIn("- Synced before #5", content)
+
+    def test_hn_snapshots_dedup_by_story_id(self):
+        """
+        测试多次快照中的同一新闻只保存一条记录，并保留最新热度。
+        """
+        self.store.add_hn_snapshot("2024-09-01", "14", [
+            {"id": "1", "title": "Story 1", "link": "https://a.example", "points": 10},
+            {"id": "2", "title": "Story 2", "link": "https://b.example", "points": 50},
+        ])
+        self.store.add_hn_snapshot("2024-09-01", "18", [
+            {"id": "1", "title": "Story 1", "link": "https://a.example", "points": 120},
+        ])
+
+        stories = self.store.query_hn_stories("2024-09-01", "2024-09-01")
+        self.assertEqual([story["story_id"] for story in stories], ["1", "2"])
+        self.assertEqual(stories[0]["points"], 120)
+        self.assertEqual(stories[0]["first_seen"], "2024-09-01T14:00")
+        self.assertEqual(stories[0]["last_seen"], "2024-09-01T18:00")
+        self.assertEqual(self.store.query_hn_stories("2024-09-01", "2024-09-01", min_points=100)[0]["story_id"], "1")
+        self.assertEqual(self.store.query_hn_stories("2024-09-02", "2024-09-02"), [])
+
+    def test_topic_reports_ordered_by_hour(self):
+        """
+        测试按日期查询话题报告时按小时排序。
+        """
+        self.store.save_topic_report("2024-09-01", "18", "evening")
+        self.store.save_topic_report("2024-09-01", "08", "morning")
+        self.store.save_topic_report("2024-09-02", "08", "next day")
+        self.assertEqual(self.store.topic_reports("2024-09-01"), ["morning", "evening"])
+
+    @patch.object(HackerNewsClient, 'fetch_top_stories')
+    def test_hn_delta_snapshot_only_contains_new_and_rising(self, mock_fetch):
+        """
+        测试增量快照只包含当天新出现和分数明显上升的新闻，没有变化时返回 None。
+        """
+        client = HackerNewsClient(event_store=self.store, rising_min_points=50)
+        first = [
+            {"id": "1", "title": "Story 1", "link": "https://a.example", "points": 10, "comments": 1},
+            {"id": "2", "title": "Story 2", "link": "https://b.example", "points": 100, "comments": 5},
+        ]
+        second = [
+            {"id": "1", "title": "Story 1", "link": "https://a.example", "points": 90, "comments": 8},
+            {"id": "2", "title": "Story 2", "link": "https://b.example", "points": 120, "comments": 6},
+            {"id": "3", "title": "Story 3", "link": "https://c.example", "points": 5, "comments": 0},
+            {"id": "4", "title": "Story 2 repost", "link": "https://b.example", "points": 3, "comments": 0},
+        ]
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        try:
+            mock_fetch.return_value = first
+            first_path = client.export_top_stories(date="2024-09-01", hour="08", delta=True)
+            mock_fetch.return_value = second
+            delta_path = client.export_top_stories(date="2024-09-01", hour="12", delta=True)
+            with open(delta_path) as f:
+                delta = f.read()
+            mock_fetch.return_value = second
+            unchanged = client.export_top_stories(date="2024-09-01", hour="16", delta=True)
+        finally:
+            os.chdir(cwd)
+
+        self.assertEqual(first_path, os.path.join("hacker_news", "2024-09-01", "08_delta.md"))
+        self.assertIn("## 新上榜\n\n1. [Story 3](https://c.example)", delta)
+        self.assertIn("## 热度上升\n\n1. [Story 1](https://a.example) (90 points, 8 comments, +80 points)", delta)
+        self.assertNotIn("Story 2", delta)
+        self.assertIsNone(unchanged)
+
+
+if __name__ == '__main__':
+    unittest.main()
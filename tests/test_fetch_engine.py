@@ -0,0 +1,164 @@
+import sys
+import os
+import time
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from fetch_engine import FetchEngine, RepoFetchResult  # 导入要测试的 FetchEngine 类
+
+
+class TestFetchEngine(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，构造一个模拟的 GitHubClient。
+        """
+        self.repos = ["owner/repo-a", "owner/repo-b", "owner/repo-c"]
+        self.mock_client = MagicMock()
+        self.mock_client.rate_limiter = None
+        self.mock_client.event_store = None
+        self.mock_client.fetch_commits.side_effect = lambda repo, since, until, strict=False: [{"sha": repo}]
+        self.mock_client.fetch_issues.side_effect = lambda repo, since, until, strict=False: [{"title": repo, "number": 1}]
+        self.mock_client.fetch_pull_requests.side_effect = lambda repo, since, until, strict=False: []
+
+    def test_fetch_all_keeps_repo_order(self):
+        """
+        测试 fetch_all 返回的结果顺序与订阅顺序一致，且每个仓库都包含三个接口的数据。
+        """
+        engine = FetchEngine(self.mock_client, max_workers=4)
+        results = engine.fetch_all(self.repos, since="2024-08-01", until="2024-08-02")
+
+        self.assertEqual([r.repo for r in results], self.repos)
+        for result in results:
+            self.assertEqual(result.updates["commits"], [{"sha": result.repo}])
+            self.assertEqual(result.updates["issues"][0]["title"], result.repo)
+            self.assertEqual(result.updates["pull_requests"], [])
+            self.assertGreaterEqual(result.latency, 0)
+            self.assertEqual(set(result.endpoint_latency), set(FetchEngine.ENDPOINTS))
+
+    def test_fetch_all_uses_since_per_endpoint(self):
+        """
+        测试 since_by_repo 为每个接口提供各自的起点，缺少的接口和仓库使用窗口起点。
+        """
+        engine = FetchEngine(self.mock_client, max_workers=2)
+        engine.fetch_all(self.repos[:2], since="2024-08-01", until="2024-08-02", since_by_repo={
+            "owner/repo-a": {"commits": "2024-08-01T10:00:00Z", "issues": "2024-08-01T12:00:00Z"},
+        })
+
+        self.mock_client.fetch_commits.assert_any_call("owner/repo-a", "2024-08-01T10:00:00Z", "2024-08-02", strict=True)
+        self.mock_client.fetch_issues.assert_any_call("owner/repo-a", "2024-08-01T12:00:00Z", "2024-08-02", strict=True)
+        self.mock_client.fetch_pull_requests.assert_any_call("owner/repo-a", "2024-08-01", "2024-08-02", strict=True)
+        self.mock_client.fetch_commits.assert_any_call("owner/repo-b", "2024-08-01", "2024-08-02", strict=True)
+
+    def test_fetch_error_is_recorded_per_repo(self):
+        """
+        测试某个仓库的接口失败时只在该仓库的结果上记录错误，且不导出文件。
+        """
+        def failing_commits(repo, since, until, strict=False):
+            if repo == "owner/repo-b":
+                raise RuntimeError("502 Bad Gateway")
+            return [{"sha": repo}]
+        self.mock_client.fetch_commits.side_effect = failing_commits
+        from github_client import GitHubClient
+        self.mock_client.date_range.side_effect = GitHubClient.date_range
+        self.mock_client.export_progress_by_date_range.side_effect = lambda repo, days, updates, since=None: f"{repo}.md"
+
+        engine = FetchEngine(self.mock_client, max_workers=2)
+        results = engine.export_progress_by_date_range(self.repos, days=1)
+
+        self.assertEqual([r.error is None for r in results], [True, False, True])
+        self.assertIn("502 Bad Gateway", results[1].error)
+        self.assertIsNone(results[1].file_path)
+        self.assertEqual(self.mock_client.export_progress_by_date_range.call_count, 2)
+
+    def test_fetch_all_respects_concurrency_limit(self):
+        """
+        测试同时进行的请求数不超过配置的并发宽度。
+        """
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def slow_fetch(repo, since, until, strict=False):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+            return []
+
+        self.mock_client.fetch_commits.side_effect = slow_fetch
+        self.mock_client.fetch_issues.side_effect = slow_fetch
+        self.mock_client.fetch_pull_requests.side_effect = slow_fetch
+
+        engine = FetchEngine(self.mock_client, max_workers=2)
+        engine.fetch_all(self.repos)
+        self.assertLessEqual(state["peak"], 2)
+
+    def test_export_progress_by_date_range(self):
+        """
+        测试 export_progress_by_date_range 将预先抓取的数据交给 GitHubClient 导出。
+        """
+        from github_client import GitHubClient
+        self.mock_client.date_range.side_effect = GitHubClient.date_range
+        self.mock_client.export_progress_by_date_range.side_effect = lambda repo, days, updates, since=None: f"{repo}.md"
+
+        engine = FetchEngine(self.mock_client, max_workers=3)
+        results = engine.export_progress_by_date_range(self.repos, days=2)
+
+        self.assertEqual([r.file_path for r in results], [f"{repo}.md" for repo in self.repos])
+        self.assertEqual(self.mock_client.export_progress_by_date_range.call_count, len(self.repos))
+
+    def test_export_from_window_since(self):
+        """
+        测试传入上次运行时间的仓库从该时刻抓取并导出，抓取截止到当前时刻；其他仓库使用整天窗口。
+        """
+        from github_client import GitHubClient
+        self.mock_client.date_range.side_effect = GitHubClient.date_range
+        self.mock_client.export_progress_by_date_range.side_effect = lambda repo, days, updates, since=None: f"{repo}.md"
+
+        engine = FetchEngine(self.mock_client, max_workers=2)
+        engine.export_progress_by_date_range(self.repos[:2], days=1,
+                                             window_since={"owner/repo-a": "2024-08-01T08:00:00Z"})
+
+        since, _ = GitHubClient.date_range(1)
+        self.mock_client.fetch_commits.assert_any_call("owner/repo-a", "2024-08-01T08:00:00Z", None, strict=True)
+        self.mock_client.fetch_commits.assert_any_call("owner/repo-b", since.isoformat(), None, strict=True)
+        exported = {c.args[0]: c.kwargs['since'] for c in self.mock_client.export_progress_by_date_range.call_args_list}
+        self.assertEqual(exported, {"owner/repo-a": "2024-08-01T08:00:00Z", "owner/repo-b": since})
+
+    def test_activity_ignores_bot_updates(self):
+        """
+        测试有效更新数统计三类数据，默认不计机器人账号的更新。
+        """
+        updates = {
+            "commits": [{"sha": "a", "author": {"login": "dev"}}, {"sha": "b", "author": {"login": "renovate[bot]"}}],
+            "issues": [{"number": 1, "user": {"login": "github-actions", "type": "Bot"}}],
+            "pull_requests": [{"number": 2, "user": {"login": "dev"}}],
+        }
+        result = RepoFetchResult("owner/repo-a", updates, 0.1)
+        self.assertEqual(result.activity(), 2)
+        self.assertEqual(result.activity(ignore_bots=False), 4)
+        self.assertEqual(RepoFetchResult("owner/repo-a", {}, 0.1).activity(), 0)
+
+    def test_fetch_all_graphql_batches(self):
+        """
+        测试 GraphQL 模式下按批次查询，并保持订阅顺序。
+        """
+        self.mock_client.fetch_updates_batch.side_effect = lambda batch, since, until, size: {
+            repo: {"commits": [], "issues": [{"title": repo, "number": 1}], "pull_requests": []} for repo in batch
+        }
+        engine = FetchEngine(self.mock_client, max_workers=2, api_mode='graphql', graphql_batch_size=2)
+        results = engine.fetch_all(self.repos)
+
+        self.assertEqual([r.repo for r in results], self.repos)
+        self.assertEqual(self.mock_client.fetch_updates_batch.call_count, 2)
+        self.mock_client.fetch_commits.assert_not_called()
+        self.assertEqual(results[2].updates["issues"][0]["title"], "owner/repo-c")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,7 +17,7 @@ class TestGitHubClient(unittest.TestCase):
         self.client = GitHubClient(self.token)  # 使用该令牌初始化 GitHubClient 实例
         self.repo = "DjangoPeng/openai-quickstart"  # 要测试的仓库名称
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_commits(self, mock_get):
         """
         测试 fetch_commits 方法是否正确获取提交记录。
@@ -26,6 +26,7 @@ class TestGitHubClient(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.json.return_value = [{"sha": "abc123", "commit": {"message": "Initial commit"}}]
         mock_response.status_code = 200
+        mock_response.links = {}  # 只有一页数据，没有 next 链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 fetch_commits 方法并进行断言检查
@@ -34,7 +35,7 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(commits[0]['sha'], "abc123")  # 检查返回的提交记录 SHA 值
         self.assertEqual(commits[0]['commit']['message'], "Initial commit")  # 检查提交记录中的消息
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_issues(self, mock_get):
         """
         测试 fetch_issues 方法是否正确获取关闭的问题。
@@ -43,6 +44,7 @@ class TestGitHubClient(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.json.return_value = [{"number": 1, "title": "Fix bug"}]
         mock_response.status_code = 200
+        mock_response.links = {}  # 只有一页数据，没有 next 链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 fetch_issues 方法并进行断言检查
@@ -51,7 +53,7 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(issues[0]['number'], 1)  # 检查问题编号是否正确
         self.assertEqual(issues[0]['title'], "Fix bug")  # 检查问题标题是否正确
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_pull_requests(self, mock_get):
         """
         测试 fetch_pull_requests 方法是否正确获取拉取请求。
@@ -60,6 +62,7 @@ class TestGitHubClient(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.json.return_value = [{"number": 42, "title": "Add new feature"}]
         mock_response.status_code = 200
+        mock_response.links = {}  # 只有一页数据，没有 next 链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 fetch_pull_requests 方法并进行断言检查
@@ -68,7 +71,7 @@ class TestGitHubClient(unittest.TestCase):
         self.assertEqual(pull_requests[0]['number'], 42)  # 检查拉取请求的编号是否正确
         self.assertEqual(pull_requests[0]['title'], "Add new feature")  # 检查拉取请求的标题是否正确
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_export_daily_progress(self, mock_get):
         """
         测试 export_daily_progress 方法是否正确导出每日进度报告。
@@ -77,13 +80,14 @@ class TestGitHubClient(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.json.return_value = []
         mock_response.status_code = 200
+        mock_response.links = {}  # 只有一页数据，没有 next 链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 export_daily_progress 方法并进行断言检查
         file_path = self.client.export_daily_progress(self.repo)
         self.assertTrue(file_path.endswith('.md'))  # 检查生成的文件路径是否以 .md 结尾
 
-    @patch('github_client.requests.get')
+    @patch('requests.Session.get')
     def test_export_progress_by_date_range(self, mock_get):
         """
         测试 export_progress_by_date_range 方法是否正确导出指定日期范围内的进度报告。
@@ -92,11 +96,117 @@ class TestGitHubClient(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.json.return_value = []
         mock_response.status_code = 200
+        mock_response.links = {}  # 只有一页数据，没有 next 链接
         mock_get.return_value = mock_response  # 将模拟的响应赋值给 mock_get
 
         # 调用 export_progress_by_date_range 方法并进行断言检查
         file_path = self.client.export_progress_by_date_range(self.repo, days=7)
         self.assertTrue(file_path.endswith('.md'))  # 检查生成的文件路径是否以 .md 结尾
 
+    @patch('requests.Session.get')
+    def test_fetch_issues_follows_pagination(self, mock_get):
+        """
+        测试 fetch_issues 是否沿着 Link: rel="next" 读取所有分页，并按页请求 per_page=100。
+        """
+        next_url = "https://api.github.com/repositories/1/issues?page=2"
+        first_page = MagicMock()
+        first_page.json.return_value = [{"number": 1, "title": "First"}]
+        first_page.links = {"next": {"url": next_url, "rel": "next"}}
+        second_page = MagicMock()
+        second_page.json.return_value = [{"number": 2, "title": "Second"}]
+        second_page.links = {}
+        mock_get.side_effect = [first_page, second_page]
+
+        issues = self.client.fetch_issues(self.repo, since="2024-08-01")
+        self.assertEqual([issue['number'] for issue in issues], [1, 2])
+        self.assertEqual(mock_get.call_count, 2)
+
+        # 第一页携带过滤参数和 per_page，后续页直接使用 next 链接
+        first_call, second_call = mock_get.call_args_list
+        self.assertEqual(first_call.kwargs['params']['per_page'], GitHubClient.PER_PAGE)
+        self.assertEqual(first_call.kwargs['params']['since'], "2024-08-01")
+        self.assertNotIn('until', first_call.kwargs['params'])
+        self.assertEqual(second_call.args[0], next_url)
+        self.assertIsNone(second_call.kwargs['params'])
+
+    @patch('requests.Session.get')
+    def test_iter_issues_is_lazy(self, mock_get):
+        """
+        测试 iter_issues 是惰性的：只有迭代时才发出请求。
+        """
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{"number": 1, "title": "First"}]
+        mock_response.links = {}
+        mock_get.return_value = mock_response
+
+        issues = self.client.iter_issues(self.repo)
+        mock_get.assert_not_called()
+        self.assertEqual(next(issues)['number'], 1)
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_iter_pull_requests_stops_before_since(self, mock_get):
+        """
+        测试 pulls 接口按更新时间倒序读取，遇到早于 since 的记录后不再请求下一页。
+        """
+        first_page = MagicMock()
+        first_page.json.return_value = [
+            {"number": 2, "updated_at": "2024-08-21T09:00:00Z"},
+            {"number": 1, "updated_at": "2024-07-01T09:00:00Z"},
+        ]
+        first_page.links = {"next": {"url": "https://api.github.com/repositories/1/pulls?page=2", "rel": "next"}}
+        mock_get.return_value = first_page
+
+        pull_requests = self.client.fetch_pull_requests(self.repo, since="2024-08-01")
+        self.assertEqual([pr['number'] for pr in pull_requests], [2])
+        mock_get.assert_called_once()
+        params = mock_get.call_args.kwargs['params']
+        self.assertEqual((params['sort'], params['direction']), ('updated', 'desc'))
+        self.assertNotIn('since', params)
+
+    @patch('requests.Session.post')
+    def test_fetch_updates_batch_graphql(self, mock_post):
+        """
+        测试 fetch_updates_batch 通过一次 GraphQL 查询获取多个仓库，并转换为与 REST 一致的结构。
+        """
+        repo_node = {
+            "nameWithOwner": self.repo,
+            "defaultBranchRef": {"target": {"history": {
+                "pageInfo": {"hasNextPage": False},
+                "nodes": [{"oid": "abc123", "messageHeadline": "Init", "message": "Init",
+                           "committedDate": "2024-08-20T01:00:00Z", "url": "https://github.com/c/abc123",
+                           "author": {"name": "dev", "email": "dev@example.com"}}],
+            }}},
+            "issues": {"pageInfo": {"hasNextPage": False}, "nodes": [
+                {"number": 1, "title": "Fix bug", "closedAt": "2024-08-20T02:00:00Z",
+                 "updatedAt": "2024-08-20T02:00:00Z", "url": "https://github.com/i/1"}]},
+            "pullRequests": {"pageInfo": {"hasNextPage": False}, "nodes": [
+                {"number": 42, "title": "Add feature", "closedAt": "2024-08-20T03:00:00Z",
+                 "mergedAt": "2024-08-20T03:00:00Z", "updatedAt": "2024-08-20T03:00:00Z",
+                 "url": "https://github.com/p/42"},
+                {"number": 7, "title": "Old PR", "closedAt": "2024-01-01T00:00:00Z",
+                 "mergedAt": None, "updatedAt": "2024-01-01T00:00:00Z", "url": "https://github.com/p/7"}]},
+        }
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"data": {
+            "rateLimit": {"cost": 1, "remaining": 4999, "resetAt": "2024-08-20T04:00:00Z"},
+            "r0": repo_node,
+            "r1": None,  # 不存在的仓库
+        }, "errors": [{"message": "Could not resolve to a Repository"}]}
+        mock_post.return_value = mock_response
+
+        results = self.client.fetch_updates_batch([self.repo, "missing/repo"], since="2024-08-19", until="2024-08-21")
+
+        mock_post.assert_called_once()
+        variables = mock_post.call_args.kwargs["json"]["variables"]
+        self.assertEqual((variables["owner0"], variables["name0"]), ("DjangoPeng", "openai-quickstart"))
+        self.assertEqual(variables["since"], "2024-08-19T00:00:00Z")
+
+        updates = results[self.repo]
+        self.assertEqual(updates["commits"][0]["sha"], "abc123")
+        self.assertEqual(updates["issues"][0]["number"], 1)
+        self.assertEqual([pr["number"] for pr in updates["pull_requests"]], [42])  # 时间窗口外的 PR 被过滤
+        self.assertEqual(results["missing/repo"], {"commits": [], "issues": [], "pull_requests": []})
+
 if __name__ == '__main__':
     unittest.main()
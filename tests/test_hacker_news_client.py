@@ -15,7 +15,7 @@ class TestHackerNewsClient(unittest.TestCase):
     def setUp(self):
         self.client = HackerNewsClient()
 
-    @patch('hacker_news_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_top_stories_success(self, mock_get):
         # 模拟HTTP响应
         mock_response = MagicMock()
@@ -37,7 +37,7 @@ class TestHackerNewsClient(unittest.TestCase):
         self.assertEqual(top_stories[0]['title'], 'Story 1')
         self.assertEqual(top_stories[0]['link'], 'https://news.ycombinator.com/')
     
-    @patch('hacker_news_client.requests.get')
+    @patch('requests.Session.get')
     def test_fetch_top_stories_failure(self, mock_get):
         # 模拟HTTP请求失败
         mock_get.side_effect = Exception("Connection error")
@@ -47,7 +47,7 @@ class TestHackerNewsClient(unittest.TestCase):
         self.assertEqual(top_stories, [])
 
     
-    @patch('hacker_news_client.requests.get')
+    @patch('requests.Session.get')
     @patch('hacker_news_client.os.makedirs')
     @patch('hacker_news_client.open', new_callable=unittest.mock.mock_open)
     def test_export_top_stories(self, mock_open, mock_makedirs, mock_get):
@@ -76,7 +76,7 @@ class TestHackerNewsClient(unittest.TestCase):
         mock_open().write.assert_any_call("# Hacker News Top Stories (2024-09-01 14:00)\n\n")
         mock_open().write.assert_any_call("1. [Story 1](https://news.ycombinator.com/)\n")
 
-    @patch('hacker_news_client.requests.get')
+    @patch('requests.Session.get')
     @patch('hacker_news_client.os.makedirs')
     @patch('hacker_news_client.open', new_callable=unittest.mock.mock_open)
     def test_export_top_stories_no_stories(self, mock_open, mock_makedirs, mock_get):
@@ -94,5 +94,34 @@ class TestHackerNewsClient(unittest.TestCase):
         mock_open.assert_not_called()
         self.assertIsNone(file_path)
 
+    @patch('requests.Session.get')
+    def test_fetch_multiple_lists_and_pages_dedups_by_id(self, mock_get):
+        # 不同列表页返回部分重复的新闻
+        def page(*ids):
+            return "".join(
+                f'<tr class="athing" id="{i}"><td><span class="rank">{n}.</span></td><td class="title">'
+                f'<span class="titleline"><a href="https://example.com/{i}">Story {i}</a></span></td></tr>'
+                for n, i in enumerate(ids, start=1)
+            )
+        pages = {
+            'https://news.ycombinator.com/news': page('1', '2'),
+            'https://news.ycombinator.com/news?p=2': page('3'),
+            'https://news.ycombinator.com/best': page('2', '4'),
+            'https://news.ycombinator.com/best?p=2': page('1', '5'),
+        }
+
+        def fake_get(url, timeout=None):
+            response = MagicMock()
+            response.text = pages[url]
+            return response
+        mock_get.side_effect = fake_get
+
+        client = HackerNewsClient(lists=['news', 'best'], pages=2, max_workers=4)
+        top_stories = client.fetch_top_stories()
+
+        self.assertEqual([story['id'] for story in top_stories], ['1', '2', '3', '4', '5'])
+        self.assertEqual([story['source'] for story in top_stories], ['news', 'news', 'news', 'best', 'best'])
+        self.assertEqual(mock_get.call_count, 4)
+
 if __name__ == '__main__':
     unittest.main()
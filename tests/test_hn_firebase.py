@@ -0,0 +1,118 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from hn_firebase import HNFirebaseSource  # 导入要测试的 Firebase 数据源
+from hacker_news_client import HackerNewsClient
+
+API = 'https://hacker-news.firebaseio.com/v0'
+
+
+class TestHNFirebaseSource(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，准备模拟的 Firebase 接口数据。
+        """
+        self.items = {
+            1: {'id': 1, 'type': 'story', 'title': 'Story 1', 'url': 'https://a.example', 'score': 10,
+                'descendants': 2, 'time': 1725184800, 'by': 'alice'},
+            2: {'id': 2, 'type': 'story', 'title': 'Ask HN: Story 2', 'score': 5, 'descendants': 0,
+                'time': 1725184900, 'by': 'bob'},
+            3: {'id': 3, 'deleted': True},
+        }
+        self.responses = {
+            f'{API}/topstories.json': [1, 2, 3],
+            f'{API}/beststories.json': [2, 1],
+            f'{API}/updates.json': {'items': [], 'profiles': []},
+        }
+        self.requested = []
+
+    def fake_get(self, url, timeout=None):
+        self.requested.append(url)
+        response = MagicMock()
+        if url.startswith(f'{API}/item/'):
+            response.json.return_value = dict(self.items[int(url.rsplit('/', 1)[1][:-5])])
+        else:
+            response.json.return_value = self.responses[url]
+        return response
+
+    @patch('requests.Session.get')
+    def test_fetch_stories_normalizes_items(self, mock_get):
+        """
+        测试条目转换为与网页解析一致的新闻结构，并跳过已删除的条目。
+        """
+        mock_get.side_effect = self.fake_get
+        stories = HNFirebaseSource().fetch_stories('news', limit=3)
+
+        self.assertEqual([story['id'] for story in stories], ['1', '2'])
+        self.assertEqual(stories[0]['link'], 'https://a.example')
+        self.assertEqual((stories[0]['points'], stories[0]['comments'], stories[0]['rank']), (10, 2, 1))
+        self.assertEqual(stories[1]['link'], 'https://news.ycombinator.com/item?id=2')
+
+    @patch('requests.Session.get')
+    def test_repeated_snapshot_only_refetches_changed_items(self, mock_get):
+        """
+        测试再次获取时只重新抓取 updates.json 中列出的条目。
+        """
+        mock_get.side_effect = self.fake_get
+        source = HNFirebaseSource()
+        source.fetch_stories('news', limit=3)
+        self.assertEqual(source.fetched, 3)
+
+        self.items[1]['score'] = 42
+        self.responses[f'{API}/updates.json'] = {'items': [1]}
+        self.requested.clear()
+        stories = source.fetch_stories('news', limit=3)
+
+        item_requests = [url for url in self.requested if '/item/' in url]
+        self.assertEqual(item_requests, [f'{API}/item/1.json'])
+        self.assertEqual(stories[0]['points'], 42)
+
+    @patch('requests.Session.get')
+    def test_expired_items_refetch_latest_score(self, mock_get):
+        """
+        测试缓存超过 stale_after 的条目即使不在 updates.json 中，也会重新抓取最新的分数和评论数。
+        """
+        mock_get.side_effect = self.fake_get
+        source = HNFirebaseSource(stale_after=0)
+        source.fetch_stories('news', limit=2)
+
+        self.items[1]['score'], self.items[1]['descendants'] = 42, 7
+        stories = source.fetch_stories('news', limit=2)
+        self.assertEqual((stories[0]['points'], stories[0]['comments']), (42, 7))
+
+    @patch('requests.Session.get')
+    def test_rank_is_position_in_original_list(self, mock_get):
+        """
+        测试排名取自条目在原列表中的位置，前面的条目抓取失败或被删除时后面的排名不会前移。
+        """
+        self.responses[f'{API}/topstories.json'] = [3, 4, 2, 1]
+
+        def fake_get(url, timeout=None):
+            if url == f'{API}/item/4.json':
+                raise ConnectionError("timeout")
+            return self.fake_get(url, timeout)
+        mock_get.side_effect = fake_get
+        stories = HNFirebaseSource().fetch_stories('news', limit=4)
+
+        self.assertEqual([(story['id'], story['rank']) for story in stories], [('2', 3), ('1', 4)])
+
+    @patch('requests.Session.get')
+    def test_client_firebase_source_merges_lists(self, mock_get):
+        """
+        测试 HackerNewsClient 使用 Firebase 数据源时，多个列表按 id 去重并记录来源。
+        """
+        mock_get.side_effect = self.fake_get
+        client = HackerNewsClient(lists=['best', 'news'], data_source='firebase')
+        stories = client.fetch_top_stories()
+
+        self.assertEqual([(s['id'], s['source'], s['rank']) for s in stories], [('2', 'best', 1), ('1', 'best', 2)])
+        self.assertEqual(len([url for url in self.requested if '/item/' in url]), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from hn_parser import parse_front_page  # 导入要测试的解析函数
+from hacker_news_client import HackerNewsClient
+
+# 与 news.ycombinator.com 列表页结构一致的片段：普通新闻、无评论的 Ask HN、招聘条目
+FRONT_PAGE = '''
+<table>
+<tr class="athing submission" id="41400001">
+  <td align="right" valign="top" class="title"><span class="rank">1.</span></td>
+  <td valign="top" class="votelinks"><center><a id="up_41400001" href="vote?id=41400001&amp;how=up"><div class="votearrow" title="upvote"></div></a></center></td>
+  <td class="title"><span class="titleline"><a href="https://example.com/rust">Small strings in Rust &amp; friends</a><span class="sitebit comhead"> (<a href="from?site=example.com"><span class="sitestr">example.com</span></a>)</span></span></td>
+</tr>
+<tr><td colspan="2"></td><td class="subtext"><span class="subline">
+  <span class="score" id="score_41400001">256 points</span> by <a href="user?id=alice" class="hnuser">alice</a>
+  <span class="age" title="2024-09-01T10:00:00"><a href="item?id=41400001">3 hours ago</a></span> <span id="unv_41400001"></span>
+  | <a href="hide?id=41400001&amp;goto=news">hide</a> | <a href="item?id=41400001">1,024&nbsp;comments</a>
+</span></td></tr>
+<tr class="spacer" style="height:5px"></tr>
+<tr class="athing submission" id="41400002">
+  <td align="right" valign="top" class="title"><span class="rank">2.</span></td>
+  <td class="title"><span class="titleline"><a href="item?id=41400002">Ask HN: What are you working on?</a></span></td>
+</tr>
+<tr><td colspan="2"></td><td class="subtext"><span class="subline">
+  <span class="score" id="score_41400002">1 point</span> by <a href="user?id=bob" class="hnuser">bob</a>
+  <span class="age" title="2024-09-01T12:00:00"><a href="item?id=41400002">5 minutes ago</a></span>
+  | <a href="item?id=41400002">discuss</a>
+</span></td></tr>
+<tr class="athing submission" id="41400003">
+  <td align="right" valign="top" class="title"><span class="rank">3.</span></td>
+  <td class="title"><span class="titleline"><a href="https://jobs.example.com">Example (YC S21) is hiring</a></span></td>
+</tr>
+<tr><td colspan="2"></td><td class="subtext">
+  <span class="age" title="2024-09-01T08:00:00"><a href="item?id=41400003">6 hours ago</a></span>
+</td></tr>
+</table>
+'''
+
+
+class TestHNParser(unittest.TestCase):
+    def test_parse_front_page_extracts_all_fields(self):
+        """
+        测试一次解析即可提取 id、排名、标题、链接、分数、评论数和发布时间。
+        """
+        stories = parse_front_page(FRONT_PAGE)
+        self.assertEqual(stories, [
+            {'id': '41400001', 'rank': 1, 'title': 'Small strings in Rust & friends',
+             'link': 'https://example.com/rust', 'points': 256, 'comments': 1024,
+             'age': '3 hours ago', 'posted_at': '2024-09-01T10:00:00'},
+            {'id': '41400002', 'rank': 2, 'title': 'Ask HN: What are you working on?',
+             'link': 'item?id=41400002', 'points': 1, 'comments': 0,
+             'age': '5 minutes ago', 'posted_at': '2024-09-01T12:00:00'},
+            {'id': '41400003', 'rank': 3, 'title': 'Example (YC S21) is hiring',
+             'link': 'https://jobs.example.com', 'points': None, 'comments': None,
+             'age': '6 hours ago', 'posted_at': '2024-09-01T08:00:00'},
+        ])
+
+    def test_fast_path_matches_beautifulsoup(self):
+        """
+        测试快速解析与 BeautifulSoup 解析得到相同的 id、标题和链接。
+        """
+        client = HackerNewsClient()
+        fast = [(s['id'], s['title'], s['link']) for s in client.parse_stories(FRONT_PAGE)]
+        slow = [(s['id'], s['title'], s['link']) for s in client._parse_stories_bs4(FRONT_PAGE)]
+        self.assertEqual(fast, slow)
+
+    def test_empty_page(self):
+        """
+        测试没有新闻的页面返回空列表。
+        """
+        self.assertEqual(parse_front_page('<html></html>'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
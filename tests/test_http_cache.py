@@ -0,0 +1,125 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from http_cache import HttpCache  # 导入要测试的 HttpCache 类
+from github_client import GitHubClient
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时缓存目录。
+        """
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = HttpCache(self.cache_dir, max_size_mb=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_put_and_conditional_headers(self):
+        """
+        测试保存响应后能生成条件请求头，并在命中时返回缓存内容。
+        """
+        key = HttpCache.make_key("https://api.github.com/x", {"per_page": 100})
+        self.assertEqual(self.cache.conditional_headers(key), {})
+
+        self.cache.put(key, [{"number": 1}], etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+        headers = self.cache.conditional_headers(key)
+        self.assertEqual(headers["If-None-Match"], '"abc"')
+        self.assertEqual(headers["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+
+        body, next_url = self.cache.get(key)
+        self.assertEqual(body, [{"number": 1}])
+        self.assertIsNone(next_url)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_index_persists_across_instances(self):
+        """
+        测试缓存索引落盘后可被新的实例读取。
+        """
+        key = HttpCache.make_key("https://api.github.com/x")
+        self.cache.put(key, ["a"], etag='"1"')
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, HttpCache.INDEX_FILE)))  # 索引只在 flush 时写入
+        self.cache.flush()
+        reloaded = HttpCache(self.cache_dir)
+        self.assertEqual(reloaded.get(key), (["a"], None))
+        self.assertEqual(reloaded.stats()["size_bytes"], len('["a"]'))
+
+    def test_unreadable_body_releases_its_size(self):
+        """
+        测试响应体无法读取时移除条目，并从缓存总大小中扣除。
+        """
+        key = HttpCache.make_key("https://api.github.com/x")
+        self.cache.put(key, ["a"], etag='"1"')
+        os.remove(os.path.join(self.cache_dir, f"{key}.json"))
+
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.stats()["size_bytes"], 0)
+
+    def test_index_rebuilt_after_crash(self):
+        """
+        测试索引写回前进程退出时，重新加载会清理未被索引的响应体和临时文件，总大小与磁盘一致。
+        """
+        kept, lost = HttpCache.make_key("https://api.github.com/kept"), HttpCache.make_key("https://api.github.com/lost")
+        self.cache.put(kept, ["a"], etag='"1"')
+        self.cache.flush()
+        self.cache.put(lost, ["b" * 100], etag='"2"')  # 未写回索引即退出
+        with open(os.path.join(self.cache_dir, f"{kept}.json.123.tmp"), 'w') as f:
+            f.write("partial")
+        with open(os.path.join(self.cache_dir, "README"), 'w') as f:
+            f.write("not a cache file")
+
+        reloaded = HttpCache(self.cache_dir)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), sorted([f"{kept}.json", HttpCache.INDEX_FILE, "README"]))
+        self.assertEqual(reloaded.stats()["size_bytes"], len('["a"]'))
+        self.assertEqual(reloaded.stats()["entries"], 1)
+
+    def test_lru_eviction(self):
+        """
+        测试超过容量上限时淘汰最久未使用的条目。
+        """
+        cache = HttpCache(self.cache_dir, max_size_mb=0.0001)  # 约 104 字节
+        first, second, third = (HttpCache.make_key(f"https://api.github.com/{i}") for i in range(3))
+        cache.put(first, "x" * 40, etag='"1"')
+        cache.put(second, "y" * 40, etag='"2"')
+        cache.get(first)  # 访问 first，使 second 成为最久未使用
+        cache.put(third, "z" * 40, etag='"3"')
+
+        self.assertIsNotNone(cache.get(first))
+        self.assertIsNone(cache.get(second))
+        self.assertIsNotNone(cache.get(third))
+
+    @patch('requests.Session.get')
+    def test_github_client_serves_304_from_cache(self, mock_get):
+        """
+        测试 GitHubClient 在收到 304 时使用缓存内容，并携带条件请求头。
+        """
+        client = GitHubClient("fake_token", cache=self.cache)
+
+        full_response = MagicMock()
+        full_response.status_code = 200
+        full_response.json.return_value = [{"number": 7, "title": "Cached"}]
+        full_response.links = {}
+        full_response.headers = {"ETag": '"v1"'}
+        not_modified = MagicMock()
+        not_modified.status_code = 304
+        mock_get.side_effect = [full_response, not_modified]
+
+        first = client.fetch_issues("owner/repo")
+        second = client.fetch_issues("owner/repo")
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_get.call_args_list[1].kwargs["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import sys
+import os
+import unittest
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import http_session  # 导入要测试的 http_session 模块
+from github_client import GitHubClient
+from hacker_news_client import HackerNewsClient
+
+
+class TestHttpSession(unittest.TestCase):
+    def test_host_pool_sizes_override_default_adapter(self):
+        """
+        测试按主机配置的连接池大小会覆盖默认适配器。
+        """
+        session = http_session.build_session(pool_maxsize=4, max_retries=2, host_pool_sizes={"api.github.com": 16})
+        github_adapter = session.get_adapter("https://api.github.com/repos/a/b/issues")
+        default_adapter = session.get_adapter("https://news.ycombinator.com/")
+
+        self.assertEqual(github_adapter._pool_maxsize, 16)
+        self.assertEqual(default_adapter._pool_maxsize, 4)
+        self.assertEqual(default_adapter._pool_connections, http_session.DEFAULT_POOL_CONNECTIONS)
+        self.assertEqual(github_adapter.max_retries.total, 2)
+        # POST 请求不自动重试，避免重复提交 LLM 生成
+        self.assertNotIn('POST', github_adapter.max_retries.allowed_methods)
+
+    def test_github_adapter_leaves_rate_limits_to_rate_limiter(self):
+        """
+        测试 GitHub 适配器不按 Retry-After 自行等待重试，也不重试 403/429，由 RateLimiter 统一暂停。
+        """
+        session = http_session.build_session()
+        github_retry = session.get_adapter("https://api.github.com/graphql").max_retries
+        default_retry = session.get_adapter("https://news.ycombinator.com/").max_retries
+
+        self.assertFalse(github_retry.respect_retry_after_header)
+        for status in (403, 429):
+            self.assertNotIn(status, github_retry.status_forcelist)
+        self.assertTrue(default_retry.respect_retry_after_header)
+
+    def test_clients_share_configured_session(self):
+        """
+        测试未显式注入会话时，各客户端复用同一个共享会话。
+        """
+        session = http_session.configure_shared_session({"pool_maxsize": 2, "pool_connections": 5})
+        self.assertEqual(session.get_adapter("https://news.ycombinator.com/")._pool_connections, 5)
+        self.assertIs(http_session.get_shared_session(), session)
+        self.assertIs(GitHubClient("fake_token").session, session)
+        self.assertIs(HackerNewsClient().session, session)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from job_executor import JobExecutor  # 导入要测试的 JobExecutor 类
+
+
+class TestJobExecutor(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建任务执行器。
+        """
+        self.executor = JobExecutor(max_workers=2, timeouts={'slow_job': 5})
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown()
+
+    def slow_job(self):
+        self.started.set()
+        self.release.wait(5)
+        return "slow done"
+
+    def test_shutdown_cancels_queued_jobs(self):
+        """
+        测试不等待关闭时，排队中的任务被取消，运行中的任务不受影响。
+        """
+        executor = JobExecutor(max_workers=1)
+        running = executor.submit('slow_job', self.slow_job)
+        self.assertTrue(self.started.wait(5))
+        queued = executor.submit('other_job', lambda: "other done")
+
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.assertTrue(queued.cancelled())
+        self.release.set()
+        self.assertEqual(running.result(5), "slow done")
+
+    def test_same_job_does_not_overlap(self):
+        """
+        测试同名任务尚未结束时，再次触发会被跳过。
+        """
+        first = self.executor.submit('slow_job', self.slow_job)
+        self.assertTrue(self.started.wait(5))
+        self.assertIsNone(self.executor.submit('slow_job', self.slow_job))
+
+        self.release.set()
+        self.assertEqual(first.result(5), "slow done")
+        stats = self.executor.stats()['jobs']['slow_job']
+        self.assertEqual((stats['submitted'], stats['succeeded'], stats['skipped']), (1, 1, 1))
+
+    def test_other_jobs_run_while_slow_job_is_running(self):
+        """
+        测试耗时任务运行期间，其他任务可以独立执行。
+        """
+        self.executor.submit('slow_job', self.slow_job)
+        self.assertTrue(self.started.wait(5))
+
+        quick = self.executor.submit('quick_job', lambda: "quick done")
+        self.assertEqual(quick.result(5), "quick done")
+        self.assertEqual(self.executor.stats()['running'], ['slow_job'])
+
+    def test_failures_are_counted(self):
+        """
+        测试任务抛出异常时记录失败次数，不影响执行器继续运行。
+        """
+        def failing_job():
+            raise RuntimeError("boom")
+
+        self.executor.submit('failing_job', failing_job).result(5)
+        self.assertEqual(self.executor.stats()['jobs']['failing_job']['failed'], 1)
+        self.assertEqual(self.executor.submit('failing_job', lambda: "ok").result(5), "ok")
+
+    def test_timeout_is_reported_once(self):
+        """
+        测试运行超时的任务只告警一次。
+        """
+        self.executor.submit('slow_job', self.slow_job)
+        self.assertTrue(self.started.wait(5))
+
+        started_at = self.executor._running['slow_job']['started_at']
+        with patch('job_executor.time.monotonic', return_value=started_at + 10):
+            self.executor.check_timeouts()
+            self.executor.check_timeouts()
+        self.assertEqual(self.executor.stats()['jobs']['slow_job']['timeouts'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -40,7 +40,7 @@ class TestLLM(unittest.TestCase):
             llm = LLM(self.config)
         mock_log_error.assert_called_with("不支持的模型类型: invalid_model")
 
-    @patch('llm.requests.post')
+    @patch('requests.Session.post')
     @patch('llm.LOG.error')
     def test_ollama_invalid_response_structure(self, mock_log_error, mock_post):
         """
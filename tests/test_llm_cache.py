@@ -0,0 +1,133 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from config import Config  # 导入配置类
+from llm import LLM
+from llm_cache import LLMCache  # 导入要测试的 LLMCache 类
+
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时缓存目录。
+        """
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = LLMCache(self.cache_dir, ttl_hours=1, max_size_mb=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_key_depends_on_all_inputs(self):
+        """
+        测试缓存键随模型、参数、系统提示或用户内容变化。
+        """
+        base = LLMCache.make_key("ollama:llama3", {"temperature": 0.3}, "sys", "user")
+        self.assertEqual(base, LLMCache.make_key("ollama:llama3", {"temperature": 0.3}, "sys", "user"))
+        self.assertNotEqual(base, LLMCache.make_key("ollama:qwen2", {"temperature": 0.3}, "sys", "user"))
+        self.assertNotEqual(base, LLMCache.make_key("ollama:llama3", {"temperature": 0.5}, "sys", "user"))
+        self.assertNotEqual(base, LLMCache.make_key("ollama:llama3", {"temperature": 0.3}, "sys2", "user"))
+        self.assertNotEqual(base, LLMCache.make_key("ollama:llama3", {"temperature": 0.3}, "sys", "user2"))
+
+    def test_get_put_and_hit_rate(self):
+        """
+        测试写入后命中缓存，并统计命中率。
+        """
+        self.assertIsNone(self.cache.get("k"))
+        self.cache.put("k", "报告内容")
+        self.assertEqual(self.cache.get("k"), "报告内容")
+        self.assertEqual(LLMCache(self.cache_dir).get("k"), "报告内容")  # 持久化到磁盘
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 0.5)
+
+    def test_expired_entries_are_dropped(self):
+        """
+        测试超过 TTL 的条目失效。
+        """
+        cache = LLMCache(self.cache_dir, ttl_hours=0)
+        cache.put("k", "content")
+        with patch('llm_cache.time.time', return_value=10 ** 10):
+            self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_size_eviction(self):
+        """
+        测试超过容量上限时淘汰最久未使用的条目。
+        """
+        cache = LLMCache(self.cache_dir, max_size_mb=0.0002)  # 约 209 字节
+        cache.put("a", "x" * 100)
+        cache.put("b", "y" * 100)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "y" * 100)
+
+    def test_size_total_tracks_overwrites(self):
+        """
+        测试覆盖和淘汰条目后统计的缓存大小保持准确。
+        """
+        cache = LLMCache(self.cache_dir)
+        cache.put("a", "x" * 100)
+        cache.put("a", "x" * 40)
+        cache.put("b", "y" * 10)
+        self.assertEqual(cache.stats()["size_bytes"], self._disk_size())
+        with patch('llm_cache.time.time', return_value=10 ** 10):
+            cache.get("a")
+        self.assertEqual(cache.stats()["size_bytes"], self._disk_size())
+        self.assertEqual(LLMCache(self.cache_dir).stats()["size_bytes"], self._disk_size())
+
+    def _disk_size(self):
+        return sum(os.path.getsize(os.path.join(self.cache_dir, name)) for name in os.listdir(self.cache_dir))
+
+    @patch('requests.Session.post')
+    def test_llm_uses_cache_for_identical_requests(self, mock_post):
+        """
+        测试相同的请求第二次直接返回缓存内容，不再调用模型。
+        """
+        config = Config()
+        config.llm_model_type = "ollama"
+        llm = LLM(config, cache=self.cache)
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"message": {"content": "Generated report content"}}
+        mock_post.return_value = mock_response
+
+        first = llm.generate_report("same content", "same prompt")
+        second = llm.generate_report("same content", "same prompt")
+
+        self.assertEqual(first, second)
+        mock_post.assert_called_once()
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    @patch('requests.Session.post')
+    def test_llm_stream_yields_chunks_and_caches_result(self, mock_post):
+        """
+        测试 Ollama 流式输出按片段产出，完整结果写入缓存，再次请求直接返回缓存。
+        """
+        config = Config()
+        config.llm_model_type = "ollama"
+        llm = LLM(config, cache=self.cache)
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_lines.return_value = [
+            b'{"message": {"content": "Generated "}, "done": false}',
+            b'',
+            b'{"message": {"content": "report"}, "done": false}',
+            b'{"message": {"content": ""}, "done": true}',
+        ]
+        mock_post.return_value = mock_response
+
+        chunks = list(llm.generate_report_stream("same content", "same prompt"))
+        self.assertEqual(chunks, ["Generated ", "report"])
+        self.assertTrue(mock_post.call_args.kwargs["stream"])
+
+        self.assertEqual(list(llm.generate_report_stream("same content", "same prompt")), ["Generated report"])
+        mock_post.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+# 将 src 目录添加到模块搜索路径，方便导入项目中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from notification_dispatcher import (  # 导入要测试的分发器和通知渠道
+    NotificationDispatcher, NotificationSink, SlackWebhookSink, FileOutboxSink, build_sinks,
+)
+from notifier import Notifier  # 导入通知器类
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    # 本地 Slack Webhook 替身：记录请求体，前 failures 次请求返回 500
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        with server.lock:
+            server.requests.append(json.loads(body))
+            fail = server.failures > 0
+            server.failures -= 1
+        self.send_response(500 if fail else 200)
+        self.end_headers()
+        self.wfile.write(b'error' if fail else b'ok')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FailingSink(NotificationSink):
+    name = 'broken'
+
+    def send(self, subject, report, report_path=None):
+        raise RuntimeError("渠道不可用")
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _WebhookHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.failures = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.webhook_url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        self.session = requests.Session()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.session.close()
+        self.tmpdir.cleanup()
+
+    def test_slack_sink_posts_mrkdwn(self):
+        """
+        测试 Slack 渠道向 Webhook 发送 mrkdwn 格式的消息。
+        """
+        sink = SlackWebhookSink(self.webhook_url, session=self.session)
+        dispatcher = NotificationDispatcher([sink], backoff=0)
+
+        results = dispatcher.dispatch("[GitHub] repo 进展简报", "# 新增功能\n\n- [PR](https://x.com/1)")
+
+        self.assertEqual(results, {'slack': True})
+        text = self.server.requests[0]['text']
+        self.assertTrue(text.startswith("*[GitHub] repo 进展简报*"))
+        self.assertIn("*新增功能*", text)
+        self.assertIn("• <https://x.com/1|PR>", text)
+
+    def test_retry_with_backoff_until_success(self):
+        """
+        测试渠道失败后重试，成功后统计中记录重试次数。
+        """
+        self.server.failures = 2
+        dispatcher = NotificationDispatcher([SlackWebhookSink(self.webhook_url, session=self.session)],
+                                            max_retries=3, backoff=0)
+
+        self.assertEqual(dispatcher.dispatch("subject", "report"), {'slack': True})
+        self.assertEqual(len(self.server.requests), 3)
+        stats = dispatcher.stats()['slack']
+        self.assertEqual((stats['sent'], stats['failed'], stats['retries']), (1, 0, 2))
+        self.assertGreater(stats['latency_max'], 0)
+
+    def test_failing_sink_does_not_block_others(self):
+        """
+        测试单个渠道重试耗尽后失败，其他渠道仍然正常发送。
+        """
+        outbox = os.path.join(self.tmpdir.name, 'outbox')
+        sinks = [_FailingSink(), SlackWebhookSink(self.webhook_url, session=self.session), FileOutboxSink(outbox)]
+        dispatcher = NotificationDispatcher(sinks, max_retries=1, backoff=0)
+
+        results = dispatcher.dispatch("[HackerNews] 2024-09-01 技术趋势", "# 趋势")
+
+        self.assertEqual(results, {'broken': False, 'slack': True, 'outbox': True})
+        self.assertEqual(dispatcher.stats()['broken']['failed'], 1)
+        self.assertEqual(dispatcher.stats()['broken']['retries'], 1)
+        files = os.listdir(outbox)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith('_HackerNews_2024-09-01_技术趋势.md'))
+        with open(os.path.join(outbox, files[0]), encoding='utf-8') as f:
+            self.assertIn("# 趋势", f.read())
+
+    def test_build_sinks_skips_placeholder_webhook(self):
+        """
+        测试未配置真实 Webhook 地址时不创建 Slack 渠道。
+        """
+        self.assertEqual(build_sinks("your_slack_webhook_url", {}), [])
+        sinks = build_sinks(self.webhook_url, {'outbox': {'enabled': True, 'dir': self.tmpdir.name}})
+        self.assertEqual([sink.name for sink in sinks], ['slack', 'outbox'])
+
+    @patch('smtplib.SMTP_SSL')
+    def test_notifier_fans_out_to_email_and_slack(self, mock_smtp):
+        """
+        测试通知器配置其他渠道后，报告同时发送到邮件和 Slack。
+        """
+        email_settings = {'smtp_server': 'smtp.example.com', 'smtp_port': 465,
+                          'from': 'a@example.com', 'password': '', 'to': 'b@example.com'}
+        notifier = Notifier(email_settings, sinks=[SlackWebhookSink(self.webhook_url, session=self.session)],
+                            backoff=0)
+        results = []
+
+        with notifier.batch():
+            self.assertTrue(notifier.notify_github_report("repo/a", "Report A", callback=results.append))
+
+        mock_smtp.return_value.sendmail.assert_called_once()
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(results, [True])
+        self.assertEqual(notifier.dispatcher.stats()['email']['sent'], 1)
+
+    def test_retry_skips_delivered_sinks(self):
+        """
+        测试重新通知时只发送上次失败的渠道，已成功的 Slack 和发件箱不会收到重复的报告。
+        """
+        outbox = os.path.join(self.tmpdir.name, 'outbox')
+        failing = _FailingSink()
+        notifier = Notifier({}, sinks=[failing, SlackWebhookSink(self.webhook_url, session=self.session),
+                                       FileOutboxSink(outbox)], max_retries=0)
+        delivered = []
+
+        self.assertFalse(notifier.notify_github_report("repo/a", "Report A", delivered=delivered))
+        self.assertEqual(sorted(delivered), ['outbox', 'slack'])
+
+        failing.send = lambda subject, report, report_path=None: None  # 渠道恢复
+        self.assertTrue(notifier.notify_github_report("repo/a", "Report A", delivered=delivered))
+        self.assertEqual(sorted(delivered), ['broken', 'outbox', 'slack'])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(os.listdir(outbox)), 1)
+
+    @patch('smtplib.SMTP_SSL')
+    def test_digest_retry_skips_delivered_sinks(self, mock_smtp):
+        """
+        测试摘要模式下重新通知的仓库同样跳过已发送成功的渠道，新仓库照常发送到所有渠道。
+        """
+        email_settings = {'smtp_server': 'smtp.example.com', 'smtp_port': 465, 'digest': True,
+                          'from': 'a@example.com', 'password': '', 'to': 'b@example.com'}
+        notifier = Notifier(email_settings, sinks=[SlackWebhookSink(self.webhook_url, session=self.session)],
+                            backoff=0)
+        retried, fresh, results = ['slack'], [], []
+
+        with notifier.batch():
+            notifier.notify_github_report("repo/a", "Report A", callback=results.append, delivered=retried)
+            notifier.notify_github_report("repo/b", "Report B", callback=results.append, delivered=fresh)
+
+        self.assertEqual(mock_smtp.return_value.sendmail.call_count, 2)  # 两组摘要都需要发送邮件
+        self.assertEqual(len(self.server.requests), 1)  # Slack 只收到新仓库的摘要
+        self.assertNotIn("repo/a", json.dumps(self.server.requests[0], ensure_ascii=False))
+        self.assertEqual(sorted(retried), ['email', 'slack'])
+        self.assertEqual(sorted(fresh), ['email', 'slack'])
+        self.assertEqual(results, [True, True])
+
+    def test_sink_requires_send(self):
+        """
+        测试通知渠道基类为抽象类，未实现 send 的子类不能实例化。
+        """
+        class _IncompleteSink(NotificationSink):
+            name = 'incomplete'
+
+        with self.assertRaises(TypeError):
+            _IncompleteSink()
+
+    def test_notifier_reports_failure_when_a_sink_fails(self):
+        """
+        测试任一渠道发送失败时通知结果为失败，以便任务队列在恢复时重新通知。
+        """
+        notifier = Notifier({}, sinks=[_FailingSink(), FileOutboxSink(self.tmpdir.name)], max_retries=0)
+        self.assertFalse(notifier.notify_hn_report("2024-09-01", "report"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,9 @@
 import sys
 import os
+import email
+from email.header import decode_header, make_header
+import smtplib
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 from io import StringIO
@@ -84,6 +88,133 @@ class TestNotifier(unittest.TestCase):
         log_content = self.log_capture.getvalue()
         self.assertIn("邮件设置未配置正确", log_content)
 
+    @patch('smtplib.SMTP_SSL')
+    def test_email_has_text_and_html_alternatives(self, mock_smtp):
+        """
+        测试邮件为 multipart/alternative，包含纯文本和内联样式的 HTML 两部分。
+        """
+        self.notifier.notify_github_report(self.test_repo, "# Title\n\n- item")
+
+        message = email.message_from_string(mock_smtp.return_value.sendmail.call_args.args[2])
+        self.assertEqual(message.get_content_type(), 'multipart/alternative')
+        text, html = message.get_payload()
+        self.assertEqual(text.get_content_type(), 'text/plain')
+        self.assertIn("# Title", text.get_payload(decode=True).decode('utf-8'))
+        self.assertEqual(html.get_content_type(), 'text/html')
+        self.assertIn('<h1 style="', html.get_payload(decode=True).decode('utf-8'))
+
+    @patch('smtplib.SMTP_SSL')
+    def test_batch_reuses_one_smtp_session(self, mock_smtp):
+        """
+        测试批量发送期间只建立一次 SMTP 连接和登录，退出时关闭会话。
+        """
+        with self.notifier.batch():
+            for i in range(3):
+                self.assertTrue(self.notifier.notify_github_report(f"repo/{i}", self.test_github_report))
+
+        mock_smtp.assert_called_once()
+        server = mock_smtp.return_value
+        server.login.assert_called_once()
+        self.assertEqual(server.sendmail.call_count, 3)
+        server.quit.assert_called_once()
+
+    @patch('smtplib.SMTP_SSL')
+    def test_batch_reconnects_after_disconnect(self, mock_smtp):
+        """
+        测试会话断开时自动重连并重发当前邮件。
+        """
+        broken, healthy = MagicMock(), MagicMock()
+        broken.sendmail.side_effect = smtplib.SMTPServerDisconnected("connection closed")
+        mock_smtp.side_effect = [broken, healthy]
+
+        with self.notifier.batch():
+            self.assertTrue(self.notifier.notify_github_report(self.test_repo, self.test_github_report))
+
+        self.assertEqual(mock_smtp.call_count, 2)
+        healthy.sendmail.assert_called_once()
+
+    @patch('smtplib.SMTP_SSL')
+    def test_digest_mode_sends_one_email(self, mock_smtp):
+        """
+        测试摘要模式下批量期间的 GitHub 报告合并为一封邮件，并通知每个回调。
+        """
+        notifier = Notifier(dict(self.config.email, digest=True))
+        results = []
+        with notifier.batch():
+            notifier.notify_github_report("repo/a", "Report A", callback=results.append)
+            notifier.notify_github_report("repo/b", "Report B", callback=results.append)
+            mock_smtp.return_value.sendmail.assert_not_called()
+
+        sendmail = mock_smtp.return_value.sendmail
+        sendmail.assert_called_once()
+        message = email.message_from_string(sendmail.call_args.args[2])
+        html = message.get_payload()[1].get_payload(decode=True).decode('utf-8')
+        self.assertIn(">repo/a</h1>", html)
+        self.assertIn(">repo/b</h1>", html)
+        self.assertEqual(results, [True, True])
+
+    @patch('smtplib.SMTP_SSL')
+    def test_digest_includes_no_activity_entries(self, mock_smtp):
+        """
+        测试摘要模式下没有活动的仓库以模板条目加入摘要；非摘要模式下不发送。
+        """
+        self.assertFalse(self.notifier.notify_no_activity("repo/q", "本周期没有新的活动"))
+
+        notifier = Notifier(dict(self.config.email, digest=True))
+        results = []
+        with notifier.batch():
+            notifier.notify_github_report("repo/a", "Report A", callback=results.append)
+            self.assertTrue(notifier.notify_no_activity("repo/q", "本周期没有新的活动", callback=results.append))
+
+        message = email.message_from_string(mock_smtp.return_value.sendmail.call_args.args[2])
+        html = message.get_payload()[1].get_payload(decode=True).decode('utf-8')
+        self.assertIn(">repo/q</h1>", html)
+        self.assertIn("本周期没有新的活动", html)
+        self.assertEqual(results, [True, True])
+
+    @patch('smtplib.SMTP_SSL')
+    def test_concurrent_batches_share_one_digest(self, mock_smtp):
+        """
+        测试多个线程同时批量发送时，摘要条目不会丢失，最后一个退出的线程发送一封摘要。
+        """
+        notifier = Notifier(dict(self.config.email, digest=True))
+        results = []
+        barrier = threading.Barrier(8)
+
+        def job(i):
+            with notifier.batch():
+                barrier.wait(5)  # 所有线程都进入批量后再通知
+                notifier.notify_github_report(f"repo/{i}", f"Report {i}", callback=results.append)
+                barrier.wait(5)
+        threads = [threading.Thread(target=job, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        sendmail = mock_smtp.return_value.sendmail
+        sendmail.assert_called_once()
+        subject = email.message_from_string(sendmail.call_args.args[2])['Subject']
+        self.assertIn("8 个仓库", str(make_header(decode_header(subject))))
+        self.assertEqual(results, [True] * 8)
+
+    @patch('smtplib.SMTP_SSL')
+    def test_background_delivery_does_not_block(self, mock_smtp):
+        """
+        测试后台模式下通知立即返回，批量结束时等待队列发送完毕。
+        """
+        release = threading.Event()
+        mock_smtp.return_value.sendmail.side_effect = lambda *args: release.wait(5)
+        notifier = Notifier(dict(self.config.email, background=True))
+        results = []
+
+        with notifier.batch():
+            self.assertTrue(notifier.notify_github_report(self.test_repo, "Report", callback=results.append))
+            self.assertEqual(results, [])  # 尚未发送完成
+            release.set()
+
+        self.assertEqual(results, [True])
+
 
 if __name__ == '__main__':
     unittest.main()
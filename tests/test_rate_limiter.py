@@ -0,0 +1,116 @@
+import sys
+import os
+import time
+import threading
+import unittest
+from email.utils import formatdate
+from unittest.mock import patch, MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from rate_limiter import RateLimiter  # 导入要测试的 RateLimiter 类
+from github_client import GitHubClient
+
+
+def make_response(status_code=200, headers=None, text="", body=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.text = text
+    response.json.return_value = body if body is not None else []
+    response.links = {}
+    return response
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_update_from_headers(self):
+        """
+        测试根据响应头同步剩余额度，且令牌数不超过剩余额度。
+        """
+        limiter = RateLimiter(burst=100)
+        reset = time.time() + 600
+        limiter.update({"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "3", "X-RateLimit-Reset": str(reset)})
+
+        self.assertEqual(limiter.remaining, 3)
+        self.assertEqual(limiter.reset_at, reset)
+        self.assertLessEqual(limiter.tokens, 3)
+
+    def test_acquire_blocks_while_paused(self):
+        """
+        测试暂停期间请求被阻塞，到期后自动恢复。
+        """
+        limiter = RateLimiter(burst=10)
+        limiter.pause(0.2)
+        started = time.time()
+        limiter.acquire()
+        self.assertGreaterEqual(time.time() - started, 0.15)
+
+    def test_retry_delay(self):
+        """
+        测试识别主/次级速率限制响应，以及普通 403 不被视为速率限制。
+        """
+        limiter = RateLimiter()
+        self.assertIsNone(limiter.retry_delay(make_response(200)))
+        self.assertEqual(limiter.retry_delay(make_response(403, {"Retry-After": "30"})), 30)
+        reset = str(time.time() + 10)
+        delay = limiter.retry_delay(make_response(403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset}))
+        self.assertTrue(9 <= delay <= 12)
+        self.assertEqual(limiter.retry_delay(make_response(403, text="You have exceeded a secondary rate limit")),
+                         RateLimiter.DEFAULT_SECONDARY_WAIT)
+        self.assertIsNone(limiter.retry_delay(make_response(403, text="Resource not accessible")))
+
+    def test_retry_after_http_date(self):
+        """
+        测试 Retry-After 为 HTTP 日期时换算为等待秒数，无法解析时按次级速率限制处理。
+        """
+        limiter = RateLimiter()
+        retry_at = formatdate(time.time() + 20, usegmt=True)
+        delay = limiter.retry_delay(make_response(429, {"Retry-After": retry_at}))
+        self.assertTrue(18 <= delay <= 21)
+        past = formatdate(time.time() - 60, usegmt=True)
+        self.assertEqual(limiter.retry_delay(make_response(429, {"Retry-After": past})), 0)
+        self.assertEqual(limiter.retry_delay(make_response(429, {"Retry-After": "soon"})),
+                         RateLimiter.DEFAULT_SECONDARY_WAIT)
+
+    def test_higher_priority_released_first(self):
+        """
+        测试额度不足时，高优先级的等待请求先被放行。
+        """
+        limiter = RateLimiter(burst=1)
+        limiter.pause(0.2)  # 先让两个请求都进入排队
+        order = []
+
+        def worker(name, priority):
+            with limiter.priority(priority):
+                limiter.acquire()
+                order.append(name)
+
+        low = threading.Thread(target=worker, args=("low", 0))
+        low.start()
+        time.sleep(0.05)
+        high = threading.Thread(target=worker, args=("high", 10))
+        high.start()
+        low.join(5)
+        high.join(5)
+        self.assertEqual(order[0], "high")
+
+    @patch('requests.Session.get')
+    def test_github_client_retries_after_rate_limit(self, mock_get):
+        """
+        测试 GitHubClient 被速率限制后暂停并重试，而不是返回空结果。
+        """
+        limiter = RateLimiter()
+        client = GitHubClient("fake_token", rate_limiter=limiter)
+        mock_get.side_effect = [
+            make_response(429, {"Retry-After": "0.1"}),
+            make_response(200, body=[{"number": 1, "title": "Fix"}]),
+        ]
+
+        issues = client.fetch_issues("owner/repo")
+        self.assertEqual(issues, [{"number": 1, "title": "Fix"}])
+        self.assertEqual(mock_get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
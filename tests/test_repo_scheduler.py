@@ -0,0 +1,132 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from event_store import EventStore
+from repo_scheduler import RepoScheduler  # 导入要测试的 RepoScheduler 类
+from subscription_manager import SubscriptionManager
+
+
+class TestRepoScheduler(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时订阅文件和事件库：hot/repo 每天 10 个事件，quiet/repo 两周内 2 个事件。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        subscriptions_file = os.path.join(self.tmp_dir, 'subscriptions.json')
+        with open(subscriptions_file, 'w') as f:
+            json.dump(["hot/repo", "quiet/repo", "dormant/repo"], f)
+        self.manager = SubscriptionManager(subscriptions_file)
+        self.store = EventStore(os.path.join(self.tmp_dir, 'sentinel.db'))
+        self.now = datetime(2024, 9, 15, 8, 0)
+
+        def commits(count, day):
+            return [{"sha": f"{day}-{i}", "commit": {"message": "change",
+                                                     "author": {"date": f"2024-09-{day:02d}T10:00:00Z"}}}
+                    for i in range(count)]
+        for day in range(2, 15):
+            self.store.merge_updates("hot/repo", {"commits": commits(10, day)})
+        self.store.merge_updates("quiet/repo", {"commits": commits(2, 10)})
+        self.scheduler = RepoScheduler(self.manager, self.store, jitter=0)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_new_repos_are_due_immediately(self):
+        """
+        测试从未运行过的仓库立即到期，且按优先级排序。
+        """
+        self.manager.update_subscription("dormant/repo", priority=5)
+        self.assertEqual(self.scheduler.due(self.now), ["dormant/repo", "hot/repo", "quiet/repo"])
+        self.assertEqual(self.scheduler.priorities(["dormant/repo", "hot/repo"]), {"dormant/repo": 5, "hot/repo": 0})
+
+    def test_reschedule_by_activity_tier(self):
+        """
+        测试按活跃度分档计算下次运行时间，到期前不会再次运行。
+        """
+        self.scheduler.reschedule(self.manager.list_subscriptions(), self.now)
+
+        schedules = self.scheduler.schedules()
+        self.assertEqual(schedules["hot/repo"]['tier'], 'hot')
+        self.assertEqual(schedules["hot/repo"]['next_run'], (self.now + timedelta(hours=6)).isoformat(timespec='seconds'))
+        self.assertEqual(schedules["quiet/repo"]['tier'], 'quiet')
+        self.assertEqual(schedules["dormant/repo"]['tier'], 'dormant')
+
+        self.assertEqual(self.scheduler.due(self.now + timedelta(hours=1)), [])
+        self.assertEqual(self.scheduler.due(self.now + timedelta(hours=7)), ["hot/repo"])
+        self.assertEqual(self.scheduler.due(self.now + timedelta(days=4)), ["hot/repo", "quiet/repo"])
+        self.assertEqual(self.scheduler.due(self.now + timedelta(days=4), exclude={"hot/repo"}), ["quiet/repo"])
+
+    def test_window_days_and_fixed_frequency(self):
+        """
+        测试抓取天数覆盖运行间隔，订阅设置的 frequency_days 优先于活跃度档位。
+        """
+        self.manager.update_subscription("quiet/repo", frequency_days=2)
+        self.scheduler.reschedule(self.manager.list_subscriptions(), self.now)
+
+        self.assertEqual(self.scheduler.schedules()["quiet/repo"]['tier'], 'fixed')
+        self.assertEqual(self.scheduler.group_by_window(self.manager.list_subscriptions()),
+                         {1: ["hot/repo"], 2: ["quiet/repo"], 7: ["dormant/repo"]})
+
+    def test_new_repo_activity_uses_observed_days(self):
+        """
+        测试刚订阅的仓库只抓取了一天的数据时，按实际观察天数而不是整个统计窗口计算活跃度。
+        """
+        self.manager.add_subscription("new/repo")
+        self.store.merge_updates("new/repo", {"commits": [
+            {"sha": f"n{i}", "commit": {"message": "change", "author": {"date": "2024-09-14T20:00:00Z"}}}
+            for i in range(6)
+        ]})
+        self.scheduler.reschedule(["new/repo"], self.now)
+
+        self.assertEqual(self.scheduler.schedules()["new/repo"]['tier'], 'hot')  # 6 个/天，而不是 6/14 个/天
+        self.assertEqual(self.scheduler.schedules()["new/repo"]['tracked_since'],
+                         (self.now - timedelta(days=1)).isoformat(timespec='seconds'))
+
+    def test_window_since_starts_at_last_run(self):
+        """
+        测试运行过的仓库从上次运行时间（UTC）开始抓取，从未运行的仓库不包含在内。
+        """
+        self.scheduler.reschedule(["hot/repo"], self.now)
+        expected = self.now.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.assertEqual(self.scheduler.window_since(["hot/repo", "quiet/repo"]), {"hot/repo": expected})
+
+    def test_spread_and_batch_limit(self):
+        """
+        测试同档位仓库的下次运行时间被错开，且每次最多处理 max_repos_per_run 个仓库。
+        """
+        scheduler = RepoScheduler(self.manager, None, max_repos_per_run=2)
+        self.assertEqual(len(scheduler.due(self.now)), 2)
+        scheduler.reschedule(self.manager.list_subscriptions(), self.now)
+        schedules = scheduler.schedules()
+        self.assertEqual(len({schedule['next_run'] for schedule in schedules.values()}), 3)
+        self.assertEqual(schedules["hot/repo"]['tier'], 'default')
+
+    def test_reschedule_keeps_subscription_file_untouched(self):
+        """
+        测试调度状态保存在事件库中，不写入订阅文件；其他进程对订阅文件的修改会被读取而不会被覆盖。
+        """
+        with open(self.manager.subscriptions_file) as f:
+            before = f.read()
+        self.scheduler.reschedule(self.manager.list_subscriptions(), self.now)
+        with open(self.manager.subscriptions_file) as f:
+            self.assertEqual(f.read(), before)
+
+        other = SubscriptionManager(self.manager.subscriptions_file)  # 例如命令行中的另一个管理器
+        other.add_subscription("new/repo", priority=3)
+        self.assertEqual(self.scheduler.due(self.now + timedelta(hours=1)), ["new/repo"])
+        self.scheduler.reschedule(["new/repo"], self.now)
+        self.assertIn("new/repo", SubscriptionManager(self.manager.subscriptions_file))
+        self.assertEqual(self.scheduler.schedules()["new/repo"]['tier'], 'dormant')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -7,6 +8,7 @@ from unittest.mock import MagicMock, patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
 from report_generator import ReportGenerator  # 导入要测试的 ReportGenerator 类
+from token_budget import count_tokens
 
 class TestReportGenerator(unittest.TestCase):
     def setUp(self):
@@ -65,6 +67,11 @@ class TestReportGenerator(unittest.TestCase):
         if os.path.exists(report_file_path):
             os.remove(report_file_path)
 
+        # 批量生成 GitHub 报告的测试也会为 Hacker News 话题文件生成报告
+        hn_github_report_path = os.path.splitext(self.test_hn_topic_file_path)[0] + "_report.md"
+        if os.path.exists(hn_github_report_path):
+            os.remove(hn_github_report_path)
+
         hn_topic_report_path = os.path.splitext(self.test_hn_topic_file_path)[0] + "_topic.md"
         if os.path.exists(hn_topic_report_path):
             os.remove(hn_topic_report_path)
@@ -107,6 +114,22 @@ class TestReportGenerator(unittest.TestCase):
         # 验证 LLM 的 generate_report 方法是否被正确调用，且传入了正确的参数
         self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["github"], self.markdown_content)
 
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_write_no_activity_report(self, mock_preload_prompts):
+        """
+        测试无活动仓库直接使用模板报告，不调用 LLM。
+        """
+        report_generator = ReportGenerator(self.mock_llm, ["github"])
+        report, report_file_path = report_generator.write_no_activity_report(
+            self.test_markdown_file_path, "DjangoPeng/openai-quickstart", 3
+        )
+
+        self.assertIn("# DjangoPeng/openai-quickstart 项目进展", report)
+        self.assertIn("最近 3 天内没有新的提交", report)
+        with open(report_file_path, 'r') as file:
+            self.assertEqual(file.read(), report)
+        self.mock_llm.generate_report.assert_not_called()
+
     @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
     def test_generate_hn_topic_report(self, mock_preload_prompts):
         """
@@ -164,5 +187,185 @@ class TestReportGenerator(unittest.TestCase):
         aggregated_content = self.report_generator._aggregate_topic_reports(self.test_hn_daily_dir_path)
         self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["hacker_news_daily_report"], aggregated_content)
 
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_github_report_stream(self, mock_preload_prompts):
+        """
+        测试 generate_github_report_stream 方法逐段产出报告，并在结束时返回报告文件路径。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = self.mock_prompts
+
+        # 模拟 LLM 流式返回的报告片段
+        self.mock_llm.generate_report_stream.return_value = iter(["This is ", "a streamed ", "report."])
+
+        outputs = list(self.report_generator.generate_github_report_stream(self.test_markdown_file_path))
+
+        # 生成过程中只返回部分报告，最后一次才返回文件路径
+        self.assertEqual([report for report, _ in outputs[:-1]], ["This is ", "This is a streamed ", "This is a streamed report."])
+        self.assertTrue(all(path is None for _, path in outputs[:-1]))
+        report, report_file_path = outputs[-1]
+        self.assertEqual(report, "This is a streamed report.")
+        self.assertTrue(report_file_path.endswith("_report.md"))
+
+        with open(report_file_path, 'r') as file:
+            self.assertEqual(file.read(), report)
+
+        self.mock_llm.generate_report_stream.assert_called_once_with(self.mock_prompts["github"], self.markdown_content)
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_github_reports_bounded_concurrency(self, mock_preload_prompts):
+        """
+        测试 generate_github_reports 并发生成报告，且同时进行的调用数不超过 max_concurrency。
+        """
+        state = {"running": 0, "peak": 0}
+
+        class FakeAsyncLLM:
+            model = "mock_model"
+
+            async def agenerate_report(self, system_prompt, content):
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+                await asyncio.sleep(0.01)
+                state["running"] -= 1
+                return f"report for {len(content)}"
+
+        self.report_generator = ReportGenerator(FakeAsyncLLM(), ["github"], max_concurrency=2)
+        self.report_generator.prompts = self.mock_prompts
+        paths = [self.test_markdown_file_path, self.test_hn_topic_file_path, self.test_markdown_file_path]
+        notified = []
+
+        results = self.report_generator.generate_github_reports(
+            paths, on_result=lambda index, report, path: notified.append(index)
+        )
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][1], os.path.splitext(self.test_markdown_file_path)[0] + "_report.md")
+        self.assertEqual(results[1][1], os.path.splitext(self.test_hn_topic_file_path)[0] + "_report.md")
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(sorted(notified), [0, 1, 2])
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_generate_github_reports_with_sync_llm(self, mock_preload_prompts):
+        """
+        测试同步 LLM 在批量接口中通过线程池调用。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"])
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.generate_report.return_value = "This is a generated report."
+
+        results = self.report_generator.generate_github_reports([self.test_markdown_file_path])
+
+        self.assertEqual(results[0][0], "This is a generated report.")
+        self.mock_llm.generate_report.assert_called_once_with(self.mock_prompts["github"], self.markdown_content)
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_oversized_input_is_map_reduced(self, mock_preload_prompts):
+        """
+        测试超出 token 预算的输入先分段摘要，再把摘要合并后生成最终报告。
+        """
+        self.mock_llm.generation_params = {"max_tokens": 100}
+        self.mock_llm.base_system_prompt = ""
+        self.report_generator = ReportGenerator(self.mock_llm, ["github"], context_tokens=600)
+        self.report_generator.prompts = self.mock_prompts
+        self.mock_llm.generate_report.side_effect = lambda prompt, content: (
+            "Final report." if content.startswith("以下是") else "Partial summary."
+        )
+
+        large_content = "".join(f"- Fix bug number {i} in the parser module\n" for i in range(300))
+        with open(self.test_markdown_file_path, 'w') as file:
+            file.write(large_content)
+
+        report, _ = self.report_generator.generate_github_report(self.test_markdown_file_path)
+
+        self.assertEqual(report, "Final report.")
+        calls = self.mock_llm.generate_report.call_args_list
+        self.assertGreater(len(calls), 2)
+        budget = self.report_generator._input_budget(self.mock_prompts["github"])
+        for call in calls:
+            self.assertLessEqual(count_tokens(call.args[1]), budget)
+        self.assertTrue(calls[-1].args[1].startswith("以下是"))
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_batch_map_step_shares_concurrency_limit(self, mock_preload_prompts):
+        """
+        测试批量生成时分段摘要也经过异步 LLM，与其他报告共用并发上限，失败的分段摘要不进入合并输入。
+        """
+        state = {"running": 0, "peak": 0, "merge_inputs": []}
+
+        class FakeAsyncLLM:
+            model = "mock_model"
+            generation_params = {"max_tokens": 100}
+            base_system_prompt = ""
+
+            async def agenerate_report(self, system_prompt, content):
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+                await asyncio.sleep(0.01)
+                state["running"] -= 1
+                if content.startswith("以下是"):
+                    state["merge_inputs"].append(content)
+                    return "Final report."
+                return "[ERROR] timeout" if content.startswith("（第 1/") else "Partial summary."
+
+        self.report_generator = ReportGenerator(FakeAsyncLLM(), ["github"], max_concurrency=2, context_tokens=600)
+        self.report_generator.prompts = self.mock_prompts
+        large_content = "".join(f"- Fix bug number {i} in the parser module\n" for i in range(300))
+        with open(self.test_markdown_file_path, 'w') as file:
+            file.write(large_content)
+
+        results = self.report_generator.generate_github_reports([self.test_markdown_file_path] * 2)
+
+        self.assertEqual([report for report, _ in results], ["Final report."] * 2)
+        self.assertEqual(state["peak"], 2)
+        for merge_input in state["merge_inputs"]:
+            self.assertNotIn("[ERROR]", merge_input)
+            self.assertIn("Partial summary.", merge_input)
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_daily_digest_merges_only_new_topic(self, mock_preload_prompts):
+        """
+        测试滚动摘要：第一份话题报告直接作为摘要，之后只合并新报告，重复的小时不会再次合并，
+        每日汇总报告基于摘要生成。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["github", "hacker_news_hours_topic", "hacker_news_daily_report"])
+        self.report_generator.prompts = dict(self.mock_prompts, hacker_news_daily_digest="Digest merge prompt...")
+        hour_08 = os.path.join(self.test_hn_daily_dir_path, "08_delta.md")  # 增量快照与完整快照对应同一小时
+        hour_12 = os.path.join(self.test_hn_daily_dir_path, "12.md")
+
+        digest = self.report_generator.update_hn_daily_digest(hour_08, "Morning topics")
+        self.assertEqual(digest, "Morning topics")
+        self.mock_llm.generate_report.assert_not_called()
+
+        self.mock_llm.generate_report.return_value = "Merged digest of morning and noon topics"
+        digest = self.report_generator.update_hn_daily_digest(hour_12, "Noon topics")
+        self.assertEqual(digest, "Merged digest of morning and noon topics")
+        merge_input = self.mock_llm.generate_report.call_args.args[1]
+        self.assertIn("Morning topics", merge_input)
+        self.assertIn("Noon topics", merge_input)
+
+        self.report_generator.update_hn_daily_digest(hour_12, "Noon topics")
+        self.assertEqual(self.mock_llm.generate_report.call_count, 1)
+
+        self.mock_llm.generate_report.reset_mock()
+        self.mock_llm.generate_report.return_value = "Daily trends"
+        self.report_generator.generate_hn_daily_report(self.test_hn_daily_dir_path)
+        self.mock_llm.generate_report.assert_called_once_with(
+            self.mock_prompts["hacker_news_daily_report"], "Merged digest of morning and noon topics"
+        )
+
+    @patch.object(ReportGenerator, '_preload_prompts', return_value=None)
+    def test_daily_digest_appends_without_merge_prompt(self, mock_preload_prompts):
+        """
+        测试未配置合并提示时，新话题报告按小时追加到摘要中。
+        """
+        self.report_generator = ReportGenerator(self.mock_llm, ["hacker_news_hours_topic"])
+        self.report_generator.prompts = self.mock_prompts
+
+        self.report_generator.update_hn_daily_digest(os.path.join(self.test_hn_daily_dir_path, "08.md"), "Morning topics")
+        digest = self.report_generator.update_hn_daily_digest(os.path.join(self.test_hn_daily_dir_path, "12.md"), "Noon topics")
+
+        self.assertEqual(digest, "Morning topics\n\n## 12:00\n\nNoon topics")
+        self.mock_llm.generate_report.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# 将 src 目录添加到模块搜索路径，方便导入项目中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from report_renderer import ReportRenderer  # 导入要测试的渲染器
+
+
+class TestReportRenderer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.report_path = os.path.join(self.tmpdir.name, '2024-09-01_report.md')
+        self.report = "# 进展\n\n- [PR](https://github.com/a/b/pull/1)\n\n---\n"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_render_produces_all_parts(self):
+        """
+        测试渲染结果包含普通 HTML、内联样式 HTML 和纯文本。
+        """
+        rendered = ReportRenderer().render(self.report)
+        self.assertIn('<h1>进展</h1>', rendered['html'])
+        self.assertIn('<a href="https://github.com/a/b/pull/1" style="', rendered['email_html'])
+        self.assertIn('<hr style="', rendered['email_html'])
+        self.assertEqual(rendered['text'], self.report)
+        self.assertIn('*进展*', rendered['slack'])
+        self.assertIn('• <https://github.com/a/b/pull/1|PR>', rendered['slack'])
+
+    def test_same_report_rendered_once(self):
+        """
+        测试同一份报告只渲染一次，内容变化后重新渲染。
+        """
+        renderer = ReportRenderer()
+        first = renderer.render(self.report)
+        self.assertIs(renderer.render(self.report), first)
+        self.assertEqual(renderer.renders, 1)
+        renderer.render(self.report + "\n更新")
+        self.assertEqual(renderer.renders, 2)
+
+    def test_cache_file_reused_across_renderers(self):
+        """
+        测试提供报告路径时渲染结果缓存在报告旁，其他渲染器实例可直接复用。
+        """
+        ReportRenderer().render(self.report, self.report_path)
+        cache_path = ReportRenderer.cache_path(self.report_path)
+        self.assertTrue(cache_path.endswith('2024-09-01_report.render.json'))
+        self.assertTrue(os.path.exists(cache_path))
+
+        renderer = ReportRenderer()
+        renderer.render(self.report, self.report_path)
+        self.assertEqual(renderer.renders, 0)
+        renderer.render("# 新报告", self.report_path)  # 哈希不匹配，缓存失效
+        self.assertEqual(renderer.renders, 1)
+
+    def test_lru_eviction(self):
+        """
+        测试内存缓存超过上限后淘汰最久未使用的条目。
+        """
+        renderer = ReportRenderer(max_entries=2)
+        for report in ("a", "b", "c"):
+            renderer.render(report)
+        renderer.render("a")
+        self.assertEqual(renderer.renders, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
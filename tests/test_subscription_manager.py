@@ -2,7 +2,10 @@ import sys
 import os
 import unittest
 import json
-from unittest.mock import patch, mock_open, call
+import tempfile
+import threading
+from datetime import datetime
+from unittest.mock import patch, mock_open
 
 # 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
@@ -15,23 +18,24 @@ class TestSubscriptionManager(unittest.TestCase):
         self.subscriptions_file = 'test_subscriptions.json'  # 测试用的订阅文件名
         self.initial_data = ["DjangoPeng/openai-quickstart", "some/repo"]  # 测试用的初始订阅数据
 
-    @patch('builtins.open', new_callable=mock_open, read_data=json.dumps(["DjangoPeng/openai-quickstart", "some/repo"]))
-    def test_save_subscriptions(self, mock_file):
+    def test_save_subscriptions(self):
         """
-        测试 save_subscriptions 方法是否正确保存订阅数据到文件。
+        测试 save_subscriptions 方法是否先写入唯一的临时文件，再原子替换订阅文件。
         """
-        # 创建 SubscriptionManager 实例，并设置初始数据
-        manager = SubscriptionManager(self.subscriptions_file)
-        manager.subscriptions = self.initial_data
-        manager.save_subscriptions()
-        
-        # 验证 open 函数是否被调用，分别用于读取和写入文件
-        mock_file.assert_any_call(self.subscriptions_file, 'r')  # 检查读取操作
-        mock_file.assert_any_call(self.subscriptions_file, 'w')  # 检查写入操作
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, [])
+            manager = SubscriptionManager(path)
+            manager.subscriptions = self.initial_data
+            with patch('os.replace', wraps=os.replace) as mock_replace:
+                manager.save_subscriptions()
 
-        # 提取写入的字符串内容，并验证写入内容是否正确
-        written_data = ''.join([call_arg.args[0] for call_arg in mock_file().write.call_args_list])
-        self.assertEqual(json.loads(written_data), self.initial_data)
+            tmp_path, target = mock_replace.call_args.args
+            self.assertEqual(target, path)
+            self.assertEqual(os.path.dirname(tmp_path), tmpdir)  # 临时文件与订阅文件在同一目录，替换是原子的
+            self.assertNotEqual(tmp_path, path + '.tmp')
+            self.assertFalse(os.path.exists(tmp_path))
+            with open(path) as f:
+                self.assertEqual(json.load(f), self.initial_data)
 
     @patch('builtins.open', new_callable=mock_open, read_data=json.dumps(["DjangoPeng/openai-quickstart", "some/repo"]))
     def test_load_subscriptions(self, mock_file):
@@ -62,43 +66,142 @@ class TestSubscriptionManager(unittest.TestCase):
         # 验证 open 函数是否正确调用以读取文件
         mock_file.assert_called_once_with(self.subscriptions_file, 'r')
 
-    @patch('builtins.open', new_callable=mock_open, read_data=json.dumps(["DjangoPeng/openai-quickstart"]))
-    def test_add_subscription(self, mock_file):
+    def test_add_subscription(self):
         """
         测试 add_subscription 方法是否正确添加新的订阅，并保存到文件。
         """
-        # 创建 SubscriptionManager 实例，并添加新的订阅
-        manager = SubscriptionManager(self.subscriptions_file)
-        manager.add_subscription("new/repo")
-        
-        # 验证新的订阅是否正确添加到订阅列表中
-        self.assertIn("new/repo", manager.subscriptions)
-        
-        # 验证 open 函数是否正确调用以写入文件
-        mock_file.assert_called_with(self.subscriptions_file, 'w')
-        
-        # 提取写入的字符串内容，并验证写入的内容是否正确
-        written_data = ''.join([call_arg.args[0] for call_arg in mock_file().write.call_args_list])
-        self.assertEqual(json.loads(written_data), ["DjangoPeng/openai-quickstart", "new/repo"])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, ["DjangoPeng/openai-quickstart"])
+            manager = SubscriptionManager(path)
+            manager.add_subscription("new/repo")
 
-    @patch('builtins.open', new_callable=mock_open, read_data=json.dumps(["DjangoPeng/openai-quickstart", "some/repo"]))
-    def test_remove_subscription(self, mock_file):
+            self.assertIn("new/repo", manager.subscriptions)
+            with open(path) as f:
+                self.assertEqual(json.load(f), ["DjangoPeng/openai-quickstart", "new/repo"])
+
+    def test_remove_subscription(self):
         """
         测试 remove_subscription 方法是否正确移除订阅，并保存到文件。
         """
-        # 创建 SubscriptionManager 实例，并移除指定的订阅
-        manager = SubscriptionManager(self.subscriptions_file)
-        manager.remove_subscription("some/repo")
-        
-        # 验证订阅列表中是否已移除指定的订阅
-        self.assertNotIn("some/repo", manager.subscriptions)
-        
-        # 验证 open 函数是否正确调用以写入文件
-        mock_file.assert_called_with(self.subscriptions_file, 'w')
-        
-        # 提取写入的字符串内容，并验证写入的内容是否正确
-        written_data = ''.join([call_arg.args[0] for call_arg in mock_file().write.call_args_list])
-        self.assertEqual(json.loads(written_data), ["DjangoPeng/openai-quickstart"])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, self.initial_data)
+            manager = SubscriptionManager(path)
+            manager.remove_subscription("some/repo")
+
+            self.assertNotIn("some/repo", manager.subscriptions)
+            with open(path) as f:
+                self.assertEqual(json.load(f), ["DjangoPeng/openai-quickstart"])
+
+    def _write_subscriptions(self, tmpdir, data):
+        path = os.path.join(tmpdir, 'subscriptions.json')
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return path
+
+    def test_bulk_changes_write_once(self):
+        """
+        测试批量添加和 batch() 期间的多次修改只写入一次文件。
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, self.initial_data)
+            manager = SubscriptionManager(path)
+            with patch('os.replace', wraps=os.replace) as mock_replace:
+                self.assertEqual(manager.add_subscriptions([f"owner/repo{i}" for i in range(100)] + ["some/repo"]), 100)
+                with manager.batch():
+                    manager.remove_subscriptions([f"owner/repo{i}" for i in range(50)])
+                    manager.add_subscription("new/repo", priority=5)
+                    manager.update_subscription("some/repo", frequency_days=7)
+                self.assertEqual(mock_replace.call_count, 2)
+
+            self.assertEqual(len(SubscriptionManager(path)), 53)
+            self.assertNotIn("owner/repo0", manager)
+            self.assertFalse(os.path.exists(path + '.tmp'))
+
+    def test_metadata_roundtrip_and_priority_order(self):
+        """
+        测试元数据的保存和加载，以及按优先级排序的订阅列表。
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, self.initial_data)
+            manager = SubscriptionManager(path)
+            manager.add_subscription("hot/repo", priority=10, frequency_days=1)
+            manager.mark_run(["some/repo"], when=datetime(2024, 9, 1, 8, 0))
+
+            with open(path) as f:
+                saved = json.load(f)
+            self.assertEqual(saved[0], "DjangoPeng/openai-quickstart")  # 没有元数据的订阅保持字符串格式
+            self.assertEqual(saved[1], {"repo": "some/repo", "last_run": "2024-09-01T08:00:00"})
+
+            reloaded = SubscriptionManager(path)
+            self.assertEqual(reloaded.get_subscription("hot/repo"), {"priority": 10, "frequency_days": 1})
+            self.assertEqual(reloaded.list_subscriptions(), ["DjangoPeng/openai-quickstart", "some/repo", "hot/repo"])
+            self.assertEqual(reloaded.list_subscriptions(by_priority=True)[0], "hot/repo")
+
+    def test_writes_merge_changes_from_other_managers(self):
+        """
+        测试修改前重新读取订阅文件，不会用内存中过时的内容覆盖其他管理器（如命令行、界面）的修改。
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, self.initial_data)
+            daemon = SubscriptionManager(path)
+            cli = SubscriptionManager(path)
+
+            cli.add_subscription("cli/repo", priority=2)
+            cli.remove_subscription("DjangoPeng/openai-quickstart")
+            daemon.mark_run(["some/repo"], when=datetime(2024, 9, 1, 8, 0))
+
+            reloaded = SubscriptionManager(path)
+            self.assertEqual(reloaded.list_subscriptions(), ["some/repo", "cli/repo"])
+            self.assertEqual(reloaded.get_subscription("cli/repo"), {"priority": 2})
+            self.assertEqual(reloaded.get_subscription("some/repo"), {"last_run": "2024-09-01T08:00:00"})
+
+    def test_concurrent_writers_do_not_lose_changes(self):
+        """
+        测试多个线程通过不同的管理器同时添加订阅时，文件锁保证所有修改都被保存。
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, [])
+            managers = [SubscriptionManager(path) for _ in range(4)]
+
+            def add(i):
+                for j in range(10):
+                    managers[i].add_subscription(f"owner{i}/repo{j}")
+            threads = [threading.Thread(target=add, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(len(SubscriptionManager(path)), 40)
+            self.assertEqual([name for name in os.listdir(tmpdir) if name.endswith('.tmp')], [])
+
+    def test_invalid_entries_are_skipped(self):
+        """
+        测试缺少 repo 的订阅条目被忽略并记录警告，而不是导致加载失败。
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, ["some/repo", {"priority": 3}, {"repo": "owner/a"}])
+            manager = SubscriptionManager(path)
+            self.assertEqual(manager.list_subscriptions(), ["some/repo", "owner/a"])
+            self.assertEqual(manager.add_subscriptions([{"frequency_days": 1}, "owner/b"]), 1)
+
+    def test_import_subscriptions(self):
+        """
+        测试从文本文件导入订阅，以及替换模式导入 JSON 文件。
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self._write_subscriptions(tmpdir, self.initial_data)
+            manager = SubscriptionManager(path)
+            text_path = os.path.join(tmpdir, 'repos.txt')
+            with open(text_path, 'w') as f:
+                f.write("# 待导入\nsome/repo\nowner/a\n\nowner/b\n")
+            self.assertEqual(manager.import_subscriptions(text_path), 2)
+
+            json_path = os.path.join(tmpdir, 'import.json')
+            with open(json_path, 'w') as f:
+                json.dump([{"repo": "owner/c", "priority": 3}], f)
+            self.assertEqual(manager.import_subscriptions(json_path, replace=True), 1)
+            self.assertEqual(SubscriptionManager(path).list_subscriptions(), ["owner/c"])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,277 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from task_queue import TaskQueue  # 导入要测试的 TaskQueue 类
+from event_store import EventStore
+from fetch_engine import FetchEngine, RepoFetchResult
+from github_client import GitHubClient
+from daemon_process import github_job, run_github_tasks
+
+
+def fetched(results):
+    """
+    构造模拟的 FetchEngine.export_progress_by_date_range：逐个回调结果并返回列表。
+    """
+    def export(repos, days, priorities=None, on_result=None, window_since=None):
+        for result in results:
+            on_result(result)
+        return results
+    return export
+
+
+class TestTaskQueue(unittest.TestCase):
+    def setUp(self):
+        """
+        在每个测试方法之前运行，创建临时数据库。
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "sentinel.db")
+        self.queue = TaskQueue(self.db_path, max_attempts=2)
+
+    def tearDown(self):
+        self.queue.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_stages_become_pending_in_order(self):
+        """
+        测试只有上一阶段完成后，下一阶段的任务才会待执行。
+        """
+        run_id = self.queue.start_run('github_job', ['a/x', 'b/y'], {'days': 1})
+        self.assertEqual(self.queue.pending(run_id, 'fetch'), ['a/x', 'b/y'])
+        self.assertEqual(self.queue.pending(run_id, 'report'), [])
+
+        self.queue.complete(run_id, 'b/y', 'fetch', {'file_path': 'y.md'})
+        self.assertEqual(self.queue.pending(run_id, 'fetch'), ['a/x'])
+        self.assertEqual(self.queue.pending(run_id, 'report'), ['b/y'])
+        self.assertEqual(self.queue.result(run_id, 'b/y', 'fetch'), {'file_path': 'y.md'})
+        self.assertEqual(self.queue.done(run_id, 'fetch'), ['b/y'])
+
+    def test_unfinished_run_survives_restart(self):
+        """
+        测试重新打开数据库后仍能找到未完成的运行及其参数。
+        """
+        run_id = self.queue.start_run('github_job', ['a/x'], {'days': 2})
+        self.queue.close()
+
+        self.queue = TaskQueue(self.db_path)
+        self.assertEqual(self.queue.unfinished_runs('github_job'), [{'run_id': run_id, 'params': {'days': 2}}])
+        for stage in TaskQueue.STAGES:
+            self.queue.complete(run_id, 'a/x', stage)
+        self.assertTrue(self.queue.finish_if_done(run_id))
+        self.assertEqual(self.queue.unfinished_runs('github_job'), [])
+
+    def test_failed_task_retries_then_skips_later_stages(self):
+        """
+        测试任务失败后保留重试机会，超过最大尝试次数后标记失败并跳过后续阶段。
+        """
+        run_id = self.queue.start_run('github_job', ['a/x'])
+        self.queue.fail(run_id, 'a/x', 'fetch', 'timeout')
+        self.assertEqual(self.queue.pending(run_id, 'fetch'), ['a/x'])
+
+        self.queue.fail(run_id, 'a/x', 'fetch', 'timeout')
+        self.assertEqual(self.queue.pending(run_id, 'fetch'), [])
+        self.assertEqual(self.queue.stats(run_id), {
+            'fetch': {'failed': 1}, 'report': {'skipped': 1}, 'notify': {'skipped': 1},
+        })
+        self.assertTrue(self.queue.finish_if_done(run_id))
+
+    def test_resume_only_runs_unfinished_tasks(self):
+        """
+        测试恢复运行时不会重复抓取和生成报告，只补发失败的通知。
+        """
+        report_path = os.path.join(self.tmp_dir, "x_report.md")
+        with open(report_path, 'w') as f:
+            f.write("Saved report")
+        fetch_engine = MagicMock()
+        fetch_engine.export_progress_by_date_range.side_effect = fetched([
+            RepoFetchResult('a/x', {'commits': [{'sha': 'abc'}]}, 0.1, file_path=os.path.join(self.tmp_dir, "x.md"))
+        ])
+        report_generator = MagicMock()
+        report_generator.generate_github_reports.side_effect = (
+            lambda paths, on_result: on_result(0, "Saved report", report_path)
+        )
+        notifier = MagicMock()
+        sent = [False]  # 第一次通知失败，但 Slack 渠道已发送成功
+        retried_with = []
+
+        def notify(repo, report, callback, report_path, delivered):
+            retried_with.append(list(delivered))
+            if not sent[0]:
+                delivered.append('slack')
+            callback(sent[0])
+        notifier.notify_github_report.side_effect = notify
+
+        run_id = self.queue.start_run('github_job', ['a/x'], {'days': 1})
+        run_github_tasks(run_id, fetch_engine, report_generator, notifier, 1, self.queue)
+        self.assertEqual(self.queue.unfinished_runs('github_job')[0]['run_id'], run_id)
+
+        sent[0] = True
+        run_github_tasks(run_id, fetch_engine, report_generator, notifier, 1, self.queue)
+
+        fetch_engine.export_progress_by_date_range.assert_called_once()
+        report_generator.generate_github_reports.assert_called_once()
+        self.assertEqual(notifier.notify_github_report.call_args.args, ('a/x', "Saved report"))
+        self.assertEqual(retried_with, [[], ['slack']])  # 重新通知时已发送的渠道被跳过
+        self.assertEqual(self.queue.result(run_id, 'a/x', 'notify'), {'delivered': ['slack']})
+        self.assertEqual(self.queue.unfinished_runs('github_job'), [])
+
+    def test_fetch_errors_fail_fetch_task(self):
+        """
+        测试抓取失败的仓库记录为失败并保持待抓取，不会被当作没有活动而跳过。
+        """
+        fetch_engine = MagicMock()
+        fetch_engine.export_progress_by_date_range.side_effect = fetched([
+            RepoFetchResult('a/x', {}, 0.0, error="commits: 502 Bad Gateway"),
+        ])
+        report_generator = MagicMock()
+        notifier = MagicMock()
+
+        run_id = self.queue.start_run('github_job', ['a/x'], {'days': 1})
+        run_github_tasks(run_id, fetch_engine, report_generator, notifier, 1, self.queue)
+
+        self.assertEqual(self.queue.pending(run_id, 'fetch'), ['a/x'])
+        report_generator.write_no_activity_report.assert_not_called()
+        notifier.notify_no_activity.assert_not_called()
+        self.assertEqual(self.queue.unfinished_runs('github_job')[0]['run_id'], run_id)
+
+    def test_fetch_exception_keeps_checkpointed_repos(self):
+        """
+        测试抓取阶段中途抛出异常时，已记录检查点的仓库保持完成，只有其余仓库记为失败。
+        """
+        def export(repos, days, priorities=None, on_result=None, window_since=None):
+            on_result(RepoFetchResult('a/x', {'commits': [{'sha': 'abc'}]}, 0.1, file_path='x.md'))
+            raise RuntimeError("connection reset")
+        fetch_engine = MagicMock()
+        fetch_engine.export_progress_by_date_range.side_effect = export
+
+        run_id = self.queue.start_run('github_job', ['a/x', 'b/y'], {'days': 1})
+        run_github_tasks(run_id, fetch_engine, MagicMock(), MagicMock(), 1, self.queue)
+
+        self.assertEqual(self.queue.result(run_id, 'a/x', 'fetch')['file_path'], 'x.md')
+        self.assertEqual(self.queue.pending(run_id, 'fetch'), ['b/y'])
+
+    def test_missing_report_file_fails_only_its_notify(self):
+        """
+        测试恢复通知时报告文件丢失，只让该仓库的通知失败，其他仓库照常发送。
+        """
+        report_path = os.path.join(self.tmp_dir, "y_report.md")
+        with open(report_path, 'w') as f:
+            f.write("Saved report")
+        notifier = MagicMock()
+        notifier.notify_github_report.side_effect = lambda repo, report, callback, **kwargs: callback(True)
+
+        run_id = self.queue.start_run('github_job', ['a/x', 'b/y'], {'days': 1})
+        for repo, path in (('a/x', os.path.join(self.tmp_dir, "missing.md")), ('b/y', report_path)):
+            self.queue.complete(run_id, repo, 'fetch', {'file_path': 'x.md', 'events': 1})
+            self.queue.complete(run_id, repo, 'report', {'report_file_path': path})
+        run_github_tasks(run_id, MagicMock(), MagicMock(), notifier, 1, self.queue)
+
+        self.assertEqual([c.args[0] for c in notifier.notify_github_report.call_args_list], ['b/y'])
+        self.assertEqual(self.queue.pending(run_id, 'notify'), ['a/x'])
+        self.assertEqual(self.queue.result(run_id, 'b/y', 'notify'), {'delivered': []})
+
+    def test_github_job_reschedules_resumed_runs(self):
+        """
+        测试恢复的运行完成抓取后重新安排下次运行，仍有待执行任务的仓库不会再次到期。
+        """
+        fetch_engine = MagicMock()
+        fetch_engine.export_progress_by_date_range.side_effect = fetched([
+            RepoFetchResult('a/x', {'commits': [{'sha': 'abc'}]}, 0.1, file_path=os.path.join(self.tmp_dir, "x.md"))
+        ])
+        report_generator = MagicMock()  # 不调用 on_result：报告阶段保持待执行
+        repo_scheduler = MagicMock()
+        repo_scheduler.due.return_value = []
+
+        run_id = self.queue.start_run('github_job', ['a/x'], {'days': 1})
+        self.assertEqual(self.queue.active_items('github_job'), {'a/x'})
+        github_job(repo_scheduler, fetch_engine, report_generator, MagicMock(), self.queue)
+
+        repo_scheduler.reschedule.assert_called_once_with(['a/x'])
+        self.assertEqual(repo_scheduler.due.call_args.kwargs['exclude'], {'a/x'})
+        self.assertEqual(self.queue.unfinished_runs('github_job')[0]['run_id'], run_id)
+
+    def test_refetched_events_do_not_count_as_activity(self):
+        """
+        测试游标边界上重复抓取的事件不算新的活动：相同数据运行两次，第二次跳过 LLM 和通知。
+        """
+        store = EventStore(self.db_path)
+        self.addCleanup(store.close)
+        client = MagicMock()
+        client.rate_limiter = client.cache = None
+        client.event_store = store
+        client.date_range.side_effect = GitHubClient.date_range
+        client.export_local_progress.side_effect = lambda repo, since, until: os.path.join(self.tmp_dir, "x.md")
+        # 游标包含边界，最新的提交、Issue 和 PR 每次都会被再次返回
+        client.fetch_commits.return_value = [{"sha": "abc", "commit": {"author": {"date": "2024-08-20T10:00:00Z"}},
+                                              "author": {"login": "dev"}}]
+        client.fetch_issues.return_value = [{"number": 1, "title": "Fix", "closed_at": "2024-08-20T08:00:00Z",
+                                             "updated_at": "2024-08-20T08:00:00Z", "user": {"login": "dev"}}]
+        client.fetch_pull_requests.return_value = []
+        fetch_engine = FetchEngine(client, max_workers=2)
+        report_generator = MagicMock()
+        report_generator.write_no_activity_report.side_effect = lambda path, repo, days: ("模板", path + "_report")
+        report_generator.generate_github_reports.side_effect = (
+            lambda paths, on_result: on_result(0, "Report", paths[0] + "_report")
+        )
+        notifier = MagicMock()
+        notifier.notify_github_report.side_effect = lambda repo, report, callback, **kwargs: callback(True)
+        notifier.notify_no_activity.return_value = False  # 非摘要模式：没有活动的仓库不发送通知
+
+        first = self.queue.start_run('github_job', ['a/x'], {'days': 1})
+        run_github_tasks(first, fetch_engine, report_generator, notifier, 1, self.queue)
+        second = self.queue.start_run('github_job', ['a/x'], {'days': 1})
+        run_github_tasks(second, fetch_engine, report_generator, notifier, 1, self.queue)
+
+        self.assertEqual(self.queue.result(first, 'a/x', 'fetch')['events'], 2)
+        self.assertEqual(self.queue.result(second, 'a/x', 'fetch')['events'], 0)
+        report_generator.generate_github_reports.assert_called_once()
+        report_generator.write_no_activity_report.assert_called_once()
+        notifier.notify_github_report.assert_called_once()
+        self.assertEqual(self.queue.result(second, 'a/x', 'notify'), {'skipped': True})
+
+    def test_quiet_repos_skip_llm_and_notifier(self):
+        """
+        测试没有有效更新（或只有机器人更新）的仓库使用模板报告，不调用 LLM 也不发送通知。
+        """
+        bot_commit = {'sha': 'b', 'author': {'login': 'dependabot[bot]', 'type': 'Bot'}}
+        fetch_engine = MagicMock()
+        fetch_engine.export_progress_by_date_range.side_effect = fetched([
+            RepoFetchResult('a/x', {'commits': [{'sha': 'a', 'author': {'login': 'dev'}}]}, 0.1, file_path='x.md'),
+            RepoFetchResult('b/y', {'commits': [bot_commit], 'issues': []}, 0.1, file_path='y.md'),
+            RepoFetchResult('c/z', {}, 0.1, file_path='z.md'),
+        ])
+        report_generator = MagicMock()
+        report_generator.write_no_activity_report.side_effect = lambda path, repo, days: ("模板", path + "_report")
+        report_generator.generate_github_reports.side_effect = (
+            lambda paths, on_result: on_result(0, "Report", paths[0] + "_report")
+        )
+        notifier = MagicMock()
+        notifier.notify_github_report.side_effect = lambda repo, report, callback, **kwargs: callback(True)
+        notifier.notify_no_activity.return_value = False  # 非摘要模式：没有活动的仓库不发送通知
+
+        run_id = self.queue.start_run('github_job', ['a/x', 'b/y', 'c/z'], {'days': 1})
+        run_github_tasks(run_id, fetch_engine, report_generator, notifier, 1, self.queue)
+
+        report_generator.generate_github_reports.assert_called_once()
+        self.assertEqual(report_generator.generate_github_reports.call_args.args[0], ['x.md'])
+        self.assertEqual([c.args[1] for c in report_generator.write_no_activity_report.call_args_list], ['b/y', 'c/z'])
+        self.assertEqual(notifier.notify_github_report.call_count, 1)
+        self.assertEqual(self.queue.result(run_id, 'c/z', 'notify'), {'skipped': True})
+        self.assertEqual(self.queue.unfinished_runs('github_job'), [])
+
+        # min_events 为 0 时不跳过
+        run_id = self.queue.start_run('github_job', ['c/z'], {'days': 1})
+        fetch_engine.export_progress_by_date_range.side_effect = fetched([RepoFetchResult('c/z', {}, 0.1, file_path='z.md')])
+        run_github_tasks(run_id, fetch_engine, report_generator, notifier, 1, self.queue, min_events=0)
+        self.assertEqual(report_generator.generate_github_reports.call_args.args[0], ['z.md'])
+
+
+if __name__ == '__main__':
+    unittest.main()
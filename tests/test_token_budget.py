@@ -0,0 +1,44 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# 添加 src 目录到模块搜索路径，以便可以导入 src 目录中的模块
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from token_budget import count_tokens, split_into_chunks  # 导入要测试的 token 估算工具
+
+
+class TestTokenBudget(unittest.TestCase):
+    @patch('token_budget._encoding', return_value=None)
+    def test_heuristic_counts_cjk_per_character(self, mock_encoding):
+        """
+        测试没有 tiktoken 时，中文按字计数，其余文本约 4 个字符一个 token。
+        """
+        self.assertEqual(count_tokens(""), 0)
+        self.assertEqual(count_tokens("abcdefgh"), 2)
+        self.assertEqual(count_tokens("修复问题"), 4)
+        self.assertEqual(count_tokens("fix 修复"), 3)
+
+    def test_chunks_respect_budget_and_keep_content(self):
+        """
+        测试分块后每块不超过预算，且拼接后与原文一致。
+        """
+        text = "".join(f"- Issue number {i} fixed in this release\n" for i in range(200))
+        text += "x" * 1000 + "\n"  # 单行超出预算
+        chunks = split_into_chunks(text, 100)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), text)
+        for chunk in chunks:
+            self.assertLessEqual(count_tokens(chunk), 100)
+
+    def test_small_text_is_single_chunk(self):
+        """
+        测试未超出预算的文本保持为一块。
+        """
+        self.assertEqual(split_into_chunks("line 1\nline 2\n", 100), ["line 1\nline 2\n"])
+
+
+if __name__ == '__main__':
+    unittest.main()